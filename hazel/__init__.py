@@ -1,3 +1,11 @@
 from .hazel import AdWordsClient, AdWordsClientOptions
 from .api import GoogleAdWordsAPI, GoogleAdsAPI
 from .reporting import GoogleAdWordsReporter, GoogleAdsReporter
+from .cache import ReportCache
+from .sink import ReportSink, ParquetSink, CsvSink, JsonLinesSink
+from .lookup import LookupCache
+from .geo import GeoTargetIndex
+from .ratelimit import RateLimiter, TokenBucket
+from .pool import ClientPool
+from .credentials import TokenCache
+from .aio import AsyncGoogleAdsAPI, AsyncGoogleAdsReporter
@@ -0,0 +1,15 @@
+import argparse
+
+from .geo import GeoTargetIndex
+
+parser = argparse.ArgumentParser(prog='hazel')
+subparsers = parser.add_subparsers(dest='command', required=True)
+refresh_parser = subparsers.add_parser('refresh-geo-targets', help='Rebuild the local geo target constant index from a geo targets CSV.')
+refresh_parser.add_argument('csv', help='Path or URL of the geo targets CSV.')
+refresh_parser.add_argument('directory', help='Directory of the index.')
+args = parser.parse_args()
+
+if args.command == 'refresh-geo-targets':
+  index = GeoTargetIndex(directory=args.directory)
+  index.refresh(csv_path=args.csv)
+  print(f'Indexed {len(index)} geo target constants in {args.directory}')
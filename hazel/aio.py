@@ -0,0 +1,565 @@
+import os
+import asyncio
+import importlib
+import functools
+import grpc
+import pandas as pd
+import google.auth.transport.requests
+
+from .api import GoogleAdsAPI
+from .reporting import GoogleAdsReporter
+from .base import handle_ga_permission_error, is_transient_error, retry_backoff_delay
+from .query import GoogleAdsQuery
+from .schema import concat_data_frames
+from .extraction import ExtractionPlan
+from .columnar import ColumnarBuilder
+from typing import List, Dict, Set, Tuple, AsyncIterator, Awaitable, Callable, Optional
+from datetime import datetime, date
+from concurrent.futures import Executor, ThreadPoolExecutor
+from google.ads.google_ads.errors import GoogleAdsException
+from google.api_core import exceptions
+
+class AsyncGoogleAdsAPI:
+  """Searches the Google Ads API on a gRPC asyncio channel"""
+  api: GoogleAdsAPI
+  endpoint: str
+  channel_options: List[Tuple[str, any]]
+  executor: Optional[Executor]
+  _channel: Optional[grpc.aio.Channel]
+
+  def __init__(self, api: GoogleAdsAPI, executor: Optional[Executor]=None, endpoint: str='googleads.googleapis.com:443', channel_options: List[Tuple[str, any]]=[('grpc.max_metadata_size', 16 * 1024 * 1024), ('grpc.max_receive_message_length', 64 * 1024 * 1024)]):
+    self.api = api
+    self.executor = executor
+    self._owns_executor = executor is None
+    self.endpoint = endpoint
+    self.channel_options = channel_options
+    self._channel = None
+    self._stub = None
+    self._loop = None
+    self._credentials_lock = None
+
+  @property
+  def customer_id(self) -> Optional[str]:
+    return self.api.customer_id
+
+  async def __aenter__(self) -> 'AsyncGoogleAdsAPI':
+    return self
+
+  async def __aexit__(self, *exc_info):
+    await self.close()
+
+  async def close(self):
+    loop = asyncio.get_running_loop()
+    if self._channel is not None and self._loop is not loop and not self._loop.is_closed():
+      raise RuntimeError('The gRPC channel belongs to another event loop that is still open, so close the API from that loop')
+    if self._channel is not None and self._loop is loop:
+      await self._channel.close()
+    self._channel = None
+    self._stub = None
+    self._loop = None
+    if self._owns_executor and self.executor is not None:
+      executor, self.executor = self.executor, None
+      await loop.run_in_executor(None, executor.shutdown)
+
+  async def run_in_executor(self, function: Callable[..., any], **kwargs) -> any:
+    if self.executor is None:
+      self.executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+    return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(function, **kwargs))
+
+  def _get_stub(self) -> any:
+    loop = asyncio.get_running_loop()
+    if self._stub is not None and self._loop is not loop:
+      if not self._loop.is_closed():
+        raise RuntimeError('The gRPC channel belongs to another event loop that is still open, so close the API before using it from this loop')
+      self._channel = None
+      self._stub = None
+    if self._stub is None:
+      services = importlib.import_module(f'google.ads.google_ads.{self.api.api_version}.proto.services.google_ads_service_pb2_grpc')
+      self._channel = grpc.aio.secure_channel(self.endpoint, grpc.ssl_channel_credentials(), options=self.channel_options)
+      self._stub = services.GoogleAdsServiceStub(self._channel)
+      self._loop = loop
+      self._credentials_lock = asyncio.Lock()
+    return self._stub
+
+  async def _get_metadata(self) -> List[Tuple[str, str]]:
+    credentials = self.api.client.credentials
+    if not credentials.valid:
+      async with self._credentials_lock:
+        if not credentials.valid:
+          await asyncio.get_running_loop().run_in_executor(None, credentials.refresh, google.auth.transport.requests.Request())
+    metadata = [
+      ('authorization', f'Bearer {credentials.token}'),
+      ('developer-token', self.api.client.developer_token),
+    ]
+    if self.api.client.login_customer_id is not None:
+      metadata.append(('login-customer-id', str(self.api.client.login_customer_id)))
+    return metadata
+
+  def _convert_error(self, error: grpc.aio.AioRpcError) -> Exception:
+    metadata = list(error.trailing_metadata() or [])
+    failure_key = f'google.ads.googleads.{self.api.api_version}.errors.googleadsfailure-bin'
+    failure_value = next((v for k, v in metadata if k == failure_key), None)
+    if failure_value is None:
+      return exceptions.from_grpc_status(error.code(), error.details(), errors=[error])
+    failure = self.api.client.get_type('GoogleAdsFailure', version=self.api.api_version)
+    failure.ParseFromString(failure_value)
+    request_id = next((v for k, v in metadata if k == 'request-id'), None)
+    return GoogleAdsException(error, error, failure, request_id)
+
+  async def search(self, customer_id: str, query_text: str, use_search_stream: Optional[bool]=None) -> List[any]:
+    return [row async for batch in self.search_batches(customer_id=customer_id, query_text=query_text, use_search_stream=use_search_stream) for row in batch]
+
+  async def search_data_frame(self, customer_id: str, query_text: str, use_search_stream: Optional[bool]=None, select_fields: Optional[List[str]]=None, typed_schema: bool=False, convert_micros: bool=False, **flatten_options) -> pd.DataFrame:
+    plan = self.api._response_plan(**flatten_options)
+    builder = ColumnarBuilder()
+    await self._flatten_search(customer_id=customer_id, query_text=query_text, use_search_stream=use_search_stream, plans=[plan], builders=[builder])
+    return await self.run_in_executor(
+      self.api._builder_to_data_frame,
+      builder=builder,
+      plan=plan,
+      select_fields=select_fields,
+      typed_schema=typed_schema,
+      convert_micros=convert_micros
+    )
+
+  async def _flatten_search(self, customer_id: str, query_text: str, use_search_stream: Optional[bool], plans: List[ExtractionPlan], builders: List[ColumnarBuilder]):
+    async for batch in self.search_batches(customer_id=customer_id, query_text=query_text, use_search_stream=use_search_stream):
+      await self.run_in_executor(self.api._append_rows, rows=batch, plans=plans, builders=builders)
+
+  async def search_batches(self, customer_id: str, query_text: str, use_search_stream: Optional[bool]=None) -> AsyncIterator[List[any]]:
+    if use_search_stream is None:
+      use_search_stream = self.api.use_search_stream
+    if use_search_stream:
+      batches = self._search_stream_batches(customer_id=customer_id, query_text=query_text)
+    else:
+      batches = self._search_pages(customer_id=customer_id, query_text=query_text)
+    async for batch in batches:
+      yield batch
+
+  async def _search_pages(self, customer_id: str, query_text: str) -> AsyncIterator[List[any]]:
+    stub = self._get_stub()
+    page_token = ''
+    attempt = 0
+    while True:
+      request = self.api.client.get_type('SearchGoogleAdsRequest', version=self.api.api_version)
+      request.customer_id = customer_id
+      request.query = query_text
+      request.page_size = self.api._page_size
+      request.page_token = page_token
+      await self.api.rate_limiter.acquire_async(customer_id=customer_id)
+      try:
+        response = await stub.Search(request, metadata=await self._get_metadata())
+      except grpc.aio.AioRpcError as e:
+        error = self._convert_error(error=e)
+        self.api.rate_limiter.failed(error=error)
+        if attempt >= self.api.page_retries or not is_transient_error(error=error):
+          raise error
+        attempt += 1
+        print(f'Retrying Google Ads response page after error: {error}')
+        await asyncio.sleep(retry_backoff_delay(attempt=attempt, backoff=self.api.page_retry_backoff))
+        continue
+      self.api.rate_limiter.succeeded()
+      attempt = 0
+      yield list(response.results)
+      page_token = response.next_page_token
+      if not page_token:
+        return
+
+  async def _search_stream_batches(self, customer_id: str, query_text: str) -> AsyncIterator[List[any]]:
+    stub = self._get_stub()
+    request = self.api.client.get_type('SearchGoogleAdsStreamRequest', version=self.api.api_version)
+    request.customer_id = customer_id
+    request.query = query_text
+    await self.api.rate_limiter.acquire_async(customer_id=customer_id)
+    try:
+      async for response in stub.SearchStream(request, metadata=await self._get_metadata()):
+        yield list(response.results)
+    except grpc.aio.AioRpcError as e:
+      error = self._convert_error(error=e)
+      self.api.rate_limiter.failed(error=error)
+      raise error
+    self.api.rate_limiter.succeeded()
+
+  @handle_ga_permission_error()
+  async def customer_is_manager(self, customer_id: str=None) -> Optional[bool]:
+    customer_clients = self.api.customer_clients
+    if customer_clients is not None and customer_id in customer_clients and customer_clients[customer_id]['manager'] is not None:
+      return customer_clients[customer_id]['manager']
+    query = self.api._customer_manager_query(customer_id=customer_id)
+    rows = await self.search(customer_id=customer_id, query_text=query.query_text, use_search_stream=False)
+    return bool(rows[0].customer.manager.value) if rows else None
+
+  async def get_customers(self) -> List[str]:
+    rows = await self.search(customer_id=self.customer_id, query_text=self.api._customers_query, use_search_stream=False)
+    return sorted([r.customer_client.client_customer.value.split('/')[1] for r in rows])
+
+  async def get_customer_clients(self, refresh: bool=False) -> Dict[str, Dict[str, any]]:
+    if self.api.customer_clients is not None and not refresh:
+      return self.api.customer_clients
+    has_manager = self.api._has_customer_client_manager
+    rows = await self.search(customer_id=self.customer_id, query_text=self.api._customer_clients_query(has_manager=has_manager), use_search_stream=False)
+    self.api.customer_clients = self.api._customer_clients_from_rows(rows=rows, has_manager=has_manager)
+    return self.api.customer_clients
+
+  async def get_customer_hierarchy(self, exclude_customers: List[str]=[], max_concurrency: int=8) -> Dict[str, any]:
+    client_customer_ids = await self._get_client_customer_ids_map(
+      customer_id=self.customer_id,
+      max_concurrency=max_concurrency
+    )
+    return self.api._build_customer_hierarchy(client_customer_ids=client_customer_ids, exclude_customers=exclude_customers)
+
+  async def _get_client_customer_ids_map(self, customer_id: str, max_concurrency: int) -> Dict[str, any]:
+    client_customer_ids = {}
+    queued = {customer_id}
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(customer_id: str):
+      async with semaphore:
+        try:
+          ids = await self._get_client_customer_ids(customer_id=customer_id)
+        except Exception as e:
+          # Errors are kept and raised only if the hierarchy walk reaches the customer, as in GoogleAdsAPI.
+          ids = e
+      client_customer_ids[customer_id] = ids
+      if isinstance(ids, Exception):
+        return
+      child_ids = [i for i in ids or [] if i not in queued]
+      queued.update(child_ids)
+      await asyncio.gather(*(fetch(customer_id=i) for i in child_ids))
+
+    await fetch(customer_id=customer_id)
+    return client_customer_ids
+
+  @handle_ga_permission_error()
+  async def _get_client_customer_ids(self, customer_id: str) -> List[str]:
+    rows = await self.search(customer_id=customer_id, query_text=self.api._client_customer_ids_query, use_search_stream=False)
+    return [row.customer_client_link.client_customer.value.split('/')[1] for row in rows]
+
+  async def lookup_resources(self, customer_id: str, query_getter: Callable[[List[str]], GoogleAdsQuery], resource_names: List[str], key_column: str, cache: Optional[any]=None, typed_schema: bool=False, convert_micros: bool=False, **flatten_options) -> pd.DataFrame:
+    if cache is None:
+      cache = self.api.lookup_cache
+    namespace = self.api._lookup_namespace(query_getter=query_getter, flatten_options=flatten_options)
+
+    async def get_data_frame(query: GoogleAdsQuery) -> pd.DataFrame:
+      return await self.search_data_frame(customer_id=customer_id, query_text=query.query_text, use_search_stream=False, **flatten_options)
+
+    async def fetch(missing_keys: List[str]) -> Dict[str, Dict[str, any]]:
+      missing_resource_names = [k[len(namespace):] for k in missing_keys]
+      data_frames = await asyncio.gather(*(get_data_frame(query=q) for q in query_getter(missing_resource_names).chunked(max_list_size=self.api.max_list_size)))
+      return {
+        namespace + r[key_column]: r
+        for f in data_frames if key_column in f
+        for r in f.to_dict(orient='records')
+      }
+
+    records = await cache.lookup_async(keys=[namespace + n for n in resource_names], fetch=fetch)
+    return self.api._lookup_data_frame(
+      records=records,
+      query_getter=query_getter,
+      resource_names=resource_names,
+      typed_schema=typed_schema,
+      convert_micros=convert_micros,
+      flatten_options=flatten_options
+    )
+
+class AsyncGoogleAdsReporter:
+  """Awaitable versions of the GoogleAdsReporter report methods"""
+  api: AsyncGoogleAdsAPI
+  reporter: GoogleAdsReporter
+
+  def __init__(self, api: AsyncGoogleAdsAPI, reporter: Optional[GoogleAdsReporter]=None):
+    self.api = api
+    self.reporter = reporter if reporter is not None else GoogleAdsReporter(api=api.api)
+
+  async def search(self, query_text: str, customer_id: Optional[str]=None) -> List[any]:
+    return await self.api.search(
+      customer_id=customer_id if customer_id is not None else self.api.customer_id,
+      query_text=query_text,
+      use_search_stream=self.reporter.use_search_stream
+    )
+
+  async def run_for_customers(self, report: Callable[..., Awaitable[Optional[pd.DataFrame]]], customers: Optional[List[str]]=None, max_concurrency: int=8, **kwargs) -> Tuple[pd.DataFrame, Dict[str, Exception]]:
+    customer_clients = await self.api.get_customer_clients()
+    if customers is None:
+      customers = sorted(customer_clients.keys())
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_report(customer_id: str) -> Optional[pd.DataFrame]:
+      async with semaphore:
+        is_manager = await self.api.customer_is_manager(customer_id=customer_id)
+        if is_manager is None or is_manager:
+          return None
+        return await report(customer_id=customer_id, **kwargs)
+
+    results = await asyncio.gather(*(run_report(customer_id=c) for c in customers), return_exceptions=True)
+    data_frames = []
+    errors = {}
+    for customer_id, result in zip(customers, results):
+      if isinstance(result, Exception):
+        errors[customer_id] = result
+      elif result is not None and not result.empty:
+        data_frames.append(result)
+    df = concat_data_frames(data_frames=data_frames) if data_frames else pd.DataFrame()
+    return df, errors
+
+  @handle_ga_permission_error()
+  async def get_query_data_frame(self, query: GoogleAdsQuery, customer_id: Optional[str]=None, exclude_keys: List[str]=['resource_name'], exclude_prefixes: List[str]=['value'], delimiter: str='#', substitute_enum_names: bool=True, json_encode_repeated: bool=True, flatten_single_keys: Optional[Set[str]]={''}, path_overrides: Dict[str, Dict[str, any]]={}, typed_schema: Optional[bool]=None, convert_micros: Optional[bool]=None) -> Optional[pd.DataFrame]:
+    if typed_schema is None:
+      typed_schema = self.reporter.typed_schema
+    if convert_micros is None:
+      convert_micros = self.reporter.convert_micros
+
+    async def get_data_frame(query: GoogleAdsQuery) -> pd.DataFrame:
+      return await self.api.search_data_frame(
+        customer_id=customer_id if customer_id is not None else self.api.customer_id,
+        query_text=query.query_text,
+        use_search_stream=self.reporter.use_search_stream,
+        exclude_keys=exclude_keys,
+        exclude_prefixes=exclude_prefixes,
+        delimiter=delimiter,
+        substitute_enum_names=substitute_enum_names,
+        json_encode_repeated=json_encode_repeated,
+        flatten_single_keys=flatten_single_keys,
+        path_overrides=path_overrides,
+        select_fields=query.select_fields,
+        typed_schema=typed_schema,
+        convert_micros=convert_micros
+      )
+
+    chunk_frames = await asyncio.gather(*(get_data_frame(query=q) for q in query.chunked(max_list_size=self.api.api.max_list_size)))
+    if len(chunk_frames) == 1:
+      return chunk_frames[0]
+    data_frames = [f for f in chunk_frames if not f.empty]
+    return concat_data_frames(data_frames=data_frames).infer_objects() if data_frames else chunk_frames[0]
+
+  async def get_date_range_data_frame(self, options_getter: Callable[[date, date], Dict[str, any]], start_date: datetime, end_date: datetime, customer_id: Optional[str]=None) -> Optional[pd.DataFrame]:
+    if not self.reporter.shard_days:
+      return await self.get_query_data_frame(customer_id=customer_id, **options_getter(start_date=start_date, end_date=end_date))
+    if customer_id is None:
+      customer_id = self.api.customer_id
+    semaphore = asyncio.Semaphore(self.reporter.shard_workers)
+
+    async def run_shard(shard_start: date, shard_end: date) -> Optional[pd.DataFrame]:
+      async with semaphore:
+        for attempt in range(1, self.reporter.shard_retries + 2):
+          try:
+            return await self.get_query_data_frame(customer_id=customer_id, **options_getter(start_date=shard_start, end_date=shard_end))
+          except Exception as e:
+            await asyncio.sleep(self.reporter._shard_retry_delay(error=e, attempt=attempt, shard_start=shard_start, shard_end=shard_end))
+
+    shard_frames = await asyncio.gather(*(run_shard(*s) for s in self.reporter._date_shards(start_date=start_date, end_date=end_date)))
+    return self.reporter._concat_shard_frames(shard_frames=shard_frames)
+
+  async def get_cached_date_range_data_frame(self, options_getter: Callable[[date, date], Dict[str, any]], start_date: datetime, end_date: datetime, customer_id: Optional[str]=None) -> Optional[pd.DataFrame]:
+    if self.reporter.cache is None:
+      return await self.get_date_range_data_frame(options_getter=options_getter, start_date=start_date, end_date=end_date, customer_id=customer_id)
+    if customer_id is None:
+      customer_id = self.api.customer_id
+    loop = asyncio.get_running_loop()
+    key, date_column, days, day_frames, missing_ranges = await loop.run_in_executor(None, functools.partial(
+      self.reporter._read_cached_days,
+      options_getter=options_getter,
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
+    ))
+    range_frames = await asyncio.gather(*(
+      self.get_date_range_data_frame(options_getter=options_getter, start_date=s, end_date=e, customer_id=customer_id)
+      for s, e in missing_ranges
+    ))
+    if any(f is None for f in range_frames):
+      return None
+    for (range_start, range_end), df in zip(missing_ranges, range_frames):
+      await loop.run_in_executor(None, functools.partial(
+        self.reporter._write_fetched_days,
+        df=df,
+        key=key,
+        days=days[days.index(range_start):days.index(range_end) + 1],
+        day_frames=day_frames,
+        customer_id=customer_id,
+        date_column=date_column
+      ))
+    return self.reporter._concat_cached_days(days=days, day_frames=day_frames, missing_ranges=missing_ranges)
+
+  @handle_ga_permission_error()
+  async def get_lookup_data_frame(self, query_getter: Callable[[List[str]], GoogleAdsQuery], resource_names: List[str], key_column: str, customer_id: Optional[str]=None, exclude_keys: List[str]=['resource_name'], exclude_prefixes: List[str]=['value'], delimiter: str='#', substitute_enum_names: bool=True, json_encode_repeated: bool=True, flatten_single_keys: Optional[Set[str]]={''}, path_overrides: Dict[str, Dict[str, any]]={}) -> Optional[pd.DataFrame]:
+    return await self.api.lookup_resources(
+      customer_id=customer_id if customer_id is not None else self.api.customer_id,
+      query_getter=query_getter,
+      resource_names=resource_names,
+      key_column=key_column,
+      typed_schema=self.reporter.typed_schema,
+      convert_micros=self.reporter.convert_micros,
+      exclude_keys=exclude_keys,
+      exclude_prefixes=exclude_prefixes,
+      delimiter=delimiter,
+      substitute_enum_names=substitute_enum_names,
+      json_encode_repeated=json_encode_repeated,
+      flatten_single_keys=flatten_single_keys,
+      path_overrides=path_overrides
+    )
+
+  async def get_fused_query_data_frames(self, options: Dict[str, Dict[str, any]], customer_id: Optional[str]=None) -> Dict[str, Optional[pd.DataFrame]]:
+    plan = self.reporter.plan_fused_queries(queries={name: o['query'] for name, o in options.items()})
+    if self.reporter.verbose:
+      print(f'Running {len(options)} report queries as {len(plan)} fused queries')
+    fused_frames = await asyncio.gather(*(
+      self._get_fused_query_data_frames(query=query, options={n: options[n] for n in names}, customer_id=customer_id)
+      for query, names in plan
+    ))
+    return {
+      name: fused_frames[i][name] if fused_frames[i] is not None else None
+      for i, (_, names) in enumerate(plan)
+      for name in names
+    }
+
+  @handle_ga_permission_error()
+  async def _get_fused_query_data_frames(self, query: GoogleAdsQuery, options: Dict[str, Dict[str, any]], customer_id: Optional[str]) -> Optional[Dict[str, pd.DataFrame]]:
+    split_options = self.reporter._split_options_by_name(options=options)
+    plans = self.api.api._split_plans(options=split_options)
+    builders = {name: ColumnarBuilder() for name in plans}
+    for q in query.chunked(max_list_size=self.api.api.max_list_size):
+      await self.api._flatten_search(
+        customer_id=customer_id if customer_id is not None else self.api.customer_id,
+        query_text=q.query_text,
+        use_search_stream=self.reporter.use_search_stream,
+        plans=list(plans.values()),
+        builders=list(builders.values())
+      )
+    return await self.api.run_in_executor(
+      self.api.api._builders_to_split_data_frames,
+      builders=builders,
+      plans=plans,
+      options=split_options,
+      typed_schema=self.reporter.typed_schema,
+      convert_micros=self.reporter.convert_micros
+    )
+
+  async def get_fused_reports(self, reports: List[str], start_date: datetime, end_date: datetime, customer_id: Optional[str]=None) -> Dict[str, pd.DataFrame]:
+    data_frames = await self.get_fused_query_data_frames(
+      options={
+        name: getattr(self.reporter, f'_{name}_options')(start_date=start_date, end_date=end_date)
+        for name in reports
+      },
+      customer_id=customer_id
+    )
+    lookups = self.reporter._fused_report_lookups(data_frames=data_frames)
+    conversion_action_data_frames = await asyncio.gather(*(
+      self.get_lookup_data_frame(customer_id=customer_id, **lookup_options)
+      for lookup_options in lookups.values()
+    ))
+    return await self.api.run_in_executor(
+      self.reporter._finish_fused_reports,
+      data_frames=data_frames,
+      conversion_action_data_frames=dict(zip(lookups.keys(), conversion_action_data_frames))
+    )
+
+  async def get_ad_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None, json_encode_repeated: bool=True) -> pd.DataFrame:
+    df = await self.get_date_range_data_frame(
+      options_getter=lambda start_date, end_date: self.reporter._ad_report_options(start_date=start_date, end_date=end_date, json_encode_repeated=json_encode_repeated),
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
+    )
+    return df if df is not None else pd.DataFrame()
+
+  async def get_normalized_ad_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None, json_encode_repeated: bool=True) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    dimension_options, _ = self.reporter._normalized_ad_report_options(start_date=start_date, end_date=end_date, json_encode_repeated=json_encode_repeated)
+    fact_df, dimension_df = await asyncio.gather(
+      self.get_date_range_data_frame(
+        options_getter=lambda start_date, end_date: self.reporter._normalized_ad_report_options(start_date=start_date, end_date=end_date, json_encode_repeated=json_encode_repeated)[1],
+        start_date=start_date,
+        end_date=end_date,
+        customer_id=customer_id
+      ),
+      self.get_query_data_frame(customer_id=customer_id, **dimension_options)
+    )
+    if fact_df is None or fact_df.empty or dimension_df is None:
+      return pd.DataFrame(), pd.DataFrame()
+    dimension_df = dimension_df[[c for c in dimension_df.columns if not c.startswith('metrics#')]]
+    return dimension_df, fact_df
+
+  async def get_asset_report(self, customer_id: Optional[str]=None, assets: Optional[List[str]]=None) -> pd.DataFrame:
+    if assets is not None:
+      df = await self.get_lookup_data_frame(customer_id=customer_id, **self.reporter._asset_lookup_options(assets=assets))
+    else:
+      df = await self.get_query_data_frame(
+        customer_id=customer_id,
+        **self.reporter._asset_report_options(assets=assets)
+      )
+    return df if df is not None else pd.DataFrame()
+
+  async def get_ad_asset_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None) -> pd.DataFrame:
+    df = await self.get_date_range_data_frame(
+      options_getter=self.reporter._ad_asset_report_options,
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
+    )
+    return df if df is not None else pd.DataFrame()
+
+  async def get_ad_conversion_action_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None) -> pd.DataFrame:
+    df = await self.get_date_range_data_frame(
+      options_getter=self.reporter._ad_conversion_action_report_options,
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
+    )
+    if df is None or 'segments#conversion_action' not in df:
+      return pd.DataFrame()
+    return await self._merge_conversion_actions(df=df, customer_id=customer_id, how='left')
+
+  async def _merge_conversion_actions(self, df: pd.DataFrame, customer_id: Optional[str], how: str) -> pd.DataFrame:
+    lookup_options = self.reporter._conversion_action_lookup_options(df=df)
+    if lookup_options is None:
+      return df
+    conversion_action_df = await self.get_lookup_data_frame(customer_id=customer_id, **lookup_options)
+    return self.reporter._merge_conversion_action_data_frame(df=df, conversion_action_df=conversion_action_df, how=how)
+
+  @handle_ga_permission_error(default_value=pd.DataFrame())
+  async def get_campaign_performance_report(self, start_date: datetime, end_date: datetime, customer_id: str=None) -> pd.DataFrame:
+    df = await self.get_cached_date_range_data_frame(
+      options_getter=self.reporter._campaign_performance_report_options,
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
+    )
+    return df if df is not None else pd.DataFrame()
+
+  @handle_ga_permission_error(default_value=pd.DataFrame())
+  async def get_ad_group_report(self, start_date: datetime, end_date: datetime, customer_id: str=None) -> pd.DataFrame:
+    df = await self.get_cached_date_range_data_frame(
+      options_getter=self.reporter._ad_group_report_options,
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
+    )
+    return df if df is not None else pd.DataFrame()
+
+  @handle_ga_permission_error(default_value=pd.DataFrame())
+  async def get_campaign_conversion_action_report(self, start_date: datetime, end_date: datetime, customer_id: str=None) -> pd.DataFrame:
+    df = await self.get_date_range_data_frame(
+      options_getter=self.reporter._campaign_conversion_action_report_options,
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
+    )
+    if df is None:
+      return pd.DataFrame()
+    if df.empty:
+      return df
+    return await self._merge_conversion_actions(df=df, customer_id=customer_id, how='outer')
+
+  @handle_ga_permission_error(default_value=pd.DataFrame())
+  async def get_web_keyword_report(self, start_date: datetime, end_date: datetime, customer_id: str=None) -> pd.DataFrame:
+    df = await self.get_date_range_data_frame(
+      options_getter=self.reporter._web_keyword_report_options,
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
+    )
+    if df is None:
+      return pd.DataFrame()
+
+    await self.api.run_in_executor(self.reporter._substitute_web_keyword_enum_names, df=df)
+    return df
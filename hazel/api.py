@@ -1,51 +1,202 @@
 import os
 import sys
 import json
+import time
 import google
+import hashlib
+import functools
+import itertools
+import numpy as np
 import pandas as pd
 
-from .base import handle_ga_permission_error
+from .base import handle_ga_permission_error, is_transient_error, retry_backoff_delay
 from .query import GoogleAdsQuery
+from .extraction import ExtractionPlan
+from .columnar import ColumnarBuilder
+from .prefetch import PrefetchIterator
+from .schema import apply_output_schema
+from .lookup import LookupCache
+from .geo import GeoTargetIndex
+from .ratelimit import RateLimiter
+from .pool import ClientPool
+from .credentials import TokenCache, CachedRefreshTokenClient
 from googleads import adwords, oauth2
-from typing import Dict, List, Set, Optional
+from typing import Dict, List, Set, Tuple, Iterable, Iterator, Callable, Optional
 from string import Formatter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from google.ads.google_ads.client import GoogleAdsClient
 from google.ads.google_ads.v3.services.enums import DeviceEnum
 from google.api_core import protobuf_helpers
 
+response_flatten_defaults = {
+  'exclude_keys': ['resource_name'],
+  'exclude_prefixes': ['value'],
+  'delimiter': '#',
+  'substitute_enum_names': False,
+  'json_encode_repeated': False,
+  'flatten_single_keys': {''},
+  'max_depth': None,
+  'path_overrides': {},
+}
+
 class GoogleAdsAPI:
   client: GoogleAdsClient
+  client_key: str
+  client_pool: ClientPool
   customer_id: Optional[str]
   api_version: str
+  use_search_stream: bool
+  prefetch_depth: int
+  customer_clients: Optional[Dict[str, Dict[str, any]]]
+  max_list_size: int
+  list_chunk_workers: int
+  lookup_cache: LookupCache
+  geo_target_cache: LookupCache
+  geo_target_index: Optional[GeoTargetIndex]
+  rate_limiter: RateLimiter
+  page_retries: int
+  page_retry_backoff: float
   _page_size = 1000
+  _customers_query = '''
+SELECT
+	 customer_client.level,
+	 customer_client.hidden,
+	 customer.id,
+	 customer_client.client_customer
+FROM
+	customer_client
+'''
+  _client_customer_ids_query = ('SELECT customer_client_link.client_customer, customer_client_link.status\n'
+                                'FROM customer_client_link')
 
-  def __init__(self, developer_token: str, client_id: str, client_secret: str, refresh_token: str, login_customer_id: Optional[str]=None, customer_id: Optional[str]=None, api_version: str='v3'):
-    login_config = f'login_customer_id: {login_customer_id}' if login_customer_id is not None else ''
-    config = f'''
-developer_token: {developer_token}
-client_id: {client_id}
-client_secret: {client_secret}
-refresh_token: {refresh_token}
-{login_config}
-    '''
-    self.client = GoogleAdsClient.load_from_string(yaml_str=config)
+  def __init__(self, developer_token: str, client_id: str, client_secret: str, refresh_token: str, login_customer_id: Optional[str]=None, customer_id: Optional[str]=None, api_version: str='v3', use_search_stream: bool=False, prefetch_depth: int=2, max_list_size: int=1000, list_chunk_workers: int=4, lookup_cache: Optional[LookupCache]=None, geo_target_cache: Optional[LookupCache]=None, geo_target_index: Optional[GeoTargetIndex]=None, rate_limiter: Optional[RateLimiter]=None, page_retries: int=3, page_retry_backoff: float=1, client_pool: Optional[ClientPool]=None, token_cache: Optional[TokenCache]=None):
+    self.client_pool = client_pool if client_pool is not None else ClientPool.shared()
+    self.client_key = ClientPool.client_key(
+      developer_token=developer_token,
+      client_id=client_id,
+      client_secret=client_secret,
+      refresh_token=refresh_token,
+      login_customer_id=login_customer_id,
+      token_cache=token_cache
+    )
+    self.client = self.client_pool.get_client(
+      developer_token=developer_token,
+      client_id=client_id,
+      client_secret=client_secret,
+      refresh_token=refresh_token,
+      login_customer_id=login_customer_id,
+      token_cache=token_cache
+    )
     self.customer_id = customer_id
     self.api_version = api_version
+    self.use_search_stream = use_search_stream
+    self.prefetch_depth = prefetch_depth
+    self.customer_clients = None
+    self.max_list_size = max_list_size
+    self.list_chunk_workers = list_chunk_workers
+    self.lookup_cache = lookup_cache if lookup_cache is not None else LookupCache()
+    self.geo_target_cache = geo_target_cache if geo_target_cache is not None else LookupCache(max_size=None, ttl=None)
+    self.geo_target_index = geo_target_index
+    self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter.shared(key=developer_token)
+    self.page_retries = page_retries
+    self.page_retry_backoff = page_retry_backoff
+
+  @property
+  def row_descriptor(self) -> any:
+    return self.client.get_type('GoogleAdsRow', version=self.api_version).DESCRIPTOR
+
+  def get_service(self, name: str) -> any:
+    return self.client_pool.get_service(client_key=self.client_key, name=name, version=self.api_version)
+
+  def search(self, customer_id: str, query_text: str, use_search_stream: Optional[bool]=None, prefetch_depth: Optional[int]=None) -> Iterator[any]:
+    if use_search_stream is None:
+      use_search_stream = self.use_search_stream
+    if prefetch_depth is None:
+      prefetch_depth = self.prefetch_depth
+    if use_search_stream:
+      batches = self._search_stream_batches(customer_id=customer_id, query_text=query_text)
+    else:
+      batches = self._search_pages(customer_id=customer_id, query_text=query_text)
+    if not prefetch_depth:
+      return (row for batch in batches for row in batch)
+    return self._prefetched_rows(batches=PrefetchIterator(iterable=batches, depth=prefetch_depth))
+
+  def _search_pages(self, customer_id: str, query_text: str) -> Iterator[List[any]]:
+    ga_service = self.get_service(name='GoogleAdsService')
+    pager = None
+    pages = None
+    page_token = None
+    attempt = 0
+
+    def get_page() -> Optional[any]:
+      nonlocal pager, pages
+      if pager is None:
+        pager = ga_service.search(customer_id, query=query_text, page_size=self._page_size)
+        pager.next_page_token = page_token
+        pages = iter(pager.pages)
+      return next(pages, None)
+
+    while True:
+      try:
+        page = self.rate_limiter.call(function=get_page, customer_id=customer_id, max_retries=0)
+      except Exception as e:
+        if attempt >= self.page_retries or not is_transient_error(error=e):
+          raise e
+        attempt += 1
+        print(f'Retrying Google Ads response page after error: {e}')
+        pager = None
+        time.sleep(retry_backoff_delay(attempt=attempt, backoff=self.page_retry_backoff))
+        continue
+      if page is None:
+        return
+      attempt = 0
+      page_token = pager.next_page_token
+      yield list(page)
+
+  def _search_stream_batches(self, customer_id: str, query_text: str) -> Iterator[List[any]]:
+    ga_service = self.get_service(name='GoogleAdsService')
+    self.rate_limiter.acquire(customer_id=customer_id)
+    try:
+      for batch in ga_service.search_stream(customer_id, query=query_text):
+        yield batch.results
+    except Exception as e:
+      self.rate_limiter.failed(error=e)
+      raise e
+    self.rate_limiter.succeeded()
+
+  def _search_rows(self, customer_id: str, query_text: str) -> Iterator[any]:
+    for page in self._search_pages(customer_id=customer_id, query_text=query_text):
+      yield from page
+
+  def _prefetched_rows(self, batches: PrefetchIterator) -> Iterator[any]:
+    for batch in batches:
+      yield from batch
+    print(f'Waited {batches.wait_time:.3f}s for {batches.item_count} prefetched Google Ads response batches')
 
   @handle_ga_permission_error()
   def customer_is_manager(self, customer_id: str=None) -> Optional[bool]:
-    ga_service = self.client.get_service('GoogleAdsService', version=self.api_version)
-    query = GoogleAdsQuery(
+    if self.customer_clients is not None and customer_id in self.customer_clients and self.customer_clients[customer_id]['manager'] is not None:
+      return self.customer_clients[customer_id]['manager']
+    query = self._customer_manager_query(customer_id=customer_id)
+    rows = list(self._search_rows(customer_id=customer_id, query_text=query.query_text))
+    return bool(rows[0].customer.manager.value) if rows else None
+
+  def _customer_manager_query(self, customer_id: str) -> GoogleAdsQuery:
+    return GoogleAdsQuery(
       query=('SELECT customer.manager '
              'FROM customer '
              'WHERE customer.id = {customer_id}'),
       parameters={'customer_id': customer_id}
     )
-    response = ga_service.search(customer_id, query.query_text, page_size=self._page_size)
-    rows = list(response)
-    return bool(rows[0].customer.manager.value) if rows else None
 
-  def get_customer_hierarchy(self, exclude_customers: List[str]=[]) -> Dict[str, any]:
+  def get_customer_hierarchy(self, exclude_customers: List[str]=[], max_workers: int=8) -> Dict[str, any]:
+    client_customer_ids = self._get_client_customer_ids_map(
+      customer_id=self.customer_id,
+      max_workers=max_workers
+    )
+    return self._build_customer_hierarchy(client_customer_ids=client_customer_ids, exclude_customers=exclude_customers)
+
+  def _build_customer_hierarchy(self, client_customer_ids: Dict[str, any], exclude_customers: List[str]) -> Dict[str, any]:
     def _filter_hierarchy(hierarchy: Dict[str, any], exclude_customers: List[str]):
       return {
         i: _filter_hierarchy(h, exclude_customers) 
@@ -56,32 +207,54 @@ refresh_token: {refresh_token}
     hierarchy = {
       self.customer_id: self._get_customer_hierarchy(
         customer_id=self.customer_id,
-        ignore_customers=[]
+        ignore_customers=set(),
+        client_customer_ids=client_customer_ids
       )
     }
     return _filter_hierarchy(hierarchy, exclude_customers)
 
+  def _get_client_customer_ids_map(self, customer_id: str, max_workers: int) -> Dict[str, any]:
+    client_customer_ids = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+      pending = {executor.submit(self._get_client_customer_ids, customer_id=customer_id): customer_id}
+      queued = {customer_id}
+      while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+          # Errors are kept and raised only if the hierarchy walk reaches the customer, as it would have when searching lazily.
+          ids = client_customer_ids[pending.pop(future)] = future.exception() or future.result()
+          if isinstance(ids, Exception):
+            continue
+          for i in ids or []:
+            if i not in queued:
+              queued.add(i)
+              pending[executor.submit(self._get_client_customer_ids, customer_id=i)] = i
+    return client_customer_ids
+
   @handle_ga_permission_error()
-  def _get_customer_hierarchy(self, customer_id: str, ignore_customers: List[str]) -> Dict[str, any]:
-    ga_service = self.client.get_service('GoogleAdsService', version=self.api_version)
-    query = ('SELECT customer_client_link.client_customer, customer_client_link.status\n'
-             'FROM customer_client_link')
-    response = ga_service.search(customer_id, query, page_size=self._page_size)
-    rows = list(response)
-    client_customer_ids = [row.customer_client_link.client_customer.value.split('/')[1] for row in rows]
-    client_customer_ids = sorted(filter(lambda i: i not in ignore_customers, client_customer_ids))
+  def _get_client_customer_ids(self, customer_id: str) -> List[str]:
+    response = self._search_rows(customer_id=customer_id, query_text=self._client_customer_ids_query)
+    return [row.customer_client_link.client_customer.value.split('/')[1] for row in response]
+
+  def _get_customer_hierarchy(self, customer_id: str, ignore_customers: Set[str], client_customer_ids: Dict[str, any]) -> Optional[Dict[str, any]]:
+    if isinstance(client_customer_ids[customer_id], Exception):
+      raise client_customer_ids[customer_id]
+    if client_customer_ids[customer_id] is None:
+      return None
+    ids = sorted(filter(lambda i: i not in ignore_customers, client_customer_ids[customer_id]))
     hierarchy = {
       i: self._get_customer_hierarchy(
         customer_id=i,
-        ignore_customers=ignore_customers
+        ignore_customers=ignore_customers,
+        client_customer_ids=client_customer_ids
       )
-      for i in client_customer_ids
+      for i in ids
     }
     hierarchy = {
       i: h for i,h in hierarchy.items() 
       if i not in ignore_customers
     }
-    ignore_customers.extend(client_customer_ids)
+    ignore_customers.update(ids)
     return hierarchy
 
   def get_customer_ids(self, exclude_customers: List[str]=[]) -> List[str]:
@@ -100,25 +273,46 @@ refresh_token: {refresh_token}
       return self.get_customers()
 
   def get_customers(self) -> List[str]:
-    ga_service = self.client.get_service('GoogleAdsService', version=self.api_version)
-    query = '''
+    rows = list(self._search_rows(customer_id=self.customer_id, query_text=self._customers_query))
+    return sorted([r.customer_client.client_customer.value.split('/')[1] for r in rows])
+
+  def get_customer_clients(self, refresh: bool=False) -> Dict[str, Dict[str, any]]:
+    if self.customer_clients is not None and not refresh:
+      return self.customer_clients
+    has_manager = self._has_customer_client_manager
+    response = self._search_rows(customer_id=self.customer_id, query_text=self._customer_clients_query(has_manager=has_manager))
+    self.customer_clients = self._customer_clients_from_rows(rows=response, has_manager=has_manager)
+    return self.customer_clients
+
+  @property
+  def _has_customer_client_manager(self) -> bool:
+    return 'manager' in self.client.get_type('CustomerClient', version=self.api_version).DESCRIPTOR.fields_by_name
+
+  def _customer_clients_query(self, has_manager: bool) -> str:
+    return f'''
 SELECT
 	 customer_client.level,
 	 customer_client.hidden,
-	 customer.id,
+	 {'customer_client.manager,' if has_manager else ''}
 	 customer_client.client_customer
 FROM
 	customer_client
 '''
-    response = ga_service.search(self.customer_id, query, page_size=self._page_size)
-    rows = list(response)
-    return sorted([r.customer_client.client_customer.value.split('/')[1] for r in rows])
+
+  def _customer_clients_from_rows(self, rows: Iterator[any], has_manager: bool) -> Dict[str, Dict[str, any]]:
+    return {
+      r.customer_client.client_customer.value.split('/')[1]: {
+        'manager': bool(r.customer_client.manager.value) if has_manager else None,
+        'hidden': bool(r.customer_client.hidden.value),
+        'level': r.customer_client.level.value,
+      }
+      for r in rows
+    }
 
   @handle_ga_permission_error(default_value=pd.DataFrame())
   def get_campaign_target_info(self, customer_id: str=None) -> Dict[str, any]:
     if customer_id is None:
       customer_id = self.customer_id
-    ga_service = self.client.get_service('GoogleAdsService', version=self.api_version)
 
     query = GoogleAdsQuery(
       query='''
@@ -134,15 +328,24 @@ WHERE
       '''
     )
 
-    response = ga_service.search(customer_id, query.query_text, page_size=self._page_size)
+    response = self._search_rows(customer_id=customer_id, query_text=query.query_text)
     df = self.response_to_data_frame(response=response, delimiter='_')
 
     geo_targets = None
     if 'campaign_criterion_location_geo_target_constant' in df:
       geo_targets = list(filter(lambda v: not pd.isna(v), df['campaign_criterion_location_geo_target_constant'].unique()))
+    geo_targets_dfs = []
+    if geo_targets and self.geo_target_index is not None and self.geo_target_index.exists:
+      indexed_geo_targets_df = pd.DataFrame({'geo_target_constant_resource_name': pd.Series(geo_targets, dtype=object)})
+      indexed_geo_targets_df['geo_target_constant_country_code'] = self.geo_target_index.country_codes(resource_names=indexed_geo_targets_df.geo_target_constant_resource_name)
+      indexed_geo_targets_df = indexed_geo_targets_df[indexed_geo_targets_df.geo_target_constant_country_code.notna()]
+      geo_targets_dfs.append(indexed_geo_targets_df)
+      geo_targets = sorted(set(geo_targets) - set(indexed_geo_targets_df.geo_target_constant_resource_name))
     if geo_targets:
-      geo_targets_query = GoogleAdsQuery(
-        query='''
+      geo_targets_dfs.append(self.lookup_resources(
+        customer_id=customer_id,
+        query_getter=lambda geo_targets: GoogleAdsQuery(
+          query='''
 SELECT
   geo_target_constant.resource_name,
   geo_target_constant.country_code
@@ -150,11 +353,18 @@ FROM
   geo_target_constant
 WHERE
   geo_target_constant.resource_name IN {geo_targets}
-        ''',
-        parameters={'geo_targets': geo_targets}
-      )
-      geo_targets_response = ga_service.search(customer_id, geo_targets_query.query_text, page_size=self._page_size)
-      geo_targets_df = self.response_to_data_frame(response=geo_targets_response, exclude_keys=[], delimiter='_')
+          ''',
+          parameters={'geo_targets': geo_targets}
+        ),
+        resource_names=geo_targets,
+        key_column='geo_target_constant_resource_name',
+        cache=self.geo_target_cache,
+        exclude_keys=[],
+        delimiter='_'
+      ))
+    geo_targets_dfs = [f for f in geo_targets_dfs if not f.empty]
+    if geo_targets_dfs:
+      geo_targets_df = pd.concat(geo_targets_dfs, ignore_index=True, sort=False)
       df = df.merge(geo_targets_df, left_on='campaign_criterion_location_geo_target_constant', right_on='geo_target_constant_resource_name', how='left')
 
     self.substitute_enum_name(df=df, column_name='campaign_criterion_device_type', enum=DeviceEnum.Device)
@@ -167,191 +377,223 @@ WHERE
     }
     return self._data_frame_to_dict(data_frame=df, column_path_map=mapping)
 
-  def _data_frame_to_dict(self, data_frame: pd.DataFrame, column_path_map: Dict[str, str]) -> Dict[str, any]:
-    return_dictionary = {}
-    for row in data_frame.to_dict(orient='records'):
-      for path, target in column_path_map.items():
-        column_names = {
-          c
-          for s in [path, target] 
-          for _, c, _, _ in Formatter().parse(s) if c
-        }
-        if {c for c in column_names if c not in row or pd.isna(row[c])}:
-          continue
-
-        substituted_path = path.format(**row)
-        target_dictionary = return_dictionary
-        path_components = substituted_path.split('.')
-        for component in path_components[:-1]:
-          if component not in target_dictionary:
-            target_dictionary[component] = {}
-          target_dictionary = target_dictionary[component]
-        
-        last_path_component = path_components[-1]
-        if last_path_component not in target_dictionary:
-          target_dictionary[last_path_component] = []
-        target_dictionary[last_path_component] = list(sorted(set(target_dictionary[last_path_component] + [target.format(**row)])))
-    return return_dictionary
+  def lookup_resources(self, customer_id: str, query_getter: Callable[[List[str]], GoogleAdsQuery], resource_names: List[str], key_column: str, cache: Optional[LookupCache]=None, typed_schema: bool=False, convert_micros: bool=False, **flatten_options) -> pd.DataFrame:
+    """Returns the rows for resource_names, querying only those missing from cache"""
+    if cache is None:
+      cache = self.lookup_cache
+    namespace = self._lookup_namespace(query_getter=query_getter, flatten_options=flatten_options)
 
-  def _fields_to_dict(self, field_listable: any, substitute_enum_names: bool, context: Optional[Dict[str, any]]=None) -> Dict[str, any]:
-    context = log_context(context=context)
-
-    d = {}
-    for f in field_listable.ListFields():
-      metadata = f[0]
-      key = metadata.name
-      value = f[1]
-      recurse = metadata.type == metadata.TYPE_MESSAGE
-      multiple_values = metadata.label == metadata.LABEL_REPEATED
-
-      if recurse and multiple_values:
-        d[key] = [
-          self._fields_to_dict(
-            field_listable=v,
-            substitute_enum_names=substitute_enum_names,
-            context=context
-          )
-          for v in value
-        ]
-      elif recurse:
-        d[key] = self._fields_to_dict(
-          field_listable=value,
-          substitute_enum_names=substitute_enum_names,
-          context=context
-        )
-      elif multiple_values:
-        d[key] = list(value)
-      else:
-        d[key] = value
-
-      if substitute_enum_names and metadata.enum_type:
-        d[key] = list(map(lambda v: metadata.enum_type.values_by_number[v].name, d[key])) if multiple_values else metadata.enum_type.values_by_number[d[key]].name if d[key] is not None else None
-    return d
-
-  def _flatten_fields_dict(self, fields_dictionary: Dict[str, any], exclude_keys: List[str]=[], exclude_prefixes=[], prefixes: List[str]=[], delimiter: str='#', max_depth: Optional[int]=None, json_encode_repeated: bool=True, flatten_single_keys: Optional[Set[str]]={''}, path_overrides: Dict[str, Dict[str, any]]={}, context: Optional[Dict[str, any]]=None) -> Dict[str, any]:
-    context = log_context(context=context)
-    flattened_dict = {}
-    key_components = None
-
-    def flatten_dict(d: Dict[str, any], parameters: Dict[str, any], flatten_keys: Optional[Set[str]]) -> any:
-      dictionary = self._flatten_fields_dict(
-        fields_dictionary=d,
-        context=context,
-        **parameters
-      )
-      if flatten_keys is not None:
-        if not dictionary:
-          return None
-        elif flatten_keys and len(dictionary) == 1 and list(dictionary.keys())[0] in flatten_keys:
-          return list(dictionary.values())[0]
-      return dictionary
-
-    def flatten_list(l: List[any], parameters: Dict[str, any], flatten_keys: Optional[Set[str]]) -> List[any]:
-      return [
-        flatten_dict(i, parameters, flatten_keys) if isinstance(i, dict) 
-        else flatten_list(i, parameters, flatten_keys) if isinstance(i, list) 
-        else i
-        for i in l
-      ]
+    def get_data_frame(query: GoogleAdsQuery) -> pd.DataFrame:
+      response = self._search_rows(customer_id=customer_id, query_text=query.query_text)
+      return self.response_to_data_frame(response=response, **flatten_options)
 
-    parameters = {
-      'prefixes': prefixes,
-      'exclude_keys': exclude_keys,
-      'exclude_prefixes': exclude_prefixes,
-      'delimiter': delimiter,
-      'max_depth': max_depth - 1 if max_depth else None,
-      'json_encode_repeated': json_encode_repeated if max_depth is None or max_depth > 0 else False,
-      'flatten_single_keys': flatten_single_keys,
-      'path_overrides': path_overrides,
-    }
-    for k, v in fields_dictionary.items():
-      overrides = path_overrides[k] if k in path_overrides else {}
-      key_parameters = {
-        **parameters,
-        **overrides,
+    def fetch(missing_keys: List[str]) -> Dict[str, Dict[str, any]]:
+      missing_resource_names = [k[len(namespace):] for k in missing_keys]
+      with ThreadPoolExecutor(max_workers=self.list_chunk_workers) as executor:
+        data_frames = list(executor.map(get_data_frame, query_getter(missing_resource_names).chunked(max_list_size=self.max_list_size)))
+      return {
+        namespace + r[key_column]: r
+        for f in data_frames if key_column in f
+        for r in f.to_dict(orient='records')
       }
-      if k in key_parameters['exclude_keys']:
+
+    records = cache.lookup(keys=[namespace + n for n in resource_names], fetch=fetch)
+    return self._lookup_data_frame(
+      records=records,
+      query_getter=query_getter,
+      resource_names=resource_names,
+      typed_schema=typed_schema,
+      convert_micros=convert_micros,
+      flatten_options=flatten_options
+    )
+
+  def _lookup_namespace(self, query_getter: Callable[[List[str]], GoogleAdsQuery], flatten_options: Dict[str, any]) -> str:
+    lookup = json.dumps({'query': query_getter([]).query_text, 'flatten_options': flatten_options}, sort_keys=True, default=str)
+    return hashlib.sha1(lookup.encode()).hexdigest()[:16] + ':'
+
+  def _lookup_data_frame(self, records: Dict[str, Dict[str, any]], query_getter: Callable[[List[str]], GoogleAdsQuery], resource_names: List[str], typed_schema: bool, convert_micros: bool, flatten_options: Dict[str, any]) -> pd.DataFrame:
+    df = pd.DataFrame(list(records.values()))
+    if typed_schema or convert_micros:
+      df = apply_output_schema(
+        df=df,
+        plan=self._response_plan(**flatten_options),
+        descriptor=self.row_descriptor,
+        field_paths=query_getter(resource_names).select_fields,
+        typed=typed_schema,
+        convert_micros=convert_micros
+      )
+    return df
+
+  def _data_frame_to_dict(self, data_frame: pd.DataFrame, column_path_map: Dict[str, str]) -> Dict[str, any]:
+    formatter = Formatter()
+    templates = {t: list(formatter.parse(t)) for mapping in column_path_map.items() for t in mapping}
+    path_targets = []
+    for mapping_index, (path, target) in enumerate(column_path_map.items()):
+      column_names = list(dict.fromkeys(c for t in [path, target] for _, c, _, _ in templates[t] if c))
+      if any(c not in data_frame for c in column_names):
         continue
-      key_components = key_parameters['prefixes'] + [k] if k not in key_parameters['exclude_prefixes'] else key_parameters['prefixes']
-      key = key_parameters['delimiter'].join(key_components)
-      key_max_depth = key_parameters['max_depth']
-      key_overrides = key_parameters['path_overrides'][k] if k in key_parameters['path_overrides'] else {}
-      key_json_encode_repeated = key_parameters['json_encode_repeated']
-      key_flatten_single_keys = key_parameters['flatten_single_keys']
-      if isinstance(v, dict):
-        d = flatten_dict(
-          v, 
-          parameters={
-            **key_parameters,
-            'prefixes': key_components if key_max_depth is None or key_max_depth > 0 else [],
-            **key_overrides,
-          },
-          flatten_keys=key_flatten_single_keys
-        )
-        if not isinstance(d, dict):
-          flattened_dict[key] = d
-        elif key_max_depth is None or key_max_depth > 0:
-          flattened_dict.update(d)
-        else:
-          flattened_dict[key] = json.dumps(d) if key_json_encode_repeated and key_max_depth == 0 else d
-      elif isinstance(v, list):
-        l = flatten_list(
-          v,
-          parameters={
-            **key_parameters,
-            'prefixes': [],
-            'json_encode_repeated': False,
-            **key_overrides,
-          },
-          flatten_keys=key_flatten_single_keys
-        )
-        flattened_dict[key] = json.dumps(l) if key_json_encode_repeated and key_max_depth is None or key_max_depth == 0 else l
-      else:
-        flattened_dict[key] = v
+      positions = np.flatnonzero(data_frame[column_names].notna().all(axis=1).to_numpy()) if column_names else np.arange(len(data_frame))
+      if not len(positions):
+        continue
+      rows = data_frame[column_names].iloc[positions]
+      pairs = pd.DataFrame({
+        'path': self._format_template(template=templates[path], rows=rows, formatter=formatter),
+        'target': self._format_template(template=templates[target], rows=rows, formatter=formatter),
+        'position': positions,
+      })
+      first_positions = pairs.groupby('path', sort=False)['position'].min()
+      targets = pairs.drop_duplicates(subset=['path', 'target']).sort_values(by='target').groupby('path', sort=False)['target'].agg(list)
+      path_targets.extend((first_positions[p], mapping_index, p, targets[p]) for p in first_positions.index)
 
-    return flattened_dict      
+    return_dictionary = {}
+    # Insert paths in the order of the first row and mapping that produce them, so that the dictionary key order does not depend on the grouping.
+    for _, _, substituted_path, targets in sorted(path_targets, key=lambda t: t[:2]):
+      target_dictionary = return_dictionary
+      path_components = substituted_path.split('.')
+      for component in path_components[:-1]:
+        target_dictionary = target_dictionary.setdefault(component, {})
+      last_path_component = path_components[-1]
+      target_dictionary[last_path_component] = sorted(set(target_dictionary.get(last_path_component, []) + targets))
+    return return_dictionary
+
+  def _format_template(self, template: List[Tuple[str, Optional[str], Optional[str], Optional[str]]], rows: pd.DataFrame, formatter: Formatter) -> np.ndarray:
+    formatted = np.full(len(rows), '', dtype=object)
+    for literal_text, field_name, format_spec, conversion in template:
+      if literal_text:
+        formatted = formatted + literal_text
+      if field_name:
+        codes, values = pd.factorize(rows[field_name])
+        formatted_values = np.array([formatter.format_field(formatter.convert_field(v, conversion), format_spec) for v in values] + [''], dtype=object)
+        formatted = formatted + formatted_values[codes]
+    return formatted
+
+  def response_to_data_frame(self, response: any, select_fields: Optional[List[str]]=None, typed_schema: bool=False, convert_micros: bool=False, **flatten_options) -> pd.DataFrame:
+    print('Parsing Google Ads response...')
+    plan = self._response_plan(**flatten_options)
+    [builder] = self._flatten_response(response=response, plans=[plan])
+    return self._builder_to_data_frame(builder=builder, plan=plan, select_fields=select_fields, typed_schema=typed_schema, convert_micros=convert_micros)
 
-  def response_to_data_frame(self, response: any, exclude_keys: List[str]=['resource_name'], exclude_prefixes: List[str]=['value'], delimiter: str='#', substitute_enum_names: bool=False, json_encode_repeated: bool=False, flatten_single_keys: Optional[Set[str]]={''}, max_depth: Optional[int]=None, path_overrides: Dict[str, Dict[str, any]]={}) -> pd.DataFrame:
-    fields_context = {'counter': 0}
+  def response_to_arrow_table(self, response: any, select_fields: Optional[List[str]]=None, **flatten_options) -> any:
+    """Requires pyarrow"""
     print('Parsing Google Ads response...')
+    plan = self._response_plan(**flatten_options)
+    types = plan.column_arrow_types(descriptor=self.row_descriptor, field_paths=select_fields) if select_fields is not None else None
+    [builder] = self._flatten_response(response=response, plans=[plan])
+    return builder.to_arrow_table(types=types)
+
+  def response_to_data_frames(self, response: any, select_fields: List[str], chunk_size: int=100000, **flatten_options) -> Iterator[pd.DataFrame]:
+    """Yields DataFrames of up to chunk_size rows with the same columns and dtypes"""
+    plan = self._response_plan(**flatten_options)
+    dtypes = plan.column_dtypes(descriptor=self.row_descriptor, field_paths=select_fields)
+    rows = iter(response)
+    for chunk_index in itertools.count():
+      [builder] = self._flatten_response(response=itertools.islice(rows, chunk_size), plans=[plan])
+      row_count = len(builder)
+      if row_count or not chunk_index:
+        yield builder.to_data_frame(dtypes=dtypes)
+      if row_count < chunk_size:
+        break
+
+  def response_to_split_data_frames(self, response: any, options: Dict[str, Dict[str, any]], typed_schema: bool=False, convert_micros: bool=False) -> Dict[str, pd.DataFrame]:
+    """Flattens the response once into a DataFrame per entry of options"""
+    print('Parsing Google Ads response...')
+    plans = self._split_plans(options=options)
+    builders = dict(zip(plans, self._flatten_response(response=response, plans=list(plans.values()))))
+    return self._builders_to_split_data_frames(builders=builders, plans=plans, options=options, typed_schema=typed_schema, convert_micros=convert_micros)
+
+  def _response_plan(self, **flatten_options) -> ExtractionPlan:
+    return ExtractionPlan.for_options(**{**response_flatten_defaults, **flatten_options})
+
+  def _split_plans(self, options: Dict[str, Dict[str, any]]) -> Dict[str, ExtractionPlan]:
+    return {
+      name: self._response_plan(**{k: v for k, v in flatten_options.items() if k != 'select_fields'})
+      for name, flatten_options in options.items()
+    }
+
+  def _flatten_response(self, response: Iterable[any], plans: List[ExtractionPlan]) -> List[ColumnarBuilder]:
     flatten_context = {
       'message': 'Flattening Google Ads response objects {counter}...',
       'interval': 100000,
     }
-    flattened_records = []
-    for row in response:
-      dictionary = self._fields_to_dict(
-        field_listable=row,
-        substitute_enum_names=substitute_enum_names,
-        context=fields_context
-      )
-      flattened_record = self._flatten_fields_dict(
-        fields_dictionary=dictionary,
-        exclude_keys=exclude_keys,
-        exclude_prefixes=exclude_prefixes,
-        delimiter=delimiter,
-        max_depth=max_depth,
-        json_encode_repeated=json_encode_repeated,
-        flatten_single_keys=flatten_single_keys,
-        path_overrides=path_overrides,
-        context=flatten_context
+    builders = [ColumnarBuilder() for _ in plans]
+    row_count = self._append_rows(rows=response, plans=plans, builders=builders, context=flatten_context)
+    print(f'Parsed {row_count} Google Ads response rows')
+    return builders
+
+  def _append_rows(self, rows: Iterable[any], plans: List[ExtractionPlan], builders: List[ColumnarBuilder], context: Optional[Dict[str, any]]=None) -> int:
+    row_count = 0
+    for row in rows:
+      log_context(context=context)
+      for plan, builder in zip(plans, builders):
+        builder.append(plan.flatten(row))
+      row_count += 1
+    return row_count
+
+  def _builder_to_data_frame(self, builder: ColumnarBuilder, plan: ExtractionPlan, select_fields: Optional[List[str]], typed_schema: bool, convert_micros: bool) -> pd.DataFrame:
+    if (typed_schema or convert_micros) and select_fields is None:
+      raise ValueError('select_fields are required for a typed output schema')
+    df = builder.to_data_frame()
+    if typed_schema or convert_micros:
+      df = apply_output_schema(
+        df=df,
+        plan=plan,
+        descriptor=self.row_descriptor,
+        field_paths=select_fields,
+        typed=typed_schema,
+        convert_micros=convert_micros
       )
-      flattened_records.append(flattened_record)
-
-    print(f'Parsed {fields_context["counter"]} Google Ads response rows')
-    df = pd.DataFrame(flattened_records)
     return df
 
+  def _builders_to_split_data_frames(self, builders: Dict[str, ColumnarBuilder], plans: Dict[str, ExtractionPlan], options: Dict[str, Dict[str, any]], typed_schema: bool, convert_micros: bool) -> Dict[str, pd.DataFrame]:
+    data_frames = {}
+    for name, plan in plans.items():
+      select_fields = options[name]['select_fields']
+      columns = plan.column_fields(descriptor=self.row_descriptor, field_paths=select_fields)
+      df = builders[name].to_data_frame()
+      df = df[[c for c in df.columns if c in columns]]
+      if typed_schema or convert_micros:
+        df = apply_output_schema(
+          df=df,
+          plan=plan,
+          descriptor=self.row_descriptor,
+          field_paths=select_fields,
+          typed=typed_schema,
+          convert_micros=convert_micros
+        )
+      data_frames[name] = df
+    return data_frames
+
   def substitute_enum_name(self, df: pd.DataFrame, column_name: str, enum: any):
-    if column_name in df:
-      df[column_name] = df[column_name].apply(lambda t: list(map(lambda v: enum(v).name, t)) if isinstance(t, list) else t if pd.isna(t) else enum(t).name)
+    if column_name not in df:
+      return
+    numbers, names = enum_table(enum)
+    column = df[column_name]
+    try:
+      values = pd.to_numeric(column).to_numpy(dtype=np.float64, na_value=np.nan)
+    except (TypeError, ValueError):
+      names_by_number = dict(zip(numbers.tolist(), names))
+      def substitute_name(v: any) -> str:
+        if v not in names_by_number:
+          raise ValueError(f'{v!r} is not a valid {enum.__name__}')
+        return names_by_number[v]
+      df[column_name] = column.apply(lambda t: list(map(substitute_name, t)) if isinstance(t, list) else t if pd.isna(t) else substitute_name(t))
+      return
+
+    present = ~np.isnan(values)
+    positions = np.searchsorted(numbers, values[present]).clip(max=max(len(numbers) - 1, 0))
+    invalid = numbers[positions] != values[present] if len(numbers) else np.ones(len(positions), dtype=bool)
+    if invalid.any():
+      raise ValueError(f'{int(values[present][invalid][0])!r} is not a valid {enum.__name__}')
+    codes = np.full(len(values), -1, dtype=np.int64)
+    codes[present] = positions
+    df[column_name] = pd.Categorical.from_codes(codes, categories=names)
 
   def substitute_enum_names(self, df: pd.DataFrame, column_to_enum_map: Dict[str, any]):
     for c, e in column_to_enum_map.items():
       self.substitute_enum_name(df=df, column_name=c, enum=e)
   
   def pause_campaign(self, campaign_id: str) -> Optional[any]:
-    service = self.client.get_service('CampaignService', version=self.api_version)
+    service = self.get_service(name='CampaignService')
     operation = self.client.get_type('CampaignOperation', version=self.api_version)
 
     campaign = operation.update
@@ -371,7 +613,7 @@ WHERE
             print('\t\tOn field: %s' % field_path_element.field_name)      
 
     try:
-      response = service.mutate_campaigns(self.customer_id, [operation])
+      response = self.rate_limiter.call(function=lambda: service.mutate_campaigns(self.customer_id, [operation]), customer_id=self.customer_id)
     except google.ads.google_ads.errors.GoogleAdsException as ex:
       print_error(ex)
       response = None
@@ -382,12 +624,20 @@ class GoogleAdWordsAPI:
   client: adwords.AdWordsClient
   _page_size = 100
 
-  def __init__(self, client_id: str, client_secret: str, refresh_token: str, developer_token: str):
-    refresh_token_client = oauth2.GoogleRefreshTokenClient(
-      client_id=client_id, 
-      client_secret=client_secret, 
-      refresh_token=refresh_token
-    )
+  def __init__(self, client_id: str, client_secret: str, refresh_token: str, developer_token: str, token_cache: Optional[TokenCache]=None):
+    if token_cache is not None:
+      refresh_token_client = CachedRefreshTokenClient(
+        token_cache=token_cache,
+        client_id=client_id,
+        client_secret=client_secret,
+        refresh_token=refresh_token
+      )
+    else:
+      refresh_token_client = oauth2.GoogleRefreshTokenClient(
+        client_id=client_id, 
+        client_secret=client_secret, 
+        refresh_token=refresh_token
+      )
     self.client = adwords.AdWordsClient(
       developer_token=developer_token,
       refresh_token=refresh_token,
@@ -464,3 +714,8 @@ def log_context(context: Optional[Dict[str, any]]) -> Dict[str, any]:
     sys.stdout.flush()
 
   return context
+
+@functools.lru_cache(maxsize=None)
+def enum_table(enum: any) -> Tuple[np.ndarray, List[str]]:
+  members = sorted(enum, key=lambda m: m.value)
+  return np.array([m.value for m in members], dtype=np.int64), [m.name for m in members]
@@ -1,10 +1,35 @@
+import random
 import functools
+import inspect
 
 from google.ads.google_ads.errors import GoogleAdsException
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable, DeadlineExceeded, InternalServerError, Aborted
 from typing import Optional
 
 def handle_ga_permission_error(default_value: Optional[any]=None):
   def wrap(f):
+    if inspect.isgeneratorfunction(f):
+      @functools.wraps(f)
+      def generator_wrapper(*args, **kwargs):
+        try:
+          yield from f(*args, **kwargs)
+        except GoogleAdsException as e:
+          if str(e.error.code()) == 'StatusCode.PERMISSION_DENIED':
+            return
+          raise e
+      return generator_wrapper
+
+    if inspect.iscoroutinefunction(f):
+      @functools.wraps(f)
+      async def coroutine_wrapper(*args, **kwargs):
+        try:
+          return await f(*args, **kwargs)
+        except GoogleAdsException as e:
+          if str(e.error.code()) == 'StatusCode.PERMISSION_DENIED':
+            return default_value
+          raise e
+      return coroutine_wrapper
+
     @functools.wraps(f)
     def wrapper(*args, **kwargs):
       try:
@@ -14,4 +39,35 @@ def handle_ga_permission_error(default_value: Optional[any]=None):
           return default_value
         raise e
     return wrapper
-  return wrap
\ No newline at end of file
+  return wrap
+
+
+def is_quota_error(error: Exception) -> bool:
+  if isinstance(error, GoogleAdsException):
+    return str(error.error.code()) == 'StatusCode.RESOURCE_EXHAUSTED'
+  return isinstance(error, ResourceExhausted)
+
+transient_status_codes = {
+  'StatusCode.RESOURCE_EXHAUSTED',
+  'StatusCode.UNAVAILABLE',
+  'StatusCode.DEADLINE_EXCEEDED',
+  'StatusCode.INTERNAL',
+  'StatusCode.ABORTED',
+}
+
+def is_transient_error(error: Exception) -> bool:
+  if isinstance(error, GoogleAdsException):
+    return str(error.error.code()) in transient_status_codes
+  return isinstance(error, (ResourceExhausted, ServiceUnavailable, DeadlineExceeded, InternalServerError, Aborted))
+
+def retry_backoff_delay(attempt: int, backoff: float) -> float:
+  return random.uniform(0, backoff * 2 ** (attempt - 1))
+
+def quota_retry_delay(error: Exception) -> Optional[float]:
+  failure = getattr(error, 'failure', None)
+  for failure_error in getattr(failure, 'errors', []):
+    details = getattr(failure_error, 'details', None)
+    quota_error_details = getattr(details, 'quota_error_details', None) if details is not None else None
+    if quota_error_details is not None and quota_error_details.HasField('retry_delay'):
+      return quota_error_details.retry_delay.seconds + quota_error_details.retry_delay.nanos / 1e9
+  return None
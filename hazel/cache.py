@@ -0,0 +1,49 @@
+import os
+import json
+import hashlib
+import uuid
+import pandas as pd
+
+from .query import GoogleAdsQuery
+from typing import Dict, Optional
+from datetime import datetime, date, timedelta
+
+class ReportCache:
+  """Stores report results as one parquet file per customer, query and day"""
+  directory: str
+  lookback_days: int
+
+  def __init__(self, directory: str, lookback_days: int=3):
+    self.directory = directory
+    self.lookback_days = lookback_days
+
+  def query_key(self, query: GoogleAdsQuery, options: Dict[str, any]={}) -> str:
+    key = {
+      'query': ' '.join(query.query.split()),
+      'parameters': {
+        k: GoogleAdsQuery.format_parameter(v)
+        for k, v in query.parameters.items()
+        if k not in ('start_date', 'end_date')
+      },
+      'options': options,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=repr).encode()).hexdigest()
+
+  def is_immutable(self, day: date) -> bool:
+    return day < datetime.utcnow().date() - timedelta(days=self.lookback_days)
+
+  def path(self, customer_id: str, key: str, day: date) -> str:
+    return os.path.join(self.directory, str(customer_id), key, f'{day.isoformat()}.parquet')
+
+  def read(self, customer_id: str, key: str, day: date) -> Optional[pd.DataFrame]:
+    path = self.path(customer_id=customer_id, key=key, day=day)
+    if not os.path.exists(path):
+      return None
+    return pd.read_parquet(path)
+
+  def write(self, customer_id: str, key: str, day: date, data_frame: pd.DataFrame):
+    path = self.path(customer_id=customer_id, key=key, day=day)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    data_frame.reset_index(drop=True).to_parquet(temporary_path, index=False)
+    os.replace(temporary_path, path)
@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+
+from collections import deque
+from typing import Dict, List, Optional
+
+class _Missing:
+  pass
+
+_missing = _Missing()
+
+class ColumnarBuilder:
+  """Accumulates flattened records into typed per-column buffers"""
+  columns: Dict[str, List[any]]
+  chunks: Dict[str, List['_Chunk']]
+  row_count: int
+  offset: int
+  compact_interval: int
+  _last_keys: Optional[tuple]
+  _last_columns: List[List[any]]
+
+  def __init__(self, compact_interval: int=10000):
+    self.columns = {}
+    self.chunks = {}
+    self.row_count = 0
+    self.offset = 0
+    self.compact_interval = compact_interval
+    self._last_keys = None
+    self._last_columns = []
+
+  def __len__(self) -> int:
+    return self.row_count
+
+  def append(self, record: Dict[str, any]):
+    keys = tuple(record)
+    if keys == self._last_keys:
+      deque(map(list.append, self._last_columns, record.values()), maxlen=0)
+    else:
+      self._append_record(record=record)
+      self._last_keys = keys
+      self._last_columns = [self.columns[k] for k in keys]
+    self.row_count += 1
+    if self.row_count - self.offset >= self.compact_interval:
+      self.compact()
+
+  def _append_record(self, record: Dict[str, any]):
+    index = self.row_count - self.offset
+    columns = self.columns
+    for key, value in record.items():
+      values = columns.get(key)
+      if values is None:
+        values = columns[key] = [_missing] * index
+        if key not in self.chunks:
+          self.chunks[key] = [_Chunk(values=None, length=self.offset)] if self.offset else []
+      elif len(values) < index:
+        values.extend([_missing] * (index - len(values)))
+      values.append(value)
+
+  def compact(self):
+    length = self.row_count - self.offset
+    if not length:
+      return
+    for key, chunks in self.chunks.items():
+      values = self.columns.pop(key, [])
+      values.extend([_missing] * (length - len(values)))
+      chunks.append(_Chunk.from_values(values=values))
+    self.offset = self.row_count
+    self._last_keys = None
+    self._last_columns = []
+
+  def to_data_frame(self, dtypes: Optional[Dict[str, any]]=None) -> pd.DataFrame:
+    """Builds the DataFrame and resets the builder"""
+    self.compact()
+    data = {}
+    if dtypes is None:
+      for key in list(self.chunks.keys()):
+        data[key] = _Chunk.concatenate(chunks=self.chunks.pop(key))
+    else:
+      for key, dtype in dtypes.items():
+        chunks = self.chunks.pop(key, [_Chunk(values=None, length=self.row_count)])
+        data[key] = _Chunk.concatenate_as(chunks=chunks, dtype=dtype)
+      self.chunks.clear()
+    df = pd.DataFrame(data, index=pd.RangeIndex(self.row_count), copy=True)
+    self.row_count = 0
+    self.offset = 0
+    self._last_keys = None
+    self._last_columns = []
+    return df
+
+  def to_arrow_table(self, types: Optional[Dict[str, any]]=None) -> any:
+    """Builds a pyarrow Table and resets the builder"""
+    import pyarrow as pa
+    self.compact()
+    keys = list(self.chunks.keys()) if types is None else list(types.keys())
+    arrays = {}
+    for key in keys:
+      chunks = self.chunks.get(key) or [_Chunk(values=None, length=self.row_count)]
+      arrays[key] = _Chunk.to_arrow(chunks=chunks, type=types.get(key) if types is not None else None)
+    table = pa.table(arrays)
+    self.chunks.clear()
+    self.columns.clear()
+    self.row_count = 0
+    self.offset = 0
+    self._last_keys = None
+    self._last_columns = []
+    return table
+
+class _Chunk:
+  values: Optional[any]
+  holes: Dict[int, any]
+  length: int
+
+  def __init__(self, values: Optional[any], length: int, holes: Dict[int, any]={}):
+    self.values = values
+    self.length = length
+    self.holes = holes
+
+  @classmethod
+  def from_values(cls, values: List[any]) -> '_Chunk':
+    kinds = set(map(type, values))
+    hole_kinds = kinds & {type(None), _Missing}
+    value_kinds = kinds - hole_kinds
+    if value_kinds == {int} or value_kinds == {float}:
+      kind = int if int in value_kinds else float
+      holes = {}
+      if hole_kinds:
+        for i, v in enumerate(values):
+          if v is None or v is _missing:
+            holes[i] = None if v is None else np.nan
+            values[i] = kind()
+      try:
+        return cls(values=np.array(values, dtype=np.int64 if kind is int else np.float64), length=len(values), holes=holes)
+      except OverflowError:
+        for i, v in holes.items():
+          values[i] = v
+        return cls(values=values, length=len(values))
+    if _Missing in hole_kinds:
+      values = [np.nan if v is _missing else v for v in values]
+    return cls(values=values, length=len(values))
+
+  def to_objects(self) -> List[any]:
+    if self.values is None:
+      return [np.nan] * self.length
+    if isinstance(self.values, list):
+      return self.values
+    values = self.values.tolist()
+    for i, v in self.holes.items():
+      values[i] = v
+    return values
+
+  @classmethod
+  def concatenate(cls, chunks: List['_Chunk']) -> any:
+    dtypes = {c.values.dtype if isinstance(c.values, np.ndarray) else None for c in chunks if c.values is not None}
+    if len(dtypes) != 1 or None in dtypes:
+      return [v for c in chunks for v in c.to_objects()]
+    dtype = dtypes.pop()
+    data = np.concatenate([c.values if c.values is not None else np.zeros(c.length, dtype=dtype) for c in chunks])
+    holes = []
+    offset = 0
+    for c in chunks:
+      holes.extend(range(offset, offset + c.length) if c.values is None else (offset + i for i in c.holes))
+      offset += c.length
+    if holes:
+      data = data.astype(np.float64)
+      data[holes] = np.nan
+    return data
+
+  @classmethod
+  def concatenate_as(cls, chunks: List['_Chunk'], dtype: any) -> any:
+    if dtype == 'Int64' and all(c.values is None or (isinstance(c.values, np.ndarray) and c.values.dtype == np.int64) for c in chunks):
+      data = np.concatenate([c.values if c.values is not None else np.zeros(c.length, dtype=np.int64) for c in chunks]) if chunks else np.zeros(0, dtype=np.int64)
+      mask = np.zeros(len(data), dtype=bool)
+      offset = 0
+      for c in chunks:
+        if c.values is None:
+          mask[offset:offset + c.length] = True
+        else:
+          mask[[offset + i for i in c.holes]] = True
+        offset += c.length
+      return pd.arrays.IntegerArray(data, mask)
+    if dtype is object:
+      values = cls.concatenate(chunks=chunks)
+      data = np.empty(len(values), dtype=object)
+      data[:] = values
+      return pd.Series(data, dtype=object)
+    return pd.array(cls.concatenate(chunks=chunks), dtype=dtype)
+
+  @classmethod
+  def to_arrow(cls, chunks: List['_Chunk'], type: Optional[any]=None) -> any:
+    import pyarrow as pa
+    arrays = []
+    for c in chunks:
+      if c.values is None:
+        arrays.append(None)
+      elif isinstance(c.values, np.ndarray):
+        mask = None
+        if c.holes:
+          mask = np.zeros(c.length, dtype=bool)
+          mask[list(c.holes)] = True
+        arrays.append(pa.array(c.values, mask=mask, type=type))
+      else:
+        arrays.append(pa.array(c.values, type=type, from_pandas=True))
+    if type is None:
+      types = {a.type for a in arrays if a is not None and a.type != pa.null()}
+      if len(types) > 1:
+        return pa.chunked_array([pa.array([v for c in chunks for v in c.to_objects()], from_pandas=True)])
+      type = types.pop() if types else pa.null()
+    return pa.chunked_array([
+      a if a is not None and a.type == type else pa.nulls(c.length, type=type) if a is None else a.cast(type)
+      for a, c in zip(arrays, chunks)
+    ], type=type)
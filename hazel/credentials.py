@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+import google.oauth2.credentials
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Callable, Optional
+from googleads import oauth2
+
+class TokenCache:
+  """Shares OAuth access tokens between processes through a JSON file"""
+  path: str
+  refresh_margin: float
+  token_uri = 'https://accounts.google.com/o/oauth2/token'
+
+  def __init__(self, path: Optional[str]=None, refresh_margin: float=300):
+    self.path = path if path is not None else os.path.join(os.path.expanduser('~'), '.cache', 'hazel', 'oauth_tokens.json')
+    self.refresh_margin = refresh_margin
+    self._lock = threading.Lock()
+
+  @staticmethod
+  def token_key(client_id: str, refresh_token: str) -> str:
+    return hashlib.sha256(f'{client_id}\n{refresh_token}'.encode()).hexdigest()
+
+  def credentials(self, client_id: str, client_secret: str, refresh_token: str) -> 'CachedCredentials':
+    credentials = CachedCredentials(
+      None,
+      client_id=client_id,
+      client_secret=client_secret,
+      refresh_token=refresh_token,
+      token_uri=self.token_uri
+    )
+    credentials.token_cache = self
+    return credentials
+
+  def refresh(self, credentials: google.oauth2.credentials.Credentials, refresh: Callable[[], None]):
+    key = self.token_key(client_id=credentials.client_id, refresh_token=credentials.refresh_token)
+    with self._lock, self._file_lock():
+      tokens = self._load()
+      now = time.time()
+      entry = tokens.get(key)
+      if entry is None or entry['token'] == credentials.token or entry['expiry'] - self.refresh_margin <= now:
+        refresh()
+        if credentials.expiry is None:
+          return
+        entry = {
+          'token': credentials.token,
+          'expiry': credentials.expiry.replace(tzinfo=timezone.utc).timestamp(),
+        }
+        tokens = {k: e for k, e in tokens.items() if e['expiry'] > now}
+        tokens[key] = entry
+        self._save(tokens=tokens)
+      credentials.token = entry['token']
+      credentials.expiry = datetime.fromtimestamp(entry['expiry'] - self.refresh_margin, tz=timezone.utc).replace(tzinfo=None)
+
+  @contextmanager
+  def _file_lock(self):
+    import fcntl
+    directory = os.path.dirname(self.path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    with open(f'{self.path}.lock', 'a') as f:
+      fcntl.flock(f, fcntl.LOCK_EX)
+      try:
+        yield
+      finally:
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+  def _load(self) -> Dict[str, Dict[str, any]]:
+    if not os.path.exists(self.path):
+      return {}
+    try:
+      with open(self.path) as f:
+        return json.load(f)
+    except ValueError:
+      return {}
+
+  def _save(self, tokens: Dict[str, Dict[str, any]]):
+    temporary_path = f'{self.path}.{uuid.uuid4().hex}.tmp'
+    with os.fdopen(os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'w') as f:
+      json.dump(tokens, f)
+    os.replace(temporary_path, self.path)
+
+class CachedCredentials(google.oauth2.credentials.Credentials):
+  token_cache: Optional[TokenCache] = None
+
+  def refresh(self, request: any):
+    if self.token_cache is None:
+      return super().refresh(request)
+    self.token_cache.refresh(credentials=self, refresh=lambda: super(CachedCredentials, self).refresh(request))
+
+class CachedRefreshTokenClient(oauth2.GoogleRefreshTokenClient):
+  token_cache: TokenCache
+
+  def __init__(self, token_cache: TokenCache, client_id: str, client_secret: str, refresh_token: str, **kwargs):
+    super().__init__(client_id=client_id, client_secret=client_secret, refresh_token=refresh_token, **kwargs)
+    self.token_cache = token_cache
+
+  def Refresh(self):
+    self.token_cache.refresh(credentials=self.creds, refresh=super().Refresh)
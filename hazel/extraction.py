@@ -0,0 +1,272 @@
+import json
+
+from typing import Dict, List, Set, Tuple, Optional
+
+flatten_defaults = {
+  'prefixes': [],
+  'exclude_keys': [],
+  'exclude_prefixes': [],
+  'delimiter': '#',
+  'max_depth': None,
+  'json_encode_repeated': True,
+  'flatten_single_keys': {''},
+  'path_overrides': {},
+}
+
+class ExtractionPlan:
+  """Flattens protobuf messages with the flattening options resolved once per field"""
+  parameters: Dict[str, any]
+  path_overrides: Dict[str, Dict[str, any]]
+  substitute_enum_names: bool
+  steps: Dict[str, Optional[any]]
+
+  def __init__(self, parameters: Dict[str, any], substitute_enum_names: bool):
+    max_depth = parameters['max_depth']
+    self.parameters = {
+      **{k: parameters[k] for k in flatten_defaults},
+      'max_depth': max_depth - 1 if max_depth else None,
+      'json_encode_repeated': parameters['json_encode_repeated'] if max_depth is None or max_depth > 0 else False,
+    }
+    self.path_overrides = parameters['path_overrides']
+    self.substitute_enum_names = substitute_enum_names
+    self.steps = {}
+
+  @classmethod
+  def for_options(cls, exclude_keys: List[str]=[], exclude_prefixes: List[str]=[], prefixes: List[str]=[], delimiter: str='#', max_depth: Optional[int]=None, json_encode_repeated: bool=True, flatten_single_keys: Optional[Set[str]]={''}, path_overrides: Dict[str, Dict[str, any]]={}, substitute_enum_names: bool=False) -> 'ExtractionPlan':
+    return cls(
+      parameters={
+        'prefixes': prefixes,
+        'exclude_keys': exclude_keys,
+        'exclude_prefixes': exclude_prefixes,
+        'delimiter': delimiter,
+        'max_depth': max_depth,
+        'json_encode_repeated': json_encode_repeated,
+        'flatten_single_keys': flatten_single_keys,
+        'path_overrides': path_overrides,
+      },
+      substitute_enum_names=substitute_enum_names
+    )
+
+  def flatten(self, message: any) -> Dict[str, any]:
+    record = {}
+    steps = self.steps
+    for field, value in message.ListFields():
+      name = field.name
+      if name in steps:
+        step = steps[name]
+      else:
+        step = steps[name] = self._compile_step(field=field)
+      if step is not None:
+        step.apply(value, record)
+    return record
+
+  def column_fields(self, descriptor: any, field_paths: List[str]) -> Dict[str, Tuple[any, any]]:
+    columns = {}
+    for path in field_paths:
+      self._add_column_fields(descriptor=descriptor, path=path.split('.'), columns=columns)
+    return columns
+
+  def column_dtypes(self, descriptor: any, field_paths: List[str]) -> Dict[str, any]:
+    return {
+      c: step.dtype(field=field)
+      for c, (field, step) in self.column_fields(descriptor=descriptor, field_paths=field_paths).items()
+    }
+
+  def column_arrow_types(self, descriptor: any, field_paths: List[str]) -> Dict[str, any]:
+    import pyarrow as pa
+    arrow_types = {
+      'Int64': pa.int64(),
+      'float64': pa.float64(),
+      'boolean': pa.bool_(),
+    }
+    types = {}
+    for c, (field, step) in self.column_fields(descriptor=descriptor, field_paths=field_paths).items():
+      dtype = step.dtype(field=field)
+      if dtype in arrow_types:
+        types[c] = arrow_types[dtype]
+      elif isinstance(step, ValueStep):
+        types[c] = pa.binary() if field.type == field.TYPE_BYTES else pa.string()
+      else:
+        types[c] = None
+    return types
+
+  def _step(self, field: any) -> Optional[any]:
+    if field.name not in self.steps:
+      self.steps[field.name] = self._compile_step(field=field)
+    return self.steps[field.name]
+
+  def _add_column_fields(self, descriptor: any, path: List[str], columns: Dict[str, Tuple[any, any]]):
+    fields = [descriptor.fields_by_name[path[0]]] if path else descriptor.fields
+    for field in fields:
+      step = self._step(field=field)
+      if step is not None:
+        step.add_column_fields(field=field, path=path[1:], columns=columns)
+
+  def _compile_step(self, field: any) -> Optional[any]:
+    name = field.name
+    key_parameters = {
+      **self.parameters,
+      **(self.path_overrides[name] if name in self.path_overrides else {}),
+    }
+    if name in key_parameters['exclude_keys']:
+      return None
+    key_components = key_parameters['prefixes'] + [name] if name not in key_parameters['exclude_prefixes'] else key_parameters['prefixes']
+    key = key_parameters['delimiter'].join(key_components)
+    key_max_depth = key_parameters['max_depth']
+    key_overrides = key_parameters['path_overrides'][name] if name in key_parameters['path_overrides'] else {}
+    key_json_encode_repeated = key_parameters['json_encode_repeated']
+    key_flatten_single_keys = key_parameters['flatten_single_keys']
+    recurse = field.type == field.TYPE_MESSAGE
+    multiple_values = field.label == field.LABEL_REPEATED
+    enum_names = {n: v.name for n, v in field.enum_type.values_by_number.items()} if self.substitute_enum_names and field.enum_type else None
+    encode_list = key_json_encode_repeated and key_max_depth is None or key_max_depth == 0
+
+    if recurse and multiple_values:
+      return _RepeatedMessageStep(
+        key=key,
+        plan=type(self)(
+          parameters={
+            **key_parameters,
+            'prefixes': [],
+            'json_encode_repeated': False,
+            **key_overrides,
+          },
+          substitute_enum_names=self.substitute_enum_names
+        ),
+        flatten_keys=key_flatten_single_keys,
+        json_encode=encode_list
+      )
+    elif recurse:
+      return _MessageStep(
+        key=key,
+        plan=type(self)(
+          parameters={
+            **key_parameters,
+            'prefixes': key_components if key_max_depth is None or key_max_depth > 0 else [],
+            **key_overrides,
+          },
+          substitute_enum_names=self.substitute_enum_names
+        ),
+        flatten_keys=key_flatten_single_keys,
+        merge=key_max_depth is None or key_max_depth > 0,
+        json_encode=key_json_encode_repeated and key_max_depth == 0
+      )
+    elif multiple_values:
+      return _RepeatedValueStep(key=key, enum_names=enum_names, json_encode=encode_list)
+    else:
+      return ValueStep(key=key, enum_names=enum_names)
+
+def _field_dtype(field: any) -> any:
+  if field.cpp_type in (field.CPPTYPE_INT32, field.CPPTYPE_INT64, field.CPPTYPE_UINT32, field.CPPTYPE_UINT64, field.CPPTYPE_ENUM):
+    return 'Int64'
+  elif field.cpp_type in (field.CPPTYPE_DOUBLE, field.CPPTYPE_FLOAT):
+    return 'float64'
+  elif field.cpp_type == field.CPPTYPE_BOOL:
+    return 'boolean'
+  return object
+
+def _flatten_single_key(record: Dict[str, any], flatten_keys: Optional[Set[str]]) -> any:
+  if flatten_keys is not None:
+    if not record:
+      return None
+    elif flatten_keys and len(record) == 1:
+      key = next(iter(record))
+      if key in flatten_keys:
+        return record[key]
+  return record
+
+class ValueStep:
+  key: str
+  enum_names: Optional[Dict[int, str]]
+
+  def __init__(self, key: str, enum_names: Optional[Dict[int, str]]):
+    self.key = key
+    self.enum_names = enum_names
+
+  def apply(self, value: any, record: Dict[str, any]):
+    record[self.key] = self.enum_names[value] if self.enum_names is not None else value
+
+  def add_column_fields(self, field: any, path: List[str], columns: Dict[str, Tuple[any, any]]):
+    columns[self.key] = (field, self)
+
+  def dtype(self, field: any) -> any:
+    return object if self.enum_names is not None else _field_dtype(field=field)
+
+class _RepeatedValueStep:
+  key: str
+  enum_names: Optional[Dict[int, str]]
+  json_encode: bool
+
+  def __init__(self, key: str, enum_names: Optional[Dict[int, str]], json_encode: bool):
+    self.key = key
+    self.enum_names = enum_names
+    self.json_encode = json_encode
+
+  def apply(self, value: any, record: Dict[str, any]):
+    values = [self.enum_names[v] for v in value] if self.enum_names is not None else list(value)
+    record[self.key] = json.dumps(values) if self.json_encode else values
+
+  def add_column_fields(self, field: any, path: List[str], columns: Dict[str, Tuple[any, any]]):
+    columns[self.key] = (field, self)
+
+  def dtype(self, field: any) -> any:
+    return object
+
+class _MessageStep:
+  key: str
+  plan: ExtractionPlan
+  flatten_keys: Optional[Set[str]]
+  merge: bool
+  json_encode: bool
+
+  def __init__(self, key: str, plan: ExtractionPlan, flatten_keys: Optional[Set[str]], merge: bool, json_encode: bool):
+    self.key = key
+    self.plan = plan
+    self.flatten_keys = flatten_keys
+    self.merge = merge
+    self.json_encode = json_encode
+
+  def apply(self, value: any, record: Dict[str, any]):
+    flattened = _flatten_single_key(self.plan.flatten(value), self.flatten_keys)
+    if not isinstance(flattened, dict):
+      record[self.key] = flattened
+    elif self.merge:
+      record.update(flattened)
+    else:
+      record[self.key] = json.dumps(flattened) if self.json_encode else flattened
+
+  def add_column_fields(self, field: any, path: List[str], columns: Dict[str, Tuple[any, any]]):
+    if not self.merge:
+      columns[self.key] = (field, self)
+      return
+    message_columns = {}
+    self.plan._add_column_fields(descriptor=field.message_type, path=path, columns=message_columns)
+    if self.flatten_keys and len(message_columns) == 1 and next(iter(message_columns)) in self.flatten_keys:
+      columns[self.key] = next(iter(message_columns.values()))
+    else:
+      columns.update(message_columns)
+
+  def dtype(self, field: any) -> any:
+    return object
+
+class _RepeatedMessageStep:
+  key: str
+  plan: ExtractionPlan
+  flatten_keys: Optional[Set[str]]
+  json_encode: bool
+
+  def __init__(self, key: str, plan: ExtractionPlan, flatten_keys: Optional[Set[str]], json_encode: bool):
+    self.key = key
+    self.plan = plan
+    self.flatten_keys = flatten_keys
+    self.json_encode = json_encode
+
+  def apply(self, value: any, record: Dict[str, any]):
+    values = [_flatten_single_key(self.plan.flatten(v), self.flatten_keys) for v in value]
+    record[self.key] = json.dumps(values) if self.json_encode else values
+
+  def add_column_fields(self, field: any, path: List[str], columns: Dict[str, Tuple[any, any]]):
+    columns[self.key] = (field, self)
+
+  def dtype(self, field: any) -> any:
+    return object
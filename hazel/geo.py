@@ -0,0 +1,59 @@
+import os
+import numpy as np
+import pandas as pd
+
+from typing import Optional, Tuple
+
+class GeoTargetIndex:
+  """Maps geo target constant resource names to country codes from a local index"""
+  directory: str
+  _arrays: Optional[Tuple[np.ndarray, np.ndarray]]
+  ids_file_name = 'geo_target_ids.npy'
+  country_codes_file_name = 'geo_target_country_codes.npy'
+
+  def __init__(self, directory: str):
+    self.directory = directory
+    self._arrays = None
+
+  @property
+  def exists(self) -> bool:
+    return os.path.exists(os.path.join(self.directory, self.ids_file_name)) and os.path.exists(os.path.join(self.directory, self.country_codes_file_name))
+
+  @property
+  def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+    if self._arrays is None:
+      self._arrays = (
+        np.load(os.path.join(self.directory, self.ids_file_name), mmap_mode='r'),
+        np.load(os.path.join(self.directory, self.country_codes_file_name), mmap_mode='r'),
+      )
+    return self._arrays
+
+  def __len__(self) -> int:
+    return len(self.arrays[0])
+
+  def country_codes(self, resource_names: pd.Series) -> pd.Series:
+    ids, country_codes = self.arrays
+    criterion_ids = pd.to_numeric(resource_names.str.rsplit('/', n=1).str[-1], errors='coerce')
+    valid = criterion_ids.notna().to_numpy()
+    codes = np.full(len(resource_names), None, dtype=object)
+    if len(ids) and valid.any():
+      values = criterion_ids[valid].to_numpy(dtype=np.int64)
+      positions = np.minimum(np.searchsorted(ids, values), len(ids) - 1)
+      matches = ids[positions] == values
+      codes[np.flatnonzero(valid)[matches]] = np.char.decode(country_codes[positions[matches]], 'ascii')
+      codes[codes == ''] = None
+    return pd.Series(codes, index=resource_names.index, dtype=object)
+
+  def refresh(self, csv_path: str):
+    df = pd.read_csv(csv_path, usecols=['Criteria ID', 'Country Code'], dtype={'Criteria ID': np.int64, 'Country Code': str}, keep_default_na=False)
+    df = df.sort_values(by='Criteria ID').drop_duplicates(subset='Criteria ID')
+    os.makedirs(self.directory, exist_ok=True)
+    self._arrays = None
+    for file_name, array in [
+      (self.ids_file_name, df['Criteria ID'].to_numpy(dtype=np.int64)),
+      (self.country_codes_file_name, df['Country Code'].to_numpy(dtype='S2')),
+    ]:
+      path = os.path.join(self.directory, file_name)
+      temporary_path = f'{path}.{os.getpid()}.tmp.npy'
+      np.save(temporary_path, array)
+      os.replace(temporary_path, path)
@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import threading
+
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Callable, Awaitable, Optional
+
+class LookupCache:
+  """Caches resource records by key, evicting the least recently used"""
+  max_size: Optional[int]
+  ttl: Optional[float]
+  path: Optional[str]
+  records: 'OrderedDict[str, Tuple[float, Optional[Dict[str, any]]]]'
+
+  def __init__(self, max_size: Optional[int]=100000, ttl: Optional[float]=3600, path: Optional[str]=None):
+    self.max_size = max_size
+    self.ttl = ttl
+    self.path = path
+    self.records = OrderedDict()
+    self._lock = threading.Lock()
+    if path is not None and os.path.exists(path):
+      self.load()
+
+  def __len__(self) -> int:
+    return len(self.records)
+
+  def lookup(self, keys: List[str], fetch: Callable[[List[str]], Dict[str, Dict[str, any]]]) -> Dict[str, Dict[str, any]]:
+    records, missing_keys = self.get(keys=keys)
+    if missing_keys:
+      self._put_fetched(records=records, missing_keys=missing_keys, fetched_records=fetch(missing_keys))
+      if self.path is not None:
+        self.save()
+    return {k: records[k] for k in keys if k in records}
+
+  async def lookup_async(self, keys: List[str], fetch: Callable[[List[str]], Awaitable[Dict[str, Dict[str, any]]]]) -> Dict[str, Dict[str, any]]:
+    records, missing_keys = self.get(keys=keys)
+    if missing_keys:
+      self._put_fetched(records=records, missing_keys=missing_keys, fetched_records=await fetch(missing_keys))
+      if self.path is not None:
+        await asyncio.get_running_loop().run_in_executor(None, self.save)
+    return {k: records[k] for k in keys if k in records}
+
+  def _put_fetched(self, records: Dict[str, Dict[str, any]], missing_keys: List[str], fetched_records: Dict[str, Dict[str, any]]):
+    self.put(records={k: fetched_records.get(k) for k in missing_keys})
+    records.update({k: fetched_records[k] for k in missing_keys if fetched_records.get(k) is not None})
+
+  def get(self, keys: List[str]) -> Tuple[Dict[str, Dict[str, any]], List[str]]:
+    now = time.time()
+    records = {}
+    missing_keys = []
+    with self._lock:
+      for key in dict.fromkeys(keys):
+        if key not in self.records or (self.ttl is not None and now - self.records[key][0] > self.ttl):
+          missing_keys.append(key)
+          continue
+        self.records.move_to_end(key)
+        if self.records[key][1] is not None:
+          records[key] = self.records[key][1]
+    return records, missing_keys
+
+  def put(self, records: Dict[str, Optional[Dict[str, any]]]):
+    now = time.time()
+    with self._lock:
+      for key, record in records.items():
+        self.records[key] = (now, record)
+        self.records.move_to_end(key)
+      while self.max_size is not None and len(self.records) > self.max_size:
+        self.records.popitem(last=False)
+
+  def clear(self):
+    with self._lock:
+      self.records.clear()
+
+  def load(self):
+    with open(self.path) as f:
+      entries = json.load(f)
+    with self._lock:
+      self.records = OrderedDict((e['key'], (e['time'], e['record'])) for e in entries)
+
+  def save(self):
+    with self._lock:
+      entries = [{'key': k, 'time': t, 'record': r} for k, (t, r) in self.records.items()]
+    directory = os.path.dirname(self.path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    temporary_path = f'{self.path}.{uuid.uuid4().hex}.tmp'
+    with open(temporary_path, 'w') as f:
+      json.dump(entries, f, default=str)
+    os.replace(temporary_path, self.path)
@@ -0,0 +1,72 @@
+import hashlib
+import threading
+
+from typing import Dict, Tuple, Optional
+from .credentials import TokenCache
+from google.ads.google_ads.client import GoogleAdsClient
+
+class ClientPool:
+  """Shares Google Ads clients and service stubs between APIs with the same credentials"""
+  clients: Dict[str, GoogleAdsClient]
+  services: Dict[str, Dict[Tuple[str, str], any]]
+  _shared: Optional['ClientPool'] = None
+  _shared_lock = threading.Lock()
+
+  def __init__(self):
+    self.clients = {}
+    self.services = {}
+    self._lock = threading.Lock()
+
+  @classmethod
+  def shared(cls) -> 'ClientPool':
+    with cls._shared_lock:
+      if cls._shared is None:
+        cls._shared = cls()
+      return cls._shared
+
+  @staticmethod
+  def client_key(developer_token: str, client_id: str, client_secret: str, refresh_token: str, login_customer_id: Optional[str]=None, token_cache: Optional[TokenCache]=None) -> str:
+    credentials = [developer_token, client_id, client_secret, refresh_token, login_customer_id if login_customer_id is not None else '', token_cache.path if token_cache is not None else '']
+    return hashlib.sha256('\n'.join(credentials).encode()).hexdigest()
+
+  def get_client(self, developer_token: str, client_id: str, client_secret: str, refresh_token: str, login_customer_id: Optional[str]=None, token_cache: Optional[TokenCache]=None) -> GoogleAdsClient:
+    key = self.client_key(
+      developer_token=developer_token,
+      client_id=client_id,
+      client_secret=client_secret,
+      refresh_token=refresh_token,
+      login_customer_id=login_customer_id,
+      token_cache=token_cache
+    )
+    with self._lock:
+      if key in self.clients:
+        return self.clients[key]
+      if token_cache is not None:
+        self.clients[key] = GoogleAdsClient(
+          credentials=token_cache.credentials(client_id=client_id, client_secret=client_secret, refresh_token=refresh_token),
+          developer_token=developer_token,
+          login_customer_id=login_customer_id
+        )
+      else:
+        login_config = f'login_customer_id: {login_customer_id}' if login_customer_id is not None else ''
+        config = f'''
+developer_token: {developer_token}
+client_id: {client_id}
+client_secret: {client_secret}
+refresh_token: {refresh_token}
+{login_config}
+    '''
+        self.clients[key] = GoogleAdsClient.load_from_string(yaml_str=config)
+      return self.clients[key]
+
+  def get_service(self, client_key: str, name: str, version: str) -> any:
+    with self._lock:
+      client_services = self.services.setdefault(client_key, {})
+      if (name, version) not in client_services:
+        client_services[(name, version)] = self.clients[client_key].get_service(name, version=version)
+      return client_services[(name, version)]
+
+  def clear(self):
+    with self._lock:
+      self.clients.clear()
+      self.services.clear()
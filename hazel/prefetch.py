@@ -0,0 +1,68 @@
+import queue
+import threading
+import time
+
+from typing import Iterable, Iterator, Optional
+
+class _Done:
+  pass
+
+_done = _Done()
+
+class PrefetchIterator:
+  """Iterates an iterable on a background thread, buffering up to depth items"""
+  depth: int
+  wait_time: float
+  item_count: int
+  _queue: queue.Queue
+  _stop: threading.Event
+  _thread: Optional[threading.Thread]
+  _iterable: Iterable[any]
+
+  def __init__(self, iterable: Iterable[any], depth: int=2):
+    self.depth = depth
+    self.wait_time = 0.0
+    self.item_count = 0
+    self._queue = queue.Queue(maxsize=max(depth, 1))
+    self._stop = threading.Event()
+    self._thread = None
+    self._iterable = iterable
+
+  def __iter__(self) -> Iterator[any]:
+    if self._thread is None:
+      self._thread = threading.Thread(target=self._fetch, daemon=True)
+      self._thread.start()
+    try:
+      while True:
+        start = time.monotonic()
+        item, error = self._queue.get()
+        self.wait_time += time.monotonic() - start
+        if error is not None:
+          raise error
+        if item is _done:
+          return
+        self.item_count += 1
+        yield item
+    finally:
+      self.close()
+
+  def close(self):
+    self._stop.set()
+
+  def _fetch(self):
+    try:
+      for item in self._iterable:
+        if not self._put((item, None)):
+          return
+      self._put((_done, None))
+    except Exception as e:
+      self._put((None, e))
+
+  def _put(self, entry: tuple) -> bool:
+    while not self._stop.is_set():
+      try:
+        self._queue.put(entry, timeout=0.1)
+        return True
+      except queue.Full:
+        continue
+    return False
@@ -1,5 +1,8 @@
+import re
+import itertools
+
 from datetime import datetime, date
-from typing import Dict
+from typing import Dict, List
 
 class GoogleAdsQuery:
   query: str
@@ -17,6 +20,50 @@ class GoogleAdsQuery:
     }
     return self.query.format(**escaped_parameters)
 
+  @property
+  def select_fields(self) -> List[str]:
+    match = re.search(r'\bSELECT\b(.*?)\bFROM\b', self.query_text, flags=re.IGNORECASE | re.DOTALL)
+    if not match:
+      return []
+    return [f.strip() for f in match.group(1).split(',') if f.strip()]
+
+  @property
+  def from_clause(self) -> str:
+    match = re.search(r'\bFROM\b.*', self.query, flags=re.IGNORECASE | re.DOTALL)
+    return ' '.join(match.group(0).split()) if match else ''
+
+  @classmethod
+  def fused(cls, queries: List['GoogleAdsQuery']) -> 'GoogleAdsQuery':
+    select_fields = list(dict.fromkeys(f for q in queries for f in q.select_fields))
+    return cls(
+      query=f'SELECT {", ".join(select_fields)} {queries[0].from_clause}',
+      parameters=queries[0].parameters
+    )
+
+  def chunked(self, max_list_size: int) -> List['GoogleAdsQuery']:
+    """Splits list parameters longer than max_list_size into a query per chunk"""
+    chunked_parameters = []
+    for k, v in self.parameters.items():
+      if type(v) is not list or len(v) <= max_list_size:
+        chunked_parameters.append([(k, v)])
+        continue
+      if not self.is_in_list_parameter(name=k):
+        raise ValueError(f'The {k} parameter has more than {max_list_size} values but is not only used as the list of an IN condition, so it cannot be split into chunk queries')
+      values = list(dict.fromkeys(v))
+      chunked_parameters.append([(k, values[i:i + max_list_size]) for i in range(0, len(values), max_list_size)])
+    return [
+      type(self)(query=self.query, parameters=dict(p))
+      for p in itertools.product(*chunked_parameters)
+    ]
+
+  def is_in_list_parameter(self, name: str) -> bool:
+    uses = [m.start() for m in re.finditer(r'\{' + re.escape(name) + r'(?:[!:][^{}]*)?\}', self.query)]
+    for use in uses:
+      match = re.search(r'\b(NOT\s+)?IN\s*$', self.query[:use], flags=re.IGNORECASE)
+      if match is None or match.group(1) is not None:
+        return False
+    return bool(uses)
+
   @classmethod
   def format_parameter(cls, parameter: any, format_list: bool=True) -> str:
     if type(parameter) is date or type(parameter) is datetime:
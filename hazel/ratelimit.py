@@ -0,0 +1,213 @@
+import time
+import asyncio
+import inspect
+import threading
+
+from .base import is_quota_error, quota_retry_delay
+from collections import deque
+from typing import Dict, Callable, Optional
+
+class TokenBucket:
+  """Allows rate calls per second on average and up to burst calls at once"""
+  rate: Optional[float]
+  burst: float
+  tokens: float
+  updated: float
+  clock: Callable[[], float]
+  sleep: Callable[[float], any]
+
+  def __init__(self, rate: Optional[float]=None, burst: Optional[float]=None, clock: Callable[[], float]=time.monotonic, sleep: Callable[[float], any]=time.sleep):
+    self.rate = rate
+    self.burst = burst if burst is not None else max(rate or 1, 1)
+    self.tokens = self.burst
+    self.clock = clock
+    self.sleep = sleep
+    self.updated = clock()
+    self._lock = threading.Lock()
+
+  def set_rate(self, rate: Optional[float]):
+    with self._lock:
+      self._refill()
+      self.rate = rate
+
+  def acquire(self) -> float:
+    waited = 0.0
+    while True:
+      wait = self.try_acquire()
+      if not wait:
+        return waited
+      self.sleep(wait)
+      waited += wait
+
+  async def acquire_async(self) -> float:
+    waited = 0.0
+    while True:
+      wait = self.try_acquire()
+      if not wait:
+        return waited
+      await asyncio.sleep(wait)
+      waited += wait
+
+  def try_acquire(self) -> float:
+    with self._lock:
+      self._refill()
+      if self.rate is None or self.tokens >= 1:
+        self.tokens -= 1 if self.rate is not None else 0
+        return 0
+      return (1 - self.tokens) / self.rate
+
+  def _refill(self):
+    now = self.clock()
+    if self.rate is not None:
+      self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+    self.updated = now
+
+class RateLimiter:
+  """Limits API calls per developer token and customer, backing off after quota errors"""
+  rate: Optional[float]
+  current_rate: Optional[float]
+  customer_rate: Optional[float]
+  customer_burst: Optional[float]
+  min_rate: float
+  decrease_factor: float
+  increase_step: float
+  max_retries: int
+  max_backoff: float
+  window: float
+  bucket: TokenBucket
+  customer_buckets: Dict[str, TokenBucket]
+  paused_until: float
+  consecutive_quota_errors: int
+  quota_error_count: int
+  clock: Callable[[], float]
+  sleep: Callable[[float], any]
+  _shared: Dict[str, 'RateLimiter'] = {}
+  _shared_kwargs: Dict[str, Dict[str, any]] = {}
+  _shared_lock = threading.Lock()
+
+  def __init__(self, rate: Optional[float]=None, burst: Optional[float]=None, customer_rate: Optional[float]=None, customer_burst: Optional[float]=None, min_rate: float=0.5, decrease_factor: float=0.5, increase_step: float=1, max_retries: int=5, max_backoff: float=60, window: float=10, clock: Callable[[], float]=time.monotonic, sleep: Callable[[float], any]=time.sleep):
+    self.rate = rate
+    self.current_rate = rate
+    self.customer_rate = customer_rate
+    self.customer_burst = customer_burst
+    self.min_rate = min_rate
+    self.decrease_factor = decrease_factor
+    self.increase_step = increase_step
+    self.max_retries = max_retries
+    self.max_backoff = max_backoff
+    self.window = window
+    self.clock = clock
+    self.sleep = sleep
+    self.bucket = TokenBucket(rate=rate, burst=burst, clock=clock, sleep=sleep)
+    self.customer_buckets = {}
+    self.paused_until = 0.0
+    self.consecutive_quota_errors = 0
+    self.quota_error_count = 0
+    self._calls = deque()
+    self._lock = threading.Lock()
+
+  @classmethod
+  def shared(cls, key: str, **kwargs) -> 'RateLimiter':
+    with cls._shared_lock:
+      if key not in cls._shared:
+        arguments = inspect.signature(cls).bind(**kwargs)
+        arguments.apply_defaults()
+        cls._shared[key] = cls(**kwargs)
+        cls._shared_kwargs[key] = dict(arguments.arguments)
+      conflicts = {k: v for k, v in kwargs.items() if k not in cls._shared_kwargs[key] or cls._shared_kwargs[key][k] != v}
+      if conflicts:
+        raise ValueError(f'The shared rate limiter for this key was created with {cls._shared_kwargs[key]}, not {conflicts}')
+      return cls._shared[key]
+
+  def acquire(self, customer_id: Optional[str]=None) -> float:
+    waited = 0.0
+    while True:
+      pause = self.paused_until - self.clock()
+      if pause <= 0:
+        break
+      self.sleep(pause)
+      waited += pause
+    customer_bucket = self._customer_bucket(customer_id=customer_id)
+    if customer_bucket is not None:
+      waited += customer_bucket.acquire()
+    waited += self.bucket.acquire()
+    self._record_call()
+    return waited
+
+  async def acquire_async(self, customer_id: Optional[str]=None) -> float:
+    waited = 0.0
+    while True:
+      pause = self.paused_until - self.clock()
+      if pause <= 0:
+        break
+      await asyncio.sleep(pause)
+      waited += pause
+    customer_bucket = self._customer_bucket(customer_id=customer_id)
+    if customer_bucket is not None:
+      waited += await customer_bucket.acquire_async()
+    waited += await self.bucket.acquire_async()
+    self._record_call()
+    return waited
+
+  def _customer_bucket(self, customer_id: Optional[str]) -> Optional[TokenBucket]:
+    if customer_id is None or self.customer_rate is None:
+      return None
+    with self._lock:
+      if customer_id not in self.customer_buckets:
+        self.customer_buckets[customer_id] = TokenBucket(rate=self.customer_rate, burst=self.customer_burst, clock=self.clock, sleep=self.sleep)
+      return self.customer_buckets[customer_id]
+
+  def _record_call(self):
+    with self._lock:
+      now = self.clock()
+      self._calls.append(now)
+      while self._calls and self._calls[0] < now - self.window:
+        self._calls.popleft()
+
+  def succeeded(self):
+    with self._lock:
+      self.consecutive_quota_errors = 0
+      if self.current_rate is None or (self.rate is not None and self.current_rate >= self.rate):
+        return
+      self.current_rate += self.increase_step / max(self.current_rate, 1)
+      if self.rate is not None:
+        self.current_rate = min(self.current_rate, self.rate)
+      self.bucket.set_rate(self.current_rate)
+
+  def failed(self, error: Exception) -> bool:
+    if not is_quota_error(error):
+      return False
+    delay = quota_retry_delay(error)
+    with self._lock:
+      self.quota_error_count += 1
+      self.consecutive_quota_errors += 1
+      now = self.clock()
+      # Errors from calls that were already in flight when the rate was decreased do not decrease it again.
+      if now >= self.paused_until:
+        self.current_rate = max((self.current_rate if self.current_rate is not None else self._observed_rate(now=now)) * self.decrease_factor, self.min_rate)
+        self.bucket.set_rate(self.current_rate)
+      if delay is None:
+        delay = min(2 ** (self.consecutive_quota_errors - 1) / self.current_rate, self.max_backoff)
+      self.paused_until = max(self.paused_until, now + delay)
+    return True
+
+  def _observed_rate(self, now: float) -> float:
+    if len(self._calls) < 2:
+      return self.min_rate
+    return len(self._calls) / max(now - self._calls[0], 0.001)
+
+  def call(self, function: Callable[[], any], customer_id: Optional[str]=None, max_retries: Optional[int]=None) -> any:
+    if max_retries is None:
+      max_retries = self.max_retries
+    attempt = 0
+    while True:
+      self.acquire(customer_id=customer_id)
+      try:
+        result = function()
+      except Exception as e:
+        if not self.failed(error=e) or attempt >= max_retries:
+          raise e
+        attempt += 1
+        continue
+      self.succeeded()
+      return result
@@ -1,33 +1,280 @@
+import time
 import multiprocessing
 import pandas as pd
 import google
 
 from .api import GoogleAdsAPI, GoogleAdWordsAPI
-from .base import handle_ga_permission_error
+from .base import handle_ga_permission_error, is_transient_error, retry_backoff_delay
 from .query import GoogleAdsQuery
-from typing import List, Dict, Set, Optional
-from datetime import datetime
+from .schema import concat_data_frames
+from .cache import ReportCache
+from .sink import ReportSink
+from typing import List, Dict, Set, Tuple, Iterator, Callable, Optional
+from datetime import datetime, date, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from googleads import adwords
 from google.ads.google_ads.v3.services.enums import KeywordMatchTypeEnum, AdvertisingChannelTypeEnum, CriterionSystemServingStatusEnum, DeviceEnum, BiddingStrategyTypeEnum
 
 class GoogleAdsReporter:
   api: GoogleAdsAPI
   verbose: bool
+  use_search_stream: Optional[bool]
+  cache: Optional[ReportCache]
+  shard_days: Optional[int]
+  shard_workers: int
+  shard_retries: int
+  shard_retry_backoff: float
+  typed_schema: bool
+  convert_micros: bool
+  _conversion_action_report_merges = {
+    'ad_conversion_action_report': 'left',
+    'campaign_conversion_action_report': 'outer',
+  }
 
-  def __init__(self, api: GoogleAdsAPI, verbose: bool=False):
+  def __init__(self, api: GoogleAdsAPI, verbose: bool=False, use_search_stream: Optional[bool]=None, cache: Optional[ReportCache]=None, shard_days: Optional[int]=None, shard_workers: int=4, shard_retries: int=2, shard_retry_backoff: float=1, typed_schema: bool=False, convert_micros: bool=False):
     self.api = api
     self.verbose = verbose
+    self.use_search_stream = use_search_stream
+    self.cache = cache
+    self.shard_days = shard_days
+    self.shard_workers = shard_workers
+    self.shard_retries = shard_retries
+    self.shard_retry_backoff = shard_retry_backoff
+    self.typed_schema = typed_schema
+    self.convert_micros = convert_micros
+
+  def search(self, query_text: str, customer_id: Optional[str]=None) -> Iterator[any]:
+    return self.api.search(
+      customer_id=customer_id if customer_id is not None else self.api.customer_id,
+      query_text=query_text,
+      use_search_stream=self.use_search_stream
+    )
+
+  def run_for_customers(self, report: Callable[..., Optional[pd.DataFrame]], customers: Optional[List[str]]=None, max_workers: int=8, **kwargs) -> Tuple[pd.DataFrame, Dict[str, Exception]]:
+    """Runs a report method such as get_ad_report for each customer concurrently"""
+    customer_clients = self.api.get_customer_clients()
+    if customers is None:
+      customers = sorted(customer_clients.keys())
+
+    def run_report(customer_id: str) -> Optional[pd.DataFrame]:
+      is_manager = self.api.customer_is_manager(customer_id=customer_id)
+      if is_manager is None or is_manager:
+        return None
+      return report(customer_id=customer_id, **kwargs)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+      futures = {c: executor.submit(run_report, c) for c in customers}
+
+    data_frames = []
+    errors = {}
+    for customer_id, future in futures.items():
+      try:
+        df = future.result()
+      except Exception as e:
+        errors[customer_id] = e
+        continue
+      if df is not None and not df.empty:
+        data_frames.append(df)
+    df = concat_data_frames(data_frames=data_frames) if data_frames else pd.DataFrame()
+    return df, errors
+
+  def write_report_for_customers(self, report: Callable[..., Iterator[pd.DataFrame]], sink: ReportSink, customers: Optional[List[str]]=None, chunk_size: int=100000, **kwargs) -> Dict[str, Exception]:
+    """Streams an iterator report method such as iter_ad_report into sink for each customer"""
+    customer_clients = self.api.get_customer_clients()
+    if customers is None:
+      customers = sorted(customer_clients.keys())
+
+    errors = {}
+    for customer_id in customers:
+      is_manager = self.api.customer_is_manager(customer_id=customer_id)
+      if is_manager is None or is_manager:
+        continue
+      try:
+        for df in report(customer_id=customer_id, chunk_size=chunk_size, **kwargs):
+          sink.write(df=df, customer_id=customer_id)
+        sink.flush(customer_id=customer_id, close=True)
+      except Exception as e:
+        errors[customer_id] = e
+        sink.abort(customer_id=customer_id)
+    return errors
 
   @handle_ga_permission_error()
-  def get_query_data_frame(self, query: GoogleAdsQuery, customer_id: Optional[str]=None, exclude_keys: List[str]=['resource_name'], exclude_prefixes: List[str]=['value'], delimiter: str='#', substitute_enum_names: bool=True, json_encode_repeated: bool=True, flatten_single_keys: Optional[Set[str]]={''}, path_overrides: Dict[str, Dict[str, any]]={}) -> Optional[pd.DataFrame]:
+  def get_query_data_frame(self, query: GoogleAdsQuery, customer_id: Optional[str]=None, exclude_keys: List[str]=['resource_name'], exclude_prefixes: List[str]=['value'], delimiter: str='#', substitute_enum_names: bool=True, json_encode_repeated: bool=True, flatten_single_keys: Optional[Set[str]]={''}, path_overrides: Dict[str, Dict[str, any]]={}, typed_schema: Optional[bool]=None, convert_micros: Optional[bool]=None) -> Optional[pd.DataFrame]:
+    if typed_schema is None:
+      typed_schema = self.typed_schema
+    if convert_micros is None:
+      convert_micros = self.convert_micros
+    queries = query.chunked(max_list_size=self.api.max_list_size)
+    if len(queries) > 1:
+      return self._get_chunked_query_data_frame(
+        queries=queries,
+        customer_id=customer_id,
+        exclude_keys=exclude_keys,
+        exclude_prefixes=exclude_prefixes,
+        delimiter=delimiter,
+        substitute_enum_names=substitute_enum_names,
+        json_encode_repeated=json_encode_repeated,
+        flatten_single_keys=flatten_single_keys,
+        path_overrides=path_overrides,
+        typed_schema=typed_schema,
+        convert_micros=convert_micros
+      )
+
+    response = self.search(query_text=query.query_text, customer_id=customer_id)
+    df = self.api.response_to_data_frame(
+      response=response,
+      exclude_keys=exclude_keys,
+      exclude_prefixes=exclude_prefixes,
+      delimiter=delimiter,
+      substitute_enum_names=substitute_enum_names,
+      json_encode_repeated=json_encode_repeated,
+      flatten_single_keys=flatten_single_keys,
+      path_overrides=path_overrides,
+      select_fields=query.select_fields,
+      typed_schema=typed_schema,
+      convert_micros=convert_micros
+    )
+    return df
+
+  @handle_ga_permission_error()
+  def get_query_arrow_table(self, query: GoogleAdsQuery, customer_id: Optional[str]=None, exclude_keys: List[str]=['resource_name'], exclude_prefixes: List[str]=['value'], delimiter: str='#', substitute_enum_names: bool=True, json_encode_repeated: bool=True, flatten_single_keys: Optional[Set[str]]={''}, path_overrides: Dict[str, Dict[str, any]]={}) -> Optional[any]:
+    import pyarrow as pa
+    tables = [
+      self.api.response_to_arrow_table(
+        response=self.search(query_text=q.query_text, customer_id=customer_id),
+        select_fields=q.select_fields,
+        exclude_keys=exclude_keys,
+        exclude_prefixes=exclude_prefixes,
+        delimiter=delimiter,
+        substitute_enum_names=substitute_enum_names,
+        json_encode_repeated=json_encode_repeated,
+        flatten_single_keys=flatten_single_keys,
+        path_overrides=path_overrides
+      )
+      for q in query.chunked(max_list_size=self.api.max_list_size)
+    ]
+    return tables[0] if len(tables) == 1 else pa.concat_tables(tables, promote_options='permissive')
+
+  def _get_chunked_query_data_frame(self, queries: List[GoogleAdsQuery], customer_id: Optional[str], **kwargs) -> Optional[pd.DataFrame]:
+    with ThreadPoolExecutor(max_workers=self.api.list_chunk_workers) as executor:
+      chunk_frames = list(executor.map(lambda q: self.get_query_data_frame(query=q, customer_id=customer_id, **kwargs), queries))
+    if any(f is None for f in chunk_frames):
+      return None
+    data_frames = [f for f in chunk_frames if not f.empty]
+    return concat_data_frames(data_frames=data_frames).infer_objects() if data_frames else chunk_frames[0]
+
+  def get_date_range_data_frame(self, options_getter: Callable[[date, date], Dict[str, any]], start_date: datetime, end_date: datetime, customer_id: Optional[str]=None) -> Optional[pd.DataFrame]:
+    """Runs a date range report query, in retried shards of shard_days days when it is set"""
+    if not self.shard_days:
+      return self.get_query_data_frame(customer_id=customer_id, **options_getter(start_date=start_date, end_date=end_date))
     if customer_id is None:
       customer_id = self.api.customer_id
 
-    ga_service = self.api.client.get_service('GoogleAdsService', version=self.api.api_version)
+    shards = self._date_shards(start_date=start_date, end_date=end_date)
 
-    response = ga_service.search(customer_id, query=query.query_text, page_size=self.api._page_size)
-    df = self.api.response_to_data_frame(
+    def run_shard(shard_start: date, shard_end: date) -> Optional[pd.DataFrame]:
+      for attempt in range(1, self.shard_retries + 2):
+        try:
+          return self.get_query_data_frame(customer_id=customer_id, **options_getter(start_date=shard_start, end_date=shard_end))
+        except Exception as e:
+          time.sleep(self._shard_retry_delay(error=e, attempt=attempt, shard_start=shard_start, shard_end=shard_end))
+
+    with ThreadPoolExecutor(max_workers=self.shard_workers) as executor:
+      shard_frames = list(executor.map(lambda s: run_shard(*s), shards))
+    return self._concat_shard_frames(shard_frames=shard_frames)
+
+  def _date_shards(self, start_date: datetime, end_date: datetime) -> List[Tuple[date, date]]:
+    start = start_date.date() if isinstance(start_date, datetime) else start_date
+    end = end_date.date() if isinstance(end_date, datetime) else end_date
+    shards = []
+    shard_start = start
+    while shard_start <= end:
+      shard_end = min(shard_start + timedelta(days=self.shard_days - 1), end)
+      shards.append((shard_start, shard_end))
+      shard_start = shard_end + timedelta(days=1)
+    return shards
+
+  def _shard_retry_delay(self, error: Exception, attempt: int, shard_start: date, shard_end: date) -> float:
+    if attempt > self.shard_retries or not is_transient_error(error=error):
+      raise error
+    if self.verbose:
+      print(f'Retrying {shard_start} to {shard_end} shard after error: {error}')
+    return retry_backoff_delay(attempt=attempt, backoff=self.shard_retry_backoff)
+
+  def _concat_shard_frames(self, shard_frames: List[Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+    if any(f is None for f in shard_frames):
+      return None
+    data_frames = [f for f in shard_frames if not f.empty]
+    return concat_data_frames(data_frames=data_frames).infer_objects() if data_frames else pd.DataFrame()
+
+  def get_cached_date_range_data_frame(self, options_getter: Callable[[date, date], Dict[str, any]], start_date: datetime, end_date: datetime, customer_id: Optional[str]=None) -> Optional[pd.DataFrame]:
+    """Runs a date range report query, reading immutable days from the cache"""
+    if self.cache is None:
+      return self.get_date_range_data_frame(options_getter=options_getter, start_date=start_date, end_date=end_date, customer_id=customer_id)
+    if customer_id is None:
+      customer_id = self.api.customer_id
+
+    key, date_column, days, day_frames, missing_ranges = self._read_cached_days(options_getter=options_getter, start_date=start_date, end_date=end_date, customer_id=customer_id)
+    for range_start, range_end in missing_ranges:
+      df = self.get_date_range_data_frame(options_getter=options_getter, start_date=range_start, end_date=range_end, customer_id=customer_id)
+      if df is None:
+        return None
+      self._write_fetched_days(df=df, key=key, days=days[days.index(range_start):days.index(range_end) + 1], day_frames=day_frames, customer_id=customer_id, date_column=date_column)
+    return self._concat_cached_days(days=days, day_frames=day_frames, missing_ranges=missing_ranges)
+
+  def _read_cached_days(self, options_getter: Callable[[date, date], Dict[str, any]], start_date: datetime, end_date: datetime, customer_id: str) -> Tuple[str, str, List[date], Dict[date, pd.DataFrame], List[List[date]]]:
+    start = start_date.date() if isinstance(start_date, datetime) else start_date
+    end = end_date.date() if isinstance(end_date, datetime) else end_date
+    options = options_getter(start_date=start, end_date=end)
+    if 'segments.date' not in options['query'].select_fields:
+      raise ValueError('Cached date range reports must select segments.date')
+    key = self.cache.query_key(query=options['query'], options={k: v for k, v in options.items() if k != 'query'})
+    days = [start + timedelta(days=d) for d in range((end - start).days + 1)]
+    day_frames = {}
+    for day in days:
+      if self.cache.is_immutable(day=day):
+        df = self.cache.read(customer_id=customer_id, key=key, day=day)
+        if df is not None:
+          day_frames[day] = df
+
+    missing_ranges = []
+    for day in days:
+      if day in day_frames:
+        continue
+      if missing_ranges and missing_ranges[-1][1] + timedelta(days=1) == day:
+        missing_ranges[-1][1] = day
+      else:
+        missing_ranges.append([day, day])
+    return key, options.get('delimiter', '#').join(['segments', 'date']), days, day_frames, missing_ranges
+
+  def _write_fetched_days(self, df: pd.DataFrame, key: str, days: List[date], day_frames: Dict[date, pd.DataFrame], customer_id: str, date_column: str):
+    fetched_frames = {
+      v: f.reset_index(drop=True)
+      for v, f in df.groupby(date_column, sort=False)
+    } if not df.empty else {}
+    for day in days:
+      day_frames[day] = fetched_frames.get(day.isoformat(), df.iloc[0:0])
+      if self.cache.is_immutable(day=day):
+        self.cache.write(customer_id=customer_id, key=key, day=day, data_frame=day_frames[day])
+
+  def _concat_cached_days(self, days: List[date], day_frames: Dict[date, pd.DataFrame], missing_ranges: List[List[date]]) -> pd.DataFrame:
+    if self.verbose:
+      missing_day_count = sum((e - s).days + 1 for s, e in missing_ranges)
+      print(f'Read {len(days) - missing_day_count} cached days and fetched {missing_day_count} days in {len(missing_ranges)} queries')
+    data_frames = [day_frames[d] for d in days if not day_frames[d].empty]
+    return concat_data_frames(data_frames=data_frames) if data_frames else pd.DataFrame()
+
+  @handle_ga_permission_error()
+  def iter_query_data_frames(self, query: GoogleAdsQuery, customer_id: Optional[str]=None, chunk_size: int=100000, exclude_keys: List[str]=['resource_name'], exclude_prefixes: List[str]=['value'], delimiter: str='#', substitute_enum_names: bool=True, json_encode_repeated: bool=True, flatten_single_keys: Optional[Set[str]]={''}, path_overrides: Dict[str, Dict[str, any]]={}) -> Iterator[pd.DataFrame]:
+    response = (
+      row
+      for q in query.chunked(max_list_size=self.api.max_list_size)
+      for row in self.search(query_text=q.query_text, customer_id=customer_id)
+    )
+    yield from self.api.response_to_data_frames(
       response=response,
+      select_fields=query.select_fields,
+      chunk_size=chunk_size,
       exclude_keys=exclude_keys,
       exclude_prefixes=exclude_prefixes,
       delimiter=delimiter,
@@ -36,9 +283,114 @@ class GoogleAdsReporter:
       flatten_single_keys=flatten_single_keys,
       path_overrides=path_overrides
     )
-    return df
 
-  def get_ad_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None, json_encode_repeated: bool=True) -> pd.DataFrame:
+  @handle_ga_permission_error()
+  def get_lookup_data_frame(self, query_getter: Callable[[List[str]], GoogleAdsQuery], resource_names: List[str], key_column: str, customer_id: Optional[str]=None, exclude_keys: List[str]=['resource_name'], exclude_prefixes: List[str]=['value'], delimiter: str='#', substitute_enum_names: bool=True, json_encode_repeated: bool=True, flatten_single_keys: Optional[Set[str]]={''}, path_overrides: Dict[str, Dict[str, any]]={}) -> Optional[pd.DataFrame]:
+    return self.api.lookup_resources(
+      customer_id=customer_id if customer_id is not None else self.api.customer_id,
+      query_getter=query_getter,
+      resource_names=resource_names,
+      key_column=key_column,
+      typed_schema=self.typed_schema,
+      convert_micros=self.convert_micros,
+      exclude_keys=exclude_keys,
+      exclude_prefixes=exclude_prefixes,
+      delimiter=delimiter,
+      substitute_enum_names=substitute_enum_names,
+      json_encode_repeated=json_encode_repeated,
+      flatten_single_keys=flatten_single_keys,
+      path_overrides=path_overrides
+    )
+
+  def plan_fused_queries(self, queries: Dict[str, GoogleAdsQuery]) -> List[Tuple[GoogleAdsQuery, List[str]]]:
+    groups = {}
+    for name, query in queries.items():
+      key = (
+        query.from_clause,
+        tuple(sorted((k, GoogleAdsQuery.format_parameter(v)) for k, v in query.parameters.items())),
+        tuple(sorted(f for f in query.select_fields if f.startswith('segments.'))),
+      )
+      groups.setdefault(key, []).append(name)
+    return [
+      (GoogleAdsQuery.fused(queries=[queries[n] for n in names]), names)
+      for names in groups.values()
+    ]
+
+  def get_fused_query_data_frames(self, options: Dict[str, Dict[str, any]], customer_id: Optional[str]=None) -> Dict[str, Optional[pd.DataFrame]]:
+    plan = self.plan_fused_queries(queries={name: o['query'] for name, o in options.items()})
+    if self.verbose:
+      print(f'Running {len(options)} report queries as {len(plan)} fused queries')
+    with ThreadPoolExecutor(max_workers=self.shard_workers) as executor:
+      fused_frames = list(executor.map(lambda p: self._get_fused_query_data_frames(query=p[0], options={n: options[n] for n in p[1]}, customer_id=customer_id), plan))
+    return {
+      name: fused_frames[i][name] if fused_frames[i] is not None else None
+      for i, (_, names) in enumerate(plan)
+      for name in names
+    }
+
+  @handle_ga_permission_error()
+  def _get_fused_query_data_frames(self, query: GoogleAdsQuery, options: Dict[str, Dict[str, any]], customer_id: Optional[str]) -> Optional[Dict[str, pd.DataFrame]]:
+    response = (
+      row
+      for q in query.chunked(max_list_size=self.api.max_list_size)
+      for row in self.search(query_text=q.query_text, customer_id=customer_id)
+    )
+    return self.api.response_to_split_data_frames(
+      response=response,
+      options=self._split_options_by_name(options=options),
+      typed_schema=self.typed_schema,
+      convert_micros=self.convert_micros
+    )
+
+  def _split_options_by_name(self, options: Dict[str, Dict[str, any]]) -> Dict[str, Dict[str, any]]:
+    return {
+      name: {
+        'exclude_keys': ['resource_name'],
+        'exclude_prefixes': ['value'],
+        'substitute_enum_names': True,
+        'json_encode_repeated': True,
+        **{k: v for k, v in o.items() if k != 'query'},
+        'select_fields': o['query'].select_fields,
+      }
+      for name, o in options.items()
+    }
+
+  def get_fused_reports(self, reports: List[str], start_date: datetime, end_date: datetime, customer_id: Optional[str]=None) -> Dict[str, pd.DataFrame]:
+    data_frames = self.get_fused_query_data_frames(
+      options={
+        name: getattr(self, f'_{name}_options')(start_date=start_date, end_date=end_date)
+        for name in reports
+      },
+      customer_id=customer_id
+    )
+    conversion_action_data_frames = {
+      name: self.get_lookup_data_frame(customer_id=customer_id, **lookup_options)
+      for name, lookup_options in self._fused_report_lookups(data_frames=data_frames).items()
+    }
+    return self._finish_fused_reports(data_frames=data_frames, conversion_action_data_frames=conversion_action_data_frames)
+
+  def _fused_report_lookups(self, data_frames: Dict[str, Optional[pd.DataFrame]]) -> Dict[str, Dict[str, any]]:
+    lookups = {}
+    for name, df in data_frames.items():
+      if name in self._conversion_action_report_merges and df is not None and not df.empty:
+        lookup_options = self._conversion_action_lookup_options(df=df)
+        if lookup_options is not None:
+          lookups[name] = lookup_options
+    return lookups
+
+  def _finish_fused_reports(self, data_frames: Dict[str, Optional[pd.DataFrame]], conversion_action_data_frames: Dict[str, Optional[pd.DataFrame]]) -> Dict[str, pd.DataFrame]:
+    reports = {}
+    for name, df in data_frames.items():
+      if df is None:
+        df = pd.DataFrame()
+      elif name in conversion_action_data_frames:
+        df = self._merge_conversion_action_data_frame(df=df, conversion_action_df=conversion_action_data_frames[name], how=self._conversion_action_report_merges[name])
+      elif name == 'web_keyword_report':
+        self._substitute_web_keyword_enum_names(df=df)
+      reports[name] = df
+    return reports
+
+  def _ad_report_options(self, start_date: datetime, end_date: datetime, json_encode_repeated: bool=True) -> Dict[str, any]:
     query = GoogleAdsQuery(
       query=(''
         'SELECT customer.id'
@@ -123,11 +475,10 @@ class GoogleAdsReporter:
         'end_date': end_date,
       }
     )
-    df = self.get_query_data_frame(
-      query=query,
-      customer_id=customer_id,
-      json_encode_repeated=json_encode_repeated,
-      path_overrides={
+    return {
+      'query': query,
+      'json_encode_repeated': json_encode_repeated,
+      'path_overrides': {
         'ad_group_ad': {
           'path_overrides': {
             'ad': {
@@ -142,12 +493,71 @@ class GoogleAdsReporter:
             }
           }
         }
-      }
+      },
+    }
+
+  def get_ad_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None, json_encode_repeated: bool=True) -> pd.DataFrame:
+    df = self.get_date_range_data_frame(
+      options_getter=lambda start_date, end_date: self._ad_report_options(start_date=start_date, end_date=end_date, json_encode_repeated=json_encode_repeated),
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
     )
     return df if df is not None else pd.DataFrame()
 
-  def get_asset_report(self, customer_id: Optional[str]=None, assets: Optional[List[str]]=None) -> pd.DataFrame:
-    condition = f'WHERE asset.resource_name IN {assets}' if assets is not None else ''
+  def _normalized_ad_report_options(self, start_date: datetime, end_date: datetime, json_encode_repeated: bool=True) -> Tuple[Dict[str, any], Dict[str, any]]:
+    options = self._ad_report_options(start_date=start_date, end_date=end_date, json_encode_repeated=json_encode_repeated)
+    fields = options['query'].select_fields
+    metric_fields = [f for f in fields if f.startswith('metrics.')]
+    dimension_fields = [f for f in fields if f not in metric_fields and f != 'segments.date']
+    key_fields = ['customer.id', 'campaign.id', 'ad_group.id', 'ad_group_ad.ad.id']
+    condition = (''
+      'FROM ad_group_ad '
+      'WHERE segments.date >= {start_date} '
+        'AND segments.date <= {end_date} '
+    )
+    dimension_options = {
+      **options,
+      'query': GoogleAdsQuery(
+        query='SELECT ' + ', '.join(dimension_fields + metric_fields) + ' ' + condition,
+        parameters=options['query'].parameters
+      ),
+    }
+    fact_options = {
+      'query': GoogleAdsQuery(
+        query='SELECT ' + ', '.join(key_fields + metric_fields + ['segments.date']) + ' ' + condition,
+        parameters=options['query'].parameters
+      ),
+    }
+    return dimension_options, fact_options
+
+  def get_normalized_ad_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None, json_encode_repeated: bool=True) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Returns the ad report as an ad dimension frame and a metrics fact frame"""
+    dimension_options, fact_options = self._normalized_ad_report_options(start_date=start_date, end_date=end_date, json_encode_repeated=json_encode_repeated)
+    fact_df = self.get_date_range_data_frame(
+      options_getter=lambda start_date, end_date: self._normalized_ad_report_options(start_date=start_date, end_date=end_date, json_encode_repeated=json_encode_repeated)[1],
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
+    )
+    if fact_df is None or fact_df.empty:
+      return pd.DataFrame(), pd.DataFrame()
+
+    dimension_df = self.get_query_data_frame(customer_id=customer_id, **dimension_options)
+    if dimension_df is None:
+      return pd.DataFrame(), pd.DataFrame()
+    dimension_df = dimension_df[[c for c in dimension_df.columns if not c.startswith('metrics#')]]
+    return dimension_df, fact_df
+
+  def iter_ad_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None, json_encode_repeated: bool=True, chunk_size: int=100000) -> Iterator[pd.DataFrame]:
+    yield from self.iter_query_data_frames(
+      customer_id=customer_id,
+      chunk_size=chunk_size,
+      **self._ad_report_options(start_date=start_date, end_date=end_date, json_encode_repeated=json_encode_repeated)
+    )
+
+  def _asset_report_options(self, assets: Optional[List[str]]=None) -> Dict[str, any]:
+    condition = f'WHERE asset.resource_name IN {{assets}}' if assets is not None else ''
     condition_parameters = {'assets': assets} if assets is not None else {}
     query = GoogleAdsQuery(
       query=(''
@@ -170,18 +580,43 @@ class GoogleAdsReporter:
       ),
       parameters=condition_parameters
     )
-    df = self.get_query_data_frame(
-      query=query,
-      customer_id=customer_id,
-      path_overrides={
+    return {
+      'query': query,
+      'path_overrides': {
         'asset': {
           'exclude_keys': []
         }
-      }
-    )
+      },
+    }
+
+  def get_asset_report(self, customer_id: Optional[str]=None, assets: Optional[List[str]]=None) -> pd.DataFrame:
+    if assets is not None:
+      df = self.get_lookup_data_frame(customer_id=customer_id, **self._asset_lookup_options(assets=assets))
+    else:
+      df = self.get_query_data_frame(
+        customer_id=customer_id,
+        **self._asset_report_options(assets=assets)
+      )
     return df if df is not None else pd.DataFrame()
 
-  def get_ad_asset_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None) -> pd.DataFrame:
+  def _asset_lookup_options(self, assets: List[str]) -> Dict[str, any]:
+    options = self._asset_report_options(assets=assets)
+    del options['query']
+    return {
+      'query_getter': lambda assets: self._asset_report_options(assets=assets)['query'],
+      'resource_names': assets,
+      'key_column': 'asset#resource_name',
+      **options,
+    }
+
+  def iter_asset_report(self, customer_id: Optional[str]=None, assets: Optional[List[str]]=None, chunk_size: int=100000) -> Iterator[pd.DataFrame]:
+    yield from self.iter_query_data_frames(
+      customer_id=customer_id,
+      chunk_size=chunk_size,
+      **self._asset_report_options(assets=assets)
+    )
+
+  def _ad_asset_report_options(self, start_date: datetime, end_date: datetime) -> Dict[str, any]:
     query = GoogleAdsQuery(
       query=(''
         'SELECT customer.id'
@@ -224,10 +659,9 @@ class GoogleAdsReporter:
         'end_date': end_date,
       }
     )
-    df = self.get_query_data_frame(
-      query=query,
-      customer_id=customer_id,
-      path_overrides={
+    return {
+      'query': query,
+      'path_overrides': {
         'asset': {
           'exclude_keys': [],
         },
@@ -239,11 +673,26 @@ class GoogleAdsReporter:
             }
           }
         },
-      }
+      },
+    }
+
+  def get_ad_asset_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None) -> pd.DataFrame:
+    df = self.get_date_range_data_frame(
+      options_getter=self._ad_asset_report_options,
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
     )
     return df if df is not None else pd.DataFrame()
 
-  def get_ad_conversion_action_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None) -> pd.DataFrame:
+  def iter_ad_asset_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None, chunk_size: int=100000) -> Iterator[pd.DataFrame]:
+    yield from self.iter_query_data_frames(
+      customer_id=customer_id,
+      chunk_size=chunk_size,
+      **self._ad_asset_report_options(start_date=start_date, end_date=end_date)
+    )
+
+  def _ad_conversion_action_report_options(self, start_date: datetime, end_date: datetime) -> Dict[str, any]:
     query = GoogleAdsQuery(
       query=(''
         'SELECT customer.id'
@@ -278,11 +727,34 @@ class GoogleAdsReporter:
         'end_date': end_date,
       }
     )
-    df = self.get_query_data_frame(query=query, customer_id=customer_id)
+    return {'query': query}
+
+  def get_ad_conversion_action_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None) -> pd.DataFrame:
+    df = self.get_date_range_data_frame(
+      options_getter=self._ad_conversion_action_report_options,
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
+    )
     if df is None or 'segments#conversion_action' not in df:
       return pd.DataFrame()
 
-    conversion_action_query = GoogleAdsQuery(
+    # TODO: Figure out why the conversion_action_query does not retrieve most of the conversion action resources by which the ad query is segmented.
+    return self._merge_conversion_actions(df=df, customer_id=customer_id, how='left')
+
+  def iter_ad_conversion_action_report(self, start_date: datetime, end_date: datetime, customer_id: Optional[str]=None, chunk_size: int=100000) -> Iterator[pd.DataFrame]:
+    yield from self._iter_conversion_action_merged(
+      data_frames=self.iter_query_data_frames(
+        customer_id=customer_id,
+        chunk_size=chunk_size,
+        **self._ad_conversion_action_report_options(start_date=start_date, end_date=end_date)
+      ),
+      customer_id=customer_id,
+      how='left'
+    )
+
+  def _conversion_action_query(self, conversion_actions: List[str]) -> GoogleAdsQuery:
+    return GoogleAdsQuery(
       query=(''
         'SELECT conversion_action.id'
           ', conversion_action.resource_name'
@@ -297,33 +769,59 @@ class GoogleAdsReporter:
         'WHERE conversion_action.resource_name IN {conversion_actions}'
       ),
       parameters={
-        'conversion_actions': sorted(filter(lambda v: not pd.isna(v), df['segments#conversion_action'].unique()))
+        'conversion_actions': conversion_actions
       }
     )
-    conversion_action_df = self.get_query_data_frame(
-      query=conversion_action_query,
-      customer_id=customer_id,
-      exclude_keys=[]
-    )
+
+  def _conversion_action_lookup_options(self, df: pd.DataFrame) -> Optional[Dict[str, any]]:
+    conversion_actions = sorted(filter(lambda v: not pd.isna(v), df['segments#conversion_action'].unique()))
+    if not conversion_actions:
+      return None
+    return {
+      'query_getter': lambda conversion_actions: self._conversion_action_query(conversion_actions=conversion_actions),
+      'resource_names': conversion_actions,
+      'key_column': 'conversion_action#resource_name',
+      'exclude_keys': [],
+    }
+
+  def _merge_conversion_action_data_frame(self, df: pd.DataFrame, conversion_action_df: Optional[pd.DataFrame], how: str) -> pd.DataFrame:
     if conversion_action_df is None or conversion_action_df.empty:
       return df
-
-    # TODO: Figure out why the conversion_action_query does not retrieve most of the conversion action resources by which the ad query is segmented.
-    merged_df = df.merge(
-      left_on='segments#conversion_action', 
-      right_on='conversion_action#resource_name', 
+    return df.merge(
+      left_on='segments#conversion_action',
+      right_on='conversion_action#resource_name',
       right=conversion_action_df,
-      how='left'
+      how=how
     )
-    return merged_df
 
-  @handle_ga_permission_error(default_value=pd.DataFrame())
-  def get_campaign_performance_report(self, start_date: datetime, end_date: datetime, customer_id: str=None) -> pd.DataFrame:
-    if customer_id is None:
-      customer_id = self.api.customer_id
-      
-    ga_service = self.api.client.get_service('GoogleAdsService', version=self.api.api_version)
+  def _merge_conversion_actions(self, df: pd.DataFrame, customer_id: Optional[str], how: str) -> pd.DataFrame:
+    lookup_options = self._conversion_action_lookup_options(df=df)
+    if lookup_options is None:
+      return df
+    return self._merge_conversion_action_data_frame(df=df, conversion_action_df=self.get_lookup_data_frame(customer_id=customer_id, **lookup_options), how=how)
+
+  def _iter_conversion_action_merged(self, data_frames: Iterator[pd.DataFrame], customer_id: Optional[str], how: str) -> Iterator[pd.DataFrame]:
+    # Conform the conversion actions to an empty conversion action frame with the lookup columns, so that every merged chunk has the same columns and dtypes.
+    empty_conversion_action_df = next(self.api.response_to_data_frames(
+      response=[],
+      select_fields=self._conversion_action_query(conversion_actions=[]).select_fields,
+      exclude_keys=[],
+      substitute_enum_names=True,
+      json_encode_repeated=True
+    ))
+    for df in data_frames:
+      lookup_options = self._conversion_action_lookup_options(df=df)
+      conversion_action_df = self.get_lookup_data_frame(customer_id=customer_id, **lookup_options) if lookup_options is not None else None
+      if conversion_action_df is None or conversion_action_df.empty:
+        conversion_action_df = empty_conversion_action_df
+      yield df.merge(
+        left_on='segments#conversion_action',
+        right_on='conversion_action#resource_name',
+        right=conversion_action_df.reindex(columns=empty_conversion_action_df.columns).astype(empty_conversion_action_df.dtypes.to_dict()),
+        how=how
+      )
 
+  def _campaign_performance_report_options(self, start_date: datetime, end_date: datetime) -> Dict[str, any]:
     query = GoogleAdsQuery(
       query=(''
         'SELECT campaign.id '
@@ -365,22 +863,30 @@ class GoogleAdsReporter:
         'end_date': end_date,
       }
     )
-    response = ga_service.search(customer_id, query=query.query_text, page_size=self.api._page_size)
-    df = self.api.response_to_data_frame(
-      response=response,
-      substitute_enum_names=True,
-      json_encode_repeated=True
-    )
-
-    return df
+    return {
+      'query': query,
+      'substitute_enum_names': True,
+      'json_encode_repeated': True,
+    }
 
   @handle_ga_permission_error(default_value=pd.DataFrame())
-  def get_ad_group_report(self, start_date: datetime, end_date: datetime, customer_id: str=None) -> pd.DataFrame:
-    if customer_id is None:
-      customer_id = self.api.customer_id
-      
-    ga_service = self.api.client.get_service('GoogleAdsService', version=self.api.api_version)
+  def get_campaign_performance_report(self, start_date: datetime, end_date: datetime, customer_id: str=None) -> pd.DataFrame:
+    df = self.get_cached_date_range_data_frame(
+      options_getter=self._campaign_performance_report_options,
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
+    )
+    return df if df is not None else pd.DataFrame()
+
+  def iter_campaign_performance_report(self, start_date: datetime, end_date: datetime, customer_id: str=None, chunk_size: int=100000) -> Iterator[pd.DataFrame]:
+    yield from self.iter_query_data_frames(
+      customer_id=customer_id,
+      chunk_size=chunk_size,
+      **self._campaign_performance_report_options(start_date=start_date, end_date=end_date)
+    )
 
+  def _ad_group_report_options(self, start_date: datetime, end_date: datetime) -> Dict[str, any]:
     query = GoogleAdsQuery(
       query=(''
         'SELECT ad_group.id '
@@ -426,22 +932,30 @@ class GoogleAdsReporter:
         'end_date': end_date,
       }
     )
-    response = ga_service.search(customer_id, query=query.query_text, page_size=self.api._page_size)
-    df = self.api.response_to_data_frame(
-      response=response,
-      substitute_enum_names=True,
-      json_encode_repeated=True
-    )
-
-    return df
+    return {
+      'query': query,
+      'substitute_enum_names': True,
+      'json_encode_repeated': True,
+    }
 
   @handle_ga_permission_error(default_value=pd.DataFrame())
-  def get_campaign_conversion_action_report(self, start_date: datetime, end_date: datetime, customer_id: str=None) -> pd.DataFrame:
-    if customer_id is None:
-      customer_id = self.api.customer_id
-      
-    ga_service = self.api.client.get_service('GoogleAdsService', version=self.api.api_version)
+  def get_ad_group_report(self, start_date: datetime, end_date: datetime, customer_id: str=None) -> pd.DataFrame:
+    df = self.get_cached_date_range_data_frame(
+      options_getter=self._ad_group_report_options,
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
+    )
+    return df if df is not None else pd.DataFrame()
+
+  def iter_ad_group_report(self, start_date: datetime, end_date: datetime, customer_id: str=None, chunk_size: int=100000) -> Iterator[pd.DataFrame]:
+    yield from self.iter_query_data_frames(
+      customer_id=customer_id,
+      chunk_size=chunk_size,
+      **self._ad_group_report_options(start_date=start_date, end_date=end_date)
+    )
 
+  def _campaign_conversion_action_report_options(self, start_date: datetime, end_date: datetime) -> Dict[str, any]:
     query = GoogleAdsQuery(
       query=(''
         'SELECT campaign.id '
@@ -464,53 +978,43 @@ class GoogleAdsReporter:
         'end_date': end_date,
       }
     )
-    response = ga_service.search(customer_id, query=query.query_text, page_size=self.api._page_size)
-    df = self.api.response_to_data_frame(
-      response=response, 
-      substitute_enum_names=True,
-      json_encode_repeated=True
-    )
-    if df.empty:
-      return df
+    return {
+      'query': query,
+      'substitute_enum_names': True,
+      'json_encode_repeated': True,
+    }
 
-    conversion_action_query = GoogleAdsQuery(
-      query=(''
-        'SELECT conversion_action.id '
-          ', conversion_action.resource_name '
-          ', conversion_action.name '
-          ', conversion_action.type '
-          ', conversion_action.category '
-          ', conversion_action.app_id '
-          ', conversion_action.value_settings.default_value '
-          ', conversion_action.value_settings.default_currency_code '
-          ', metrics.conversion_last_conversion_date '
-        'FROM conversion_action '
-        'WHERE conversion_action.resource_name IN {conversion_actions} '
-      ),
-      parameters={
-        'conversion_actions': list(df['segments#conversion_action'].unique())
-      }
+  @handle_ga_permission_error(default_value=pd.DataFrame())
+  def get_campaign_conversion_action_report(self, start_date: datetime, end_date: datetime, customer_id: str=None) -> pd.DataFrame:
+    df = self.get_date_range_data_frame(
+      options_getter=self._campaign_conversion_action_report_options,
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
     )
-    conversion_action_response = ga_service.search(customer_id, query=conversion_action_query.query_text, page_size=self.api._page_size)
-    conversion_action_df = self.api.response_to_data_frame(response=conversion_action_response, exclude_keys=[], substitute_enum_names=True)
-    if conversion_action_df.empty:
+    if df is None:
+      return pd.DataFrame()
+    if df.empty:
       return df
 
     # TODO: Figure out why the conversion_action_query does not retrieve the conversion action resources by which the campaign query is segmented.
-    merged_df = df.merge(
-      left_on='segments#conversion_action',
-      right_on='conversion_action#resource_name',
-      right=conversion_action_df,
+    return self._merge_conversion_actions(df=df, customer_id=customer_id, how='outer')
+
+  def iter_campaign_conversion_action_report(self, start_date: datetime, end_date: datetime, customer_id: str=None, chunk_size: int=100000) -> Iterator[pd.DataFrame]:
+    yield from self._iter_conversion_action_merged(
+      data_frames=self.iter_query_data_frames(
+        customer_id=customer_id,
+        chunk_size=chunk_size,
+        **self._campaign_conversion_action_report_options(start_date=start_date, end_date=end_date)
+      ),
+      customer_id=customer_id,
       how='outer'
     )
 
-    return merged_df
-
   def get_campaign_report(self):
-    ga_service = self.api.client.get_service('GoogleAdsService', version=self.api.api_version)
     query = ('SELECT campaign.id, campaign.name FROM campaign '
              'ORDER BY campaign.id')
-    results = ga_service.search(self.api.customer_id, query=query, page_size=self.api._page_size)
+    results = self.search(query_text=query)
 
     try:
         for row in results:
@@ -525,12 +1029,7 @@ class GoogleAdsReporter:
                 for field_path_element in error.location.field_path_elements:
                     print('\t\tOn field: %s' % field_path_element.field_name)
 
-  @handle_ga_permission_error(default_value=pd.DataFrame())
-  def get_web_keyword_report(self, start_date: datetime, end_date: datetime, customer_id: str=None):
-    if customer_id is None:
-      customer_id = self.api.customer_id
-    ga_service = self.api.client.get_service('GoogleAdsService', version=self.api.api_version)
-
+  def _web_keyword_report_options(self, start_date: datetime, end_date: datetime) -> Dict[str, any]:
     query = GoogleAdsQuery(
       query=('SELECT campaign.id, campaign.name, campaign.advertising_channel_type, ad_group.id, ad_group.name, '
              'ad_group_criterion.criterion_id, '
@@ -555,16 +1054,46 @@ class GoogleAdsReporter:
         'end_date': end_date,
       }
     )
+    return {
+      'query': query,
+      'substitute_enum_names': False,
+      'json_encode_repeated': False,
+    }
 
-    response = ga_service.search(customer_id, query.query_text, page_size=self.api._page_size)
-    df = self.api.response_to_data_frame(response=response)
+  @handle_ga_permission_error(default_value=pd.DataFrame())
+  def get_web_keyword_report(self, start_date: datetime, end_date: datetime, customer_id: str=None):
+    df = self.get_date_range_data_frame(
+      options_getter=self._web_keyword_report_options,
+      start_date=start_date,
+      end_date=end_date,
+      customer_id=customer_id
+    )
+    if df is None:
+      return pd.DataFrame()
 
-    self.api.substitute_enum_name(df=df, column_name='ad_group_criterion#keyword#match_type', enum=KeywordMatchTypeEnum.KeywordMatchType)
-    self.api.substitute_enum_name(df=df, column_name='campaign#advertising_channel_type', enum=AdvertisingChannelTypeEnum.AdvertisingChannelType)
-    self.api.substitute_enum_name(df=df, column_name='ad_group_criterion#system_serving_status', enum=CriterionSystemServingStatusEnum.CriterionSystemServingStatus)
-    self.api.substitute_enum_name(df=df, column_name='segments#device', enum=DeviceEnum.Device)
+    self._substitute_web_keyword_enum_names(df=df)
     return df
 
+  def iter_web_keyword_report(self, start_date: datetime, end_date: datetime, customer_id: str=None, chunk_size: int=100000) -> Iterator[pd.DataFrame]:
+    for df in self.iter_query_data_frames(
+      customer_id=customer_id,
+      chunk_size=chunk_size,
+      **self._web_keyword_report_options(start_date=start_date, end_date=end_date)
+    ):
+      self._substitute_web_keyword_enum_names(df=df)
+      yield df
+
+  def _substitute_web_keyword_enum_names(self, df: pd.DataFrame):
+    self.api.substitute_enum_names(
+      df=df,
+      column_to_enum_map={
+        'ad_group_criterion#keyword#match_type': KeywordMatchTypeEnum.KeywordMatchType,
+        'campaign#advertising_channel_type': AdvertisingChannelTypeEnum.AdvertisingChannelType,
+        'ad_group_criterion#system_serving_status': CriterionSystemServingStatusEnum.CriterionSystemServingStatus,
+        'segments#device': DeviceEnum.Device,
+      }
+    )
+
 class GoogleAdWordsReporter:
   api: GoogleAdWordsAPI
   verbose: bool
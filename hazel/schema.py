@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from .extraction import ExtractionPlan, ValueStep
+from typing import List
+
+micros_suffix = '_micros'
+
+def apply_output_schema(df: pd.DataFrame, plan: ExtractionPlan, descriptor: any, field_paths: List[str], typed: bool=True, convert_micros: bool=False, category_ratio: float=0.5) -> pd.DataFrame:
+  """Converts the columns of a flattened response DataFrame to dtypes derived from their fields"""
+  columns = plan.column_fields(descriptor=descriptor, field_paths=field_paths)
+  delimiter = plan.parameters['delimiter']
+  data = {}
+  for column_name in df.columns:
+    column = df[column_name]
+    if column_name in columns:
+      field, step = columns[column_name]
+      if typed:
+        column = _typed_column(column=column, field=field, step=step, is_id=_is_id_column(column_name=column_name, delimiter=delimiter), category_ratio=category_ratio)
+      if convert_micros and column_name.endswith(micros_suffix) and not isinstance(column.dtype, pd.CategoricalDtype):
+        column = pd.Series(column.to_numpy(dtype=np.float64, na_value=np.nan) / 1000000, index=column.index)
+        column_name = column_name[:-len(micros_suffix)]
+    data[column_name] = column
+  return pd.DataFrame(data, index=df.index)
+
+def concat_data_frames(data_frames: List[pd.DataFrame]) -> pd.DataFrame:
+  """Concatenates DataFrames like pd.concat, keeping categorical columns categorical"""
+  categories = {}
+  other_columns = set()
+  for df in data_frames:
+    for column_name, dtype in df.dtypes.items():
+      if isinstance(dtype, pd.CategoricalDtype):
+        categories.setdefault(column_name, {}).update(dict.fromkeys(dtype.categories))
+      else:
+        other_columns.add(column_name)
+  categories = {c: list(v) for c, v in categories.items() if c not in other_columns}
+  if categories:
+    data_frames = [
+      df.assign(**{c: df[c].cat.set_categories(v) for c, v in categories.items() if c in df})
+      for df in data_frames
+    ]
+  return pd.concat(data_frames, ignore_index=True, sort=False)
+
+def _is_id_column(column_name: str, delimiter: str) -> bool:
+  name = column_name.split(delimiter)[-1]
+  return name == 'id' or name.endswith('_id')
+
+def _typed_column(column: pd.Series, field: any, step: any, is_id: bool, category_ratio: float) -> pd.Series:
+  if not isinstance(step, ValueStep):
+    return column
+  if step.enum_names is not None:
+    categories = [step.enum_names[n] for n in sorted(step.enum_names)]
+    return pd.Series(pd.Categorical(column, categories=list(dict.fromkeys(categories))), index=column.index)
+  if field.cpp_type in (field.CPPTYPE_INT32, field.CPPTYPE_INT64, field.CPPTYPE_UINT32, field.CPPTYPE_UINT64, field.CPPTYPE_ENUM):
+    column = column.astype('Int64')
+    return column.astype(np.int64) if is_id and not column.hasnans else column
+  if field.cpp_type in (field.CPPTYPE_DOUBLE, field.CPPTYPE_FLOAT):
+    return column.astype(np.float64)
+  if field.cpp_type == field.CPPTYPE_BOOL:
+    return column.astype('boolean')
+  if field.cpp_type == field.CPPTYPE_STRING and len(column) and column.nunique() <= len(column) * category_ratio:
+    return column.astype('category')
+  return column
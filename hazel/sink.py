@@ -0,0 +1,172 @@
+import os
+import abc
+import uuid
+import threading
+import pandas as pd
+
+from typing import Dict, List, Tuple, Optional
+
+class ReportSink(abc.ABC):
+  """Writes report DataFrames into files partitioned by customer and date"""
+  directory: str
+  row_group_size: int
+  max_buffered_rows: int
+  date_column: str
+  run_id: str
+  buffers: Dict[Tuple[str, Optional[str]], List[pd.DataFrame]]
+  buffered_rows: Dict[Tuple[str, Optional[str]], int]
+  file_extension = ''
+
+  def __init__(self, directory: str, row_group_size: int=100000, max_buffered_rows: Optional[int]=None, date_column: str='segments#date', run_id: Optional[str]=None):
+    self.directory = directory
+    self.row_group_size = row_group_size
+    self.max_buffered_rows = max_buffered_rows if max_buffered_rows is not None else 4 * row_group_size
+    self.date_column = date_column
+    self.run_id = run_id if run_id is not None else uuid.uuid4().hex
+    self.buffers = {}
+    self.buffered_rows = {}
+    self._lock = threading.RLock()
+
+  def __enter__(self) -> 'ReportSink':
+    return self
+
+  def __exit__(self, exc_type, *args):
+    if exc_type is None:
+      self.close()
+    else:
+      self.abort()
+
+  def partition_path(self, customer_id: str, day: Optional[str], part: int=0) -> str:
+    components = [self.directory, f'customer_id={customer_id}']
+    if day is not None:
+      components.append(f'date={day}')
+    suffix = f'-{part}' if part else ''
+    return os.path.join(*components, f'part-{self.run_id}{suffix}{self.file_extension}')
+
+  def write(self, df: pd.DataFrame, customer_id: str):
+    if df is None or df.empty:
+      return
+    with self._lock:
+      if self.date_column in df:
+        partitions = [(str(d) if not pd.isna(d) else None, f) for d, f in df.groupby(self.date_column, sort=False, observed=True, dropna=False)]
+      else:
+        partitions = [(None, df)]
+      for day, partition_df in partitions:
+        key = (str(customer_id), day)
+        self.buffers.setdefault(key, []).append(partition_df)
+        self.buffered_rows[key] = self.buffered_rows.get(key, 0) + len(partition_df)
+        if self.buffered_rows[key] >= self.row_group_size:
+          self._flush_partition(key=key)
+      total_rows = sum(self.buffered_rows.values())
+      if total_rows >= self.max_buffered_rows:
+        for key in sorted(self.buffered_rows, key=self.buffered_rows.get, reverse=True):
+          if total_rows < self.max_buffered_rows / 2:
+            break
+          total_rows -= self.buffered_rows[key]
+          self._flush_partition(key=key)
+
+  def flush(self, customer_id: Optional[str]=None, close: bool=False):
+    with self._lock:
+      keys = [k for k in list(self.buffers.keys()) + self._open_partitions() if customer_id is None or k[0] == str(customer_id)]
+      for key in dict.fromkeys(keys):
+        if key in self.buffers:
+          self._flush_partition(key=key)
+        if close:
+          self._close_partition(key=key)
+
+  def close(self):
+    self.flush(close=True)
+
+  def abort(self, customer_id: Optional[str]=None):
+    """Closes the files without raising, while unwinding from another error"""
+    with self._lock:
+      keys = [k for k in list(self.buffers.keys()) + self._open_partitions() if customer_id is None or k[0] == str(customer_id)]
+      for key in dict.fromkeys(keys):
+        try:
+          if key in self.buffers:
+            self._flush_partition(key=key)
+        except Exception:
+          self.buffers.pop(key, None)
+          self.buffered_rows.pop(key, None)
+        try:
+          self._close_partition(key=key)
+        except Exception:
+          pass
+
+  def _flush_partition(self, key: Tuple[str, Optional[str]]):
+    df = pd.concat(self.buffers.pop(key), ignore_index=True)
+    self.buffered_rows.pop(key)
+    path = self.partition_path(customer_id=key[0], day=key[1])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    self._write_partition(key=key, path=path, df=df)
+
+  def _open_partitions(self) -> List[Tuple[str, Optional[str]]]:
+    return []
+
+  @abc.abstractmethod
+  def _write_partition(self, key: Tuple[str, Optional[str]], path: str, df: pd.DataFrame):
+    pass
+
+  def _close_partition(self, key: Tuple[str, Optional[str]]):
+    pass
+
+class ParquetSink(ReportSink):
+  writers: Dict[Tuple[str, Optional[str]], any]
+  parts: Dict[Tuple[str, Optional[str]], int]
+  file_extension = '.parquet'
+
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.writers = {}
+    self.parts = {}
+
+  def _write_partition(self, key: Tuple[str, Optional[str]], path: str, df: pd.DataFrame):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    writer = self.writers.get(key)
+    schema = writer.schema if writer is not None else table.schema
+    if writer is not None:
+      fields = [table.schema.field(f.name) if f.type == pa.null() and f.name in table.column_names else f for f in schema]
+      fields += [f for f in table.schema if f.name not in schema.names]
+      if fields != list(schema):
+        schema = pa.schema(fields, metadata=table.schema.metadata)
+        self._close_partition(key=key)
+        writer = None
+    if writer is None:
+      part = self.parts[key] = self.parts.get(key, -1) + 1
+      writer = self.writers[key] = pq.ParquetWriter(self.partition_path(customer_id=key[0], day=key[1], part=part), schema=schema)
+    table = pa.Table.from_arrays(
+      [table.column(f.name).cast(f.type) if f.name in table.column_names else pa.nulls(len(table), type=f.type) for f in schema],
+      schema=schema
+    )
+    writer.write_table(table, row_group_size=self.row_group_size)
+
+  def _open_partitions(self) -> List[Tuple[str, Optional[str]]]:
+    return list(self.writers.keys())
+
+  def _close_partition(self, key: Tuple[str, Optional[str]]):
+    if key in self.writers:
+      self.writers.pop(key).close()
+
+class CsvSink(ReportSink):
+  compression: Optional[str]
+
+  def __init__(self, *args, compression: Optional[str]='gzip', **kwargs):
+    super().__init__(*args, **kwargs)
+    self.compression = compression
+    self.file_extension = '.csv.gz' if compression == 'gzip' else '.csv'
+
+  def _write_partition(self, key: Tuple[str, Optional[str]], path: str, df: pd.DataFrame):
+    df.to_csv(path, mode='a', header=not os.path.exists(path), index=False, compression=self.compression)
+
+class JsonLinesSink(ReportSink):
+  compression: Optional[str]
+
+  def __init__(self, *args, compression: Optional[str]='gzip', **kwargs):
+    super().__init__(*args, **kwargs)
+    self.compression = compression
+    self.file_extension = '.jsonl.gz' if compression == 'gzip' else '.jsonl'
+
+  def _write_partition(self, key: Tuple[str, Optional[str]], path: str, df: pd.DataFrame):
+    df.to_json(path, mode='a', orient='records', lines=True, compression=self.compression)
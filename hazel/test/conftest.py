@@ -0,0 +1,24 @@
+import pytest
+
+from ..api import GoogleAdsAPI
+from ..pool import ClientPool
+from ..ratelimit import RateLimiter
+from google.ads.google_ads.client import GoogleAdsClient
+
+@pytest.fixture
+def offline_api():
+  credentials = {
+    'developer_token': 'DEVELOPER_TOKEN',
+    'client_id': 'CLIENT_ID',
+    'client_secret': 'CLIENT_SECRET',
+    'refresh_token': 'REFRESH_TOKEN',
+  }
+  client_pool = ClientPool()
+  client_pool.clients[ClientPool.client_key(**credentials)] = GoogleAdsClient(credentials=None, developer_token=credentials['developer_token'])
+  api = GoogleAdsAPI(
+    **credentials,
+    client_pool=client_pool,
+    rate_limiter=RateLimiter(),
+    page_retry_backoff=0
+  )
+  yield api
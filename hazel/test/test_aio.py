@@ -0,0 +1,144 @@
+import asyncio
+import grpc
+import pytest
+import pandas as pd
+
+from types import SimpleNamespace
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from ..aio import AsyncGoogleAdsAPI, AsyncGoogleAdsReporter
+from ..reporting import GoogleAdsReporter
+from ..query import GoogleAdsQuery
+from datetime import date
+from google.ads.google_ads.errors import GoogleAdsException
+from google.api_core import exceptions
+
+class FakeStub:
+  def __init__(self, rows: list, page_size: int, errors: Dict[str, List[Exception]]={}):
+    self.rows = rows
+    self.page_size = page_size
+    self.errors = {k: list(v) for k, v in errors.items()}
+    self.page_tokens = []
+
+  async def Search(self, request: any, metadata: list) -> any:
+    self.page_tokens.append(request.page_token)
+    if self.errors.get(request.page_token):
+      raise self.errors[request.page_token].pop(0)
+    start = int(request.page_token or 0)
+    end = start + self.page_size
+    return SimpleNamespace(results=self.rows[start:end], next_page_token=str(end) if end < len(self.rows) else '')
+
+def rpc_error(code: grpc.StatusCode, trailing_metadata: list=[]) -> grpc.aio.AioRpcError:
+  return grpc.aio.AioRpcError(code, grpc.aio.Metadata(), grpc.aio.Metadata(*trailing_metadata), details=code.name)
+
+@pytest.fixture
+def async_api(offline_api, monkeypatch):
+  async_api = AsyncGoogleAdsAPI(api=offline_api)
+  async def get_metadata() -> list:
+    return []
+  monkeypatch.setattr(async_api, '_get_metadata', get_metadata)
+  yield async_api
+
+def test_search_page_retries(async_api, monkeypatch):
+  stub = FakeStub(rows=list(range(10)), page_size=3, errors={'6': [rpc_error(code=grpc.StatusCode.UNAVAILABLE), rpc_error(code=grpc.StatusCode.DEADLINE_EXCEEDED)]})
+  monkeypatch.setattr(async_api, '_get_stub', lambda: stub)
+  assert asyncio.run(async_api.search(customer_id='1', query_text='SELECT campaign.id FROM campaign', use_search_stream=False)) == list(range(10))
+  assert stub.page_tokens == ['', '3', '6', '6', '6', '9']
+
+  stub = FakeStub(rows=list(range(10)), page_size=3, errors={'3': [rpc_error(code=grpc.StatusCode.INVALID_ARGUMENT)]})
+  monkeypatch.setattr(async_api, '_get_stub', lambda: stub)
+  with pytest.raises(exceptions.BadRequest):
+    asyncio.run(async_api.search(customer_id='1', query_text='SELECT campaign.id FROM campaign', use_search_stream=False))
+  assert stub.page_tokens == ['', '3']
+
+def test_reporter_query_data_frames(async_api, monkeypatch):
+  rows = []
+  for campaign_id in range(1, 6):
+    row = async_api.api.client.get_type('GoogleAdsRow', version='v3')
+    row.campaign.id.value = campaign_id
+    row.campaign.name.value = f'Campaign {campaign_id}'
+    rows.append(row)
+  stub = FakeStub(rows=rows, page_size=2)
+  monkeypatch.setattr(async_api, '_get_stub', lambda: stub)
+  reporter = AsyncGoogleAdsReporter(api=async_api, reporter=GoogleAdsReporter(api=async_api.api, use_search_stream=False))
+  query = GoogleAdsQuery(query='SELECT campaign.id, campaign.name FROM campaign')
+
+  async def run() -> tuple:
+    async with async_api:
+      df = await reporter.get_query_data_frame(query=query, customer_id='1', typed_schema=True)
+      stub.page_tokens.clear()
+      data_frames = await reporter.get_fused_query_data_frames(options={'ids': {'query': GoogleAdsQuery(query='SELECT campaign.id FROM campaign')}, 'names': {'query': query}}, customer_id='1')
+      return df, data_frames
+
+  df, data_frames = asyncio.run(run())
+  assert df['campaign#id'].tolist() == list(range(1, 6))
+  assert df['campaign#id'].dtype == 'int64'
+  assert stub.page_tokens == ['', '2', '4']
+  assert list(data_frames['ids'].columns) == ['campaign#id']
+  assert data_frames['names']['campaign#name'].tolist() == [f'Campaign {i}' for i in range(1, 6)]
+
+def test_date_range_shard_retries(async_api, monkeypatch):
+  reporter = AsyncGoogleAdsReporter(api=async_api, reporter=GoogleAdsReporter(api=async_api.api, shard_days=7, shard_retry_backoff=0))
+  errors = {date(2020, 1, 8): [exceptions.ServiceUnavailable('unavailable')], date(2020, 1, 1): []}
+  shard_starts = []
+
+  async def get_query_data_frame(customer_id: str, start_date: date, end_date: date) -> pd.DataFrame:
+    shard_starts.append(start_date)
+    if errors.get(start_date):
+      raise errors[start_date].pop()
+    return pd.DataFrame({'segments#date': [start_date.isoformat(), end_date.isoformat()]})
+
+  monkeypatch.setattr(reporter, 'get_query_data_frame', get_query_data_frame)
+  def options_getter(start_date: date, end_date: date) -> Dict[str, any]:
+    return {'start_date': start_date, 'end_date': end_date}
+
+  df = asyncio.run(reporter.get_date_range_data_frame(options_getter=options_getter, start_date=date(2020, 1, 1), end_date=date(2020, 1, 10), customer_id='1'))
+  assert df['segments#date'].tolist() == ['2020-01-01', '2020-01-07', '2020-01-08', '2020-01-10']
+  assert sorted(shard_starts) == [date(2020, 1, 1), date(2020, 1, 8), date(2020, 1, 8)]
+
+  errors[date(2020, 1, 1)] = [exceptions.BadRequest('bad request')]
+  with pytest.raises(exceptions.BadRequest):
+    asyncio.run(reporter.get_date_range_data_frame(options_getter=options_getter, start_date=date(2020, 1, 1), end_date=date(2020, 1, 10), customer_id='1'))
+
+def test_convert_error(async_api):
+  assert isinstance(async_api._convert_error(error=rpc_error(code=grpc.StatusCode.UNAVAILABLE)), exceptions.ServiceUnavailable)
+  failure = async_api.api.client.get_type('GoogleAdsFailure', version='v3')
+  failure.errors.add().message = 'The caller does not have permission'
+  error = async_api._convert_error(error=rpc_error(code=grpc.StatusCode.PERMISSION_DENIED, trailing_metadata=[
+    ('google.ads.googleads.v3.errors.googleadsfailure-bin', failure.SerializeToString()),
+    ('request-id', 'REQUEST_ID'),
+  ]))
+  assert isinstance(error, GoogleAdsException)
+  assert error.request_id == 'REQUEST_ID'
+  assert str(error.error.code()) == 'StatusCode.PERMISSION_DENIED'
+  assert [e.message for e in error.failure.errors] == ['The caller does not have permission']
+
+def test_close(async_api):
+  async def use() -> dict:
+    return await async_api.run_in_executor(dict, key='value')
+  assert asyncio.run(use()) == {'key': 'value'}
+  executor = async_api.executor
+  asyncio.run(async_api.close())
+  assert async_api.executor is None
+  with pytest.raises(RuntimeError):
+    executor.submit(dict)
+  assert asyncio.run(use()) == {'key': 'value'}
+  asyncio.run(async_api.close())
+
+  executor = ThreadPoolExecutor(max_workers=1)
+  async_api = AsyncGoogleAdsAPI(api=async_api.api, executor=executor)
+  asyncio.run(async_api.close())
+  assert async_api.executor is executor
+  assert executor.submit(dict).result() == {}
+  executor.shutdown()
+
+def test_channel_loop(async_api):
+  other_loop = asyncio.new_event_loop()
+  async_api._channel, async_api._stub, async_api._loop = SimpleNamespace(), SimpleNamespace(), other_loop
+  with pytest.raises(RuntimeError):
+    asyncio.run(async_api.search(customer_id='1', query_text='SELECT campaign.id FROM campaign', use_search_stream=False))
+  with pytest.raises(RuntimeError):
+    asyncio.run(async_api.close())
+  other_loop.close()
+  asyncio.run(async_api.close())
+  assert async_api._channel is None and async_api._stub is None
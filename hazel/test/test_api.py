@@ -1,9 +1,20 @@
 import unittest
 import code
+import re
+import time
 import pytest
 import pandas as pd
 
+from types import SimpleNamespace
+from typing import Dict, List
+from google.api_core import page_iterator, exceptions
 from ..api import GoogleAdWordsAPI, GoogleAdsAPI
+from ..lookup import LookupCache
+from ..geo import GeoTargetIndex
+from ..ratelimit import RateLimiter
+from ..pool import ClientPool
+from ..credentials import TokenCache
+from ..query import GoogleAdsQuery
 
 @pytest.fixture
 def api():
@@ -17,10 +28,158 @@ def api():
   )
   yield api
 
+@pytest.fixture
+def report_customer_id(api):
+  yield next(c for c in api.get_customers() if api.customer_is_manager(customer_id=c) is False)
+
+class PagedService:
+  def __init__(self, rows: list, page_size: int, errors: Dict[str, List[Exception]]={}):
+    self.rows = rows
+    self.page_size = page_size
+    self.errors = {k: list(v) for k, v in errors.items()}
+    self.page_tokens = []
+
+  def get_page(self, request: any) -> any:
+    self.page_tokens.append(request.page_token)
+    if self.errors.get(request.page_token):
+      raise self.errors[request.page_token].pop(0)
+    start = int(request.page_token or 0)
+    end = start + self.page_size
+    return SimpleNamespace(results=self.rows[start:end], next_page_token=str(end) if end < len(self.rows) else '')
+
+  def search(self, customer_id: str, query: str, page_size: int) -> page_iterator.GRPCIterator:
+    return page_iterator.GRPCIterator(client=None, method=self.get_page, request=SimpleNamespace(page_token=''), items_field='results')
+
+  def search_stream(self, customer_id: str, query: str) -> any:
+    for start in range(0, len(self.rows), self.page_size):
+      yield SimpleNamespace(results=self.rows[start:start + self.page_size])
+
+@pytest.mark.parametrize('prefetch_depth', [0, 2])
+@pytest.mark.parametrize('use_search_stream', [False, True])
+def test_search(offline_api, monkeypatch, prefetch_depth, use_search_stream):
+  service = PagedService(rows=list(range(10)), page_size=3)
+  monkeypatch.setattr(offline_api, 'get_service', lambda name: service)
+  rows = offline_api.search(customer_id='1', query_text='SELECT campaign.id FROM campaign', use_search_stream=use_search_stream, prefetch_depth=prefetch_depth)
+  assert list(rows) == list(range(10))
+  assert service.page_tokens == ([] if use_search_stream else ['', '3', '6', '9'])
+
+def test_search_page_retries(offline_api, monkeypatch):
+  service = PagedService(rows=list(range(10)), page_size=3, errors={'6': [exceptions.ServiceUnavailable('unavailable'), exceptions.DeadlineExceeded('deadline exceeded')]})
+  monkeypatch.setattr(offline_api, 'get_service', lambda name: service)
+  assert list(offline_api.search(customer_id='1', query_text='SELECT campaign.id FROM campaign', prefetch_depth=0)) == list(range(10))
+  assert service.page_tokens == ['', '3', '6', '6', '6', '9']
+
+  offline_api.page_retries = 1
+  service = PagedService(rows=list(range(10)), page_size=3, errors={'3': [exceptions.ServiceUnavailable('unavailable')] * 2})
+  monkeypatch.setattr(offline_api, 'get_service', lambda name: service)
+  with pytest.raises(exceptions.ServiceUnavailable):
+    list(offline_api.search(customer_id='1', query_text='SELECT campaign.id FROM campaign', prefetch_depth=0))
+  assert service.page_tokens == ['', '3', '3']
+
+  service = PagedService(rows=list(range(10)), page_size=3, errors={'3': [exceptions.BadRequest('bad request')]})
+  monkeypatch.setattr(offline_api, 'get_service', lambda name: service)
+  with pytest.raises(exceptions.BadRequest):
+    list(offline_api.search(customer_id='1', query_text='SELECT campaign.id FROM campaign', prefetch_depth=0))
+  assert service.page_tokens == ['', '3']
+
+def test_lookup_resources(offline_api, monkeypatch):
+  queried_resource_names = []
+  def search_rows(customer_id: str, query_text: str) -> list:
+    resource_names = re.findall(r"'(customers/[^']*)'", query_text)
+    queried_resource_names.append(resource_names)
+    rows = []
+    for resource_name in resource_names:
+      if resource_name.endswith('/9'):
+        continue
+      row = offline_api.client.get_type('GoogleAdsRow', version='v3')
+      row.campaign.resource_name = resource_name
+      row.campaign.name.value = f'Campaign {resource_name[-1]}'
+      rows.append(row)
+    return rows
+
+  monkeypatch.setattr(offline_api, '_search_rows', search_rows)
+  def query_getter(campaigns: List[str]) -> GoogleAdsQuery:
+    return GoogleAdsQuery(query='SELECT campaign.resource_name, campaign.name FROM campaign WHERE campaign.resource_name IN {campaigns}', parameters={'campaigns': campaigns})
+  def lookup(campaigns: List[str], **flatten_options) -> pd.DataFrame:
+    return offline_api.lookup_resources(customer_id='1', query_getter=query_getter, resource_names=[f'customers/1/campaigns/{c}' for c in campaigns], **flatten_options)
+
+  df = lookup(campaigns=[2, 1, 9], key_column='campaign#resource_name', exclude_keys=[])
+  assert df.to_dict(orient='records') == [
+    {'campaign#resource_name': 'customers/1/campaigns/2', 'campaign#name': 'Campaign 2'},
+    {'campaign#resource_name': 'customers/1/campaigns/1', 'campaign#name': 'Campaign 1'},
+  ]
+  assert queried_resource_names == [['customers/1/campaigns/2', 'customers/1/campaigns/1', 'customers/1/campaigns/9']]
+  assert lookup(campaigns=[1, 9, 3], key_column='campaign#resource_name', exclude_keys=[])['campaign#name'].tolist() == ['Campaign 1', 'Campaign 3']
+  assert queried_resource_names[1:] == [['customers/1/campaigns/3']]
+  df = lookup(campaigns=[1], key_column='campaign_resource_name', exclude_keys=[], delimiter='_')
+  assert df.to_dict(orient='records') == [{'campaign_resource_name': 'customers/1/campaigns/1', 'campaign_name': 'Campaign 1'}]
+  assert queried_resource_names[2:] == [['customers/1/campaigns/1']]
+  assert len(offline_api.lookup_cache) == 5
+
 def test_get_customers(api):
   customers = api.get_customers()
   assert type(customers) is list
 
+def test_get_customers_rate_limited(api):
+  api.rate_limiter = RateLimiter(rate=1, burst=1, customer_rate=1)
+  customers = api.get_customers()
+  start = time.monotonic()
+  assert api.get_customers() == customers
+  assert time.monotonic() - start >= 0.9
+  assert api.rate_limiter.quota_error_count == 0
+
+def test_client_pool(api):
+  other_api = GoogleAdsAPI(
+    developer_token='DEVELOPER_TOKEN',
+    client_id='CLIENT_ID',
+    client_secret='CLIENT_SECRET',
+    refresh_token='REFRESH_TOKEN',
+    login_customer_id='LOGIN_CUSTOMER_ID'
+  )
+  assert other_api.client is api.client
+  assert other_api.get_service(name='GoogleAdsService') is api.get_service(name='GoogleAdsService')
+  assert other_api.get_customers() == api.get_customers()
+  separate_api = GoogleAdsAPI(
+    developer_token='DEVELOPER_TOKEN',
+    client_id='CLIENT_ID',
+    client_secret='CLIENT_SECRET',
+    refresh_token='REFRESH_TOKEN',
+    login_customer_id='LOGIN_CUSTOMER_ID',
+    client_pool=ClientPool()
+  )
+  assert separate_api.client is not api.client
+
+def test_token_cache(tmp_path):
+  token_cache = TokenCache(path=str(tmp_path / 'tokens.json'))
+  apis = [
+    GoogleAdsAPI(
+      developer_token='DEVELOPER_TOKEN',
+      client_id='CLIENT_ID',
+      client_secret='CLIENT_SECRET',
+      refresh_token='REFRESH_TOKEN',
+      login_customer_id='LOGIN_CUSTOMER_ID',
+      client_pool=ClientPool(),
+      token_cache=token_cache
+    )
+    for _ in range(2)
+  ]
+  customers = apis[0].get_customers()
+  assert apis[1].get_customers() == customers
+  assert apis[1].client.credentials.token == apis[0].client.credentials.token
+  assert (tmp_path / 'tokens.json').exists()
+
+def test_get_customer_clients(api):
+  customer_clients = api.get_customer_clients()
+  assert sorted(customer_clients.keys()) == api.get_customers()
+  for customer_id, client in customer_clients.items():
+    if client['manager'] is not None:
+      assert api.customer_is_manager(customer_id=customer_id) == client['manager']
+
+def test_get_customer_hierarchy(api):
+  hierarchy = api.get_customer_hierarchy()
+  assert list(hierarchy.keys()) == [api.customer_id]
+  assert hierarchy == api.get_customer_hierarchy(max_workers=1)
+
 def test_campaign_targeting_info(api):
   customer_ids = api.get_customers()
   target_info_dicts = []
@@ -37,6 +196,42 @@ def test_campaign_targeting_info(api):
   assert target_info_dicts
   import pdb; pdb.set_trace()
 
+def test_campaign_targeting_info_geo_target_cache(api, report_customer_id, tmp_path, monkeypatch):
+  api.geo_target_cache = LookupCache(ttl=None, path=str(tmp_path / 'geo_targets.json'))
+  customer_id = report_customer_id
+  geo_target_queries = []
+  search_rows = api._search_rows
+  def counting_search_rows(customer_id: str, query_text: str):
+    if 'geo_target_constant.country_code' in query_text:
+      geo_target_queries.append(query_text)
+    return search_rows(customer_id=customer_id, query_text=query_text)
+  monkeypatch.setattr(api, '_search_rows', counting_search_rows)
+
+  target_info = api.get_campaign_target_info(customer_id=customer_id)
+  records = dict(api.geo_target_cache.records)
+  assert bool(geo_target_queries) == bool(records)
+  for key, (_, record) in records.items():
+    assert record is None or (record['geo_target_constant_resource_name'] == key.split(':', 1)[1] and 'geo_target_constant_country_code' in record)
+  geo_target_queries.clear()
+  api.geo_target_cache = LookupCache(ttl=None, path=str(tmp_path / 'geo_targets.json'))
+  assert dict(api.geo_target_cache.records) == records
+  assert api.get_campaign_target_info(customer_id=customer_id) == target_info
+  assert not geo_target_queries
+
+def test_campaign_targeting_info_geo_target_index(api, report_customer_id, tmp_path):
+  customer_id = report_customer_id
+  target_info = api.get_campaign_target_info(customer_id=customer_id)
+  geo_targets_df = pd.DataFrame(list(api.geo_target_cache.get(keys=list(api.geo_target_cache.records.keys()))[0].values()))
+  pd.DataFrame({
+    'Criteria ID': geo_targets_df.geo_target_constant_resource_name.str.split('/').str[-1].astype(int),
+    'Country Code': geo_targets_df.geo_target_constant_country_code,
+  }).to_csv(tmp_path / 'geo_targets.csv', index=False)
+  api.geo_target_index = GeoTargetIndex(directory=str(tmp_path / 'geo_targets'))
+  api.geo_target_index.refresh(csv_path=str(tmp_path / 'geo_targets.csv'))
+  api.geo_target_cache.clear()
+  assert api.get_campaign_target_info(customer_id=customer_id) == target_info
+  assert not len(api.geo_target_cache)
+
 def test_pause_campaign(api):
   response = api.pause_campaign(campaign_id='CAMPAIGN_ID')
   assert response
@@ -0,0 +1,44 @@
+import pytest
+import pandas as pd
+
+from ..columnar import ColumnarBuilder
+
+records = [
+  {'id': 1, 'name': 'a', 'cost': 1.5},
+  {'id': 2, 'name': 'b', 'cost': 2.5},
+  {'id': 3, 'name': None},
+  {'id': 4, 'urls': ['x', 'y']},
+  {'name': 'e', 'cost': 3},
+  {'id': 6, 'name': 'f', 'cost': 4.5},
+  {'id': 7, 'name': 'g', 'cost': 5.5},
+]
+
+@pytest.mark.parametrize('compact_interval', [1, 2, 3, 10000])
+def test_to_data_frame(compact_interval):
+  builder = ColumnarBuilder(compact_interval=compact_interval)
+  for record in records:
+    builder.append(record)
+  assert len(builder) == len(records)
+  pd.testing.assert_frame_equal(builder.to_data_frame(), pd.DataFrame(records))
+  assert not len(builder)
+
+def test_to_data_frame_dtypes():
+  builder = ColumnarBuilder(compact_interval=2)
+  for record in records:
+    builder.append(record)
+  df = builder.to_data_frame(dtypes={'id': 'Int64', 'cost': 'float64', 'missing': object})
+  assert list(df.columns) == ['id', 'cost', 'missing']
+  assert df['id'].tolist() == [1, 2, 3, 4, pd.NA, 6, 7]
+  assert str(df['id'].dtype) == 'Int64'
+  assert df['cost'].dtype == 'float64'
+  assert df['missing'].isna().all()
+
+def test_to_arrow_table():
+  pa = pytest.importorskip('pyarrow')
+  builder = ColumnarBuilder(compact_interval=3)
+  for record in records:
+    builder.append(record)
+  table = builder.to_arrow_table(types={'id': pa.int64(), 'name': pa.string(), 'urls': None})
+  assert table.column_names == ['id', 'name', 'urls']
+  assert table.column('id').to_pylist() == [1, 2, 3, 4, None, 6, 7]
+  assert table.column('urls').to_pylist() == [None, None, None, ['x', 'y'], None, None, None]
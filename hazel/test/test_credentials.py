@@ -0,0 +1,67 @@
+import os
+import json
+import stat
+import pytest
+import google.oauth2.credentials
+
+from ..credentials import TokenCache, CachedCredentials
+from datetime import datetime, timedelta
+
+@pytest.fixture
+def token_cache(tmp_path):
+  yield TokenCache(path=str(tmp_path / 'tokens' / 'oauth_tokens.json'), refresh_margin=300)
+
+def refresher(credentials: google.oauth2.credentials.Credentials, refreshed_tokens: list, expires_in: timedelta=timedelta(hours=1)):
+  def refresh():
+    refreshed_tokens.append(f'TOKEN_{len(refreshed_tokens) + 1}')
+    credentials.token = refreshed_tokens[-1]
+    credentials.expiry = datetime.utcnow() + expires_in
+  return refresh
+
+def test_token_cache(token_cache):
+  refreshed_tokens = []
+  credentials = token_cache.credentials(client_id='CLIENT_ID', client_secret='CLIENT_SECRET', refresh_token='REFRESH_TOKEN')
+  assert isinstance(credentials, CachedCredentials) and credentials.token_cache is token_cache
+  token_cache.refresh(credentials=credentials, refresh=refresher(credentials=credentials, refreshed_tokens=refreshed_tokens))
+  assert credentials.token == 'TOKEN_1'
+  assert credentials.expiry < datetime.utcnow() + timedelta(seconds=3300)
+  assert stat.S_IMODE(os.stat(token_cache.path).st_mode) == 0o600
+
+  other_credentials = TokenCache(path=token_cache.path).credentials(client_id='CLIENT_ID', client_secret='CLIENT_SECRET', refresh_token='REFRESH_TOKEN')
+  other_credentials.token_cache.refresh(credentials=other_credentials, refresh=refresher(credentials=other_credentials, refreshed_tokens=refreshed_tokens))
+  assert other_credentials.token == 'TOKEN_1'
+  assert refreshed_tokens == ['TOKEN_1']
+
+  token_cache.refresh(credentials=credentials, refresh=refresher(credentials=credentials, refreshed_tokens=refreshed_tokens))
+  assert credentials.token == 'TOKEN_2'
+  other_credentials = token_cache.credentials(client_id='OTHER_CLIENT_ID', client_secret='CLIENT_SECRET', refresh_token='REFRESH_TOKEN')
+  token_cache.refresh(credentials=other_credentials, refresh=refresher(credentials=other_credentials, refreshed_tokens=refreshed_tokens))
+  assert other_credentials.token == 'TOKEN_3'
+  with open(token_cache.path) as f:
+    assert sorted(e['token'] for e in json.load(f).values()) == ['TOKEN_2', 'TOKEN_3']
+
+def test_token_cache_expiry(token_cache):
+  refreshed_tokens = []
+  credentials = token_cache.credentials(client_id='CLIENT_ID', client_secret='CLIENT_SECRET', refresh_token='REFRESH_TOKEN')
+  token_cache.refresh(credentials=credentials, refresh=refresher(credentials=credentials, refreshed_tokens=refreshed_tokens, expires_in=timedelta(seconds=200)))
+  other_credentials = token_cache.credentials(client_id='CLIENT_ID', client_secret='CLIENT_SECRET', refresh_token='REFRESH_TOKEN')
+  token_cache.refresh(credentials=other_credentials, refresh=refresher(credentials=other_credentials, refreshed_tokens=refreshed_tokens))
+  assert other_credentials.token == 'TOKEN_2'
+
+  with open(token_cache.path, 'w') as f:
+    f.write('{')
+  token_cache.refresh(credentials=credentials, refresh=refresher(credentials=credentials, refreshed_tokens=refreshed_tokens))
+  assert credentials.token == 'TOKEN_3'
+
+def test_cached_credentials_refresh(token_cache, monkeypatch):
+  refreshed_tokens = []
+  def refresh(self, request: any):
+    refresher(credentials=self, refreshed_tokens=refreshed_tokens)()
+  monkeypatch.setattr(google.oauth2.credentials.Credentials, 'refresh', refresh)
+  credentials = token_cache.credentials(client_id='CLIENT_ID', client_secret='CLIENT_SECRET', refresh_token='REFRESH_TOKEN')
+  credentials.refresh(request=None)
+  token_cache.credentials(client_id='CLIENT_ID', client_secret='CLIENT_SECRET', refresh_token='REFRESH_TOKEN').refresh(request=None)
+  assert refreshed_tokens == ['TOKEN_1']
+  uncached_credentials = CachedCredentials(None, client_id='CLIENT_ID', client_secret='CLIENT_SECRET', refresh_token='REFRESH_TOKEN')
+  uncached_credentials.refresh(request=None)
+  assert uncached_credentials.token == 'TOKEN_2'
@@ -0,0 +1,63 @@
+import json
+import pytest
+
+from ..extraction import ExtractionPlan
+from google.ads.google_ads.client import GoogleAdsClient
+
+@pytest.fixture
+def row():
+  client = GoogleAdsClient(credentials=None, developer_token='DEVELOPER_TOKEN')
+  row = client.get_type('GoogleAdsRow', version='v3')
+  row.campaign.resource_name = 'customers/1/campaigns/2'
+  row.campaign.id.value = 2
+  row.campaign.name.value = 'Campaign'
+  row.segments.date.value = '2020-01-01'
+  row.segments.device = 2
+  row.metrics.cost_micros.value = 1500000
+  row.ad_group_ad.ad.final_urls.add().value = 'https://example.com'
+  yield row
+
+def test_flatten(row):
+  plan = ExtractionPlan.for_options(exclude_keys=['resource_name'], exclude_prefixes=['value'])
+  assert plan.flatten(row) == {
+    'campaign#id': 2,
+    'campaign#name': 'Campaign',
+    'segments#date': '2020-01-01',
+    'segments#device': 2,
+    'metrics#cost_micros': 1500000,
+    'ad_group_ad#ad#final_urls': json.dumps(['https://example.com']),
+  }
+
+def test_flatten_options(row):
+  plan = ExtractionPlan.for_options(
+    exclude_keys=['ad_group_ad'],
+    exclude_prefixes=['value'],
+    delimiter='_',
+    json_encode_repeated=False,
+    path_overrides={'segments': {'exclude_keys': ['date']}},
+    substitute_enum_names=True
+  )
+  record = plan.flatten(row)
+  assert record == {
+    'campaign_resource_name': 'customers/1/campaigns/2',
+    'campaign_id': 2,
+    'campaign_name': 'Campaign',
+    'segments_device': 'MOBILE',
+    'metrics_cost_micros': 1500000,
+  }
+  assert plan.flatten(row) == record
+
+def test_flatten_max_depth(row):
+  plan = ExtractionPlan.for_options(exclude_keys=['resource_name', 'ad_group_ad', 'metrics', 'segments'], exclude_prefixes=['value'], max_depth=1)
+  assert plan.flatten(row) == {'campaign': json.dumps({'id': 2, 'name': 'Campaign'})}
+
+def test_column_dtypes(row):
+  plan = ExtractionPlan.for_options(exclude_keys=['resource_name'], exclude_prefixes=['value'])
+  dtypes = plan.column_dtypes(descriptor=row.DESCRIPTOR, field_paths=['campaign.id', 'campaign.name', 'segments.device', 'metrics.cost_micros', 'ad_group_ad.ad.final_urls'])
+  assert dtypes == {
+    'campaign#id': 'Int64',
+    'campaign#name': object,
+    'segments#device': 'Int64',
+    'metrics#cost_micros': 'Int64',
+    'ad_group_ad#ad#final_urls': object,
+  }
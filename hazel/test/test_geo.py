@@ -0,0 +1,32 @@
+import pytest
+import pandas as pd
+
+from ..geo import GeoTargetIndex
+
+@pytest.fixture
+def geo_target_index(tmp_path):
+  pd.DataFrame({
+    'Criteria ID': [2840, 1023191, 2276, 2840, 9000],
+    'Name': ['United States', 'New York', 'Germany', 'United States', 'Nowhere'],
+    'Country Code': ['US', 'US', 'DE', 'US', ''],
+  }).to_csv(tmp_path / 'geo_targets.csv', index=False)
+  geo_target_index = GeoTargetIndex(directory=str(tmp_path / 'geo_targets'))
+  assert not geo_target_index.exists
+  geo_target_index.refresh(csv_path=str(tmp_path / 'geo_targets.csv'))
+  yield geo_target_index
+
+def test_country_codes(geo_target_index):
+  assert geo_target_index.exists
+  assert len(geo_target_index) == 4
+  resource_names = pd.Series(['geoTargetConstants/2276', 'geoTargetConstants/1023191', 'geoTargetConstants/1', 'geoTargetConstants/9000', 'geoTargetConstants/99999', 'invalid', None], index=range(10, 17))
+  country_codes = geo_target_index.country_codes(resource_names=resource_names)
+  assert country_codes.index.tolist() == list(range(10, 17))
+  assert country_codes.tolist() == ['DE', 'US', None, None, None, None, None]
+
+def test_refresh(geo_target_index, tmp_path):
+  assert geo_target_index.country_codes(resource_names=pd.Series(['geoTargetConstants/2276'])).tolist() == ['DE']
+  pd.DataFrame({'Criteria ID': [2276], 'Country Code': ['AT']}).to_csv(tmp_path / 'geo_targets.csv', index=False)
+  geo_target_index.refresh(csv_path=str(tmp_path / 'geo_targets.csv'))
+  assert len(geo_target_index) == 1
+  assert geo_target_index.country_codes(resource_names=pd.Series(['geoTargetConstants/2276', 'geoTargetConstants/2840'])).tolist() == ['AT', None]
+  assert GeoTargetIndex(directory=geo_target_index.directory).country_codes(resource_names=pd.Series(['geoTargetConstants/2276'])).tolist() == ['AT']
@@ -0,0 +1,45 @@
+import pytest
+
+from types import SimpleNamespace
+from ..pool import ClientPool
+from google.ads.google_ads.client import GoogleAdsClient
+
+credentials = {
+  'developer_token': 'DEVELOPER_TOKEN',
+  'client_id': 'CLIENT_ID',
+  'client_secret': 'CLIENT_SECRET',
+  'refresh_token': 'REFRESH_TOKEN',
+}
+
+def test_client_pool(monkeypatch):
+  loaded_configs = []
+  def load_from_string(cls, yaml_str: str) -> GoogleAdsClient:
+    loaded_configs.append(yaml_str)
+    return cls(credentials=None, developer_token=credentials['developer_token'])
+  monkeypatch.setattr(GoogleAdsClient, 'load_from_string', classmethod(load_from_string))
+  created_services = []
+  def get_service(self, name: str, version: str='v3', interceptors=None) -> any:
+    created_services.append((self, name, version))
+    return SimpleNamespace(name=name, version=version)
+  monkeypatch.setattr(GoogleAdsClient, 'get_service', get_service)
+
+  pool = ClientPool()
+  client = pool.get_client(**credentials)
+  assert pool.get_client(**credentials) is client
+  login_client = pool.get_client(**credentials, login_customer_id='1')
+  assert login_client is not client
+  key = ClientPool.client_key(**credentials)
+  login_key = ClientPool.client_key(**credentials, login_customer_id='1')
+  assert key != login_key
+  assert pool.clients == {key: client, login_key: login_client}
+  assert len(loaded_configs) == 2 and 'login_customer_id: 1' in loaded_configs[1]
+
+  service = pool.get_service(client_key=key, name='GoogleAdsService', version='v3')
+  assert pool.get_service(client_key=key, name='GoogleAdsService', version='v3') is service
+  assert pool.get_service(client_key=login_key, name='GoogleAdsService', version='v3') is not service
+  assert pool.get_service(client_key=key, name='CampaignService', version='v3') is not service
+  assert created_services == [(client, 'GoogleAdsService', 'v3'), (login_client, 'GoogleAdsService', 'v3'), (client, 'CampaignService', 'v3')]
+
+  pool.clear()
+  assert not pool.clients and not pool.services
+  assert pool.get_client(**credentials) is not client
@@ -0,0 +1,35 @@
+import pytest
+
+from ..query import GoogleAdsQuery
+from datetime import date
+
+def test_chunked():
+  query = GoogleAdsQuery(
+    query='SELECT campaign.id FROM campaign WHERE campaign.id IN {campaign_ids} AND segments.date = {day}',
+    parameters={'campaign_ids': [1, 2, 2, 3, 4, 1, 5], 'day': date(2020, 1, 1)}
+  )
+  queries = query.chunked(max_list_size=2)
+  assert [q.parameters['campaign_ids'] for q in queries] == [[1, 2], [3, 4], [5]]
+  assert all(q.parameters['day'] == date(2020, 1, 1) for q in queries)
+  assert queries[0].query_text == "SELECT campaign.id FROM campaign WHERE campaign.id IN ( '1', '2' ) AND segments.date = '2020-01-01'"
+  assert [q.parameters for q in query.chunked(max_list_size=7)] == [query.parameters]
+
+def test_chunked_combinations():
+  query = GoogleAdsQuery(
+    query='SELECT ad_group.id FROM ad_group WHERE campaign.id IN {campaign_ids} AND ad_group.id in {ad_group_ids}',
+    parameters={'campaign_ids': [1, 2, 3], 'ad_group_ids': [4, 5]}
+  )
+  queries = query.chunked(max_list_size=2)
+  assert [(q.parameters['campaign_ids'], q.parameters['ad_group_ids']) for q in queries] == [([1, 2], [4, 5]), ([3], [4, 5])]
+  queries = query.chunked(max_list_size=1)
+  assert len(queries) == 6
+
+@pytest.mark.parametrize('condition', ['NOT IN {campaign_ids}', 'not  in {campaign_ids}', '!= {campaign_ids}', 'IN {campaign_ids} OR campaign.id NOT IN {campaign_ids}'])
+def test_chunked_rejects_other_conditions(condition):
+  query = GoogleAdsQuery(
+    query=f'SELECT campaign.id FROM campaign WHERE campaign.id {condition}',
+    parameters={'campaign_ids': [1, 2, 3]}
+  )
+  with pytest.raises(ValueError):
+    query.chunked(max_list_size=2)
+  assert len(query.chunked(max_list_size=3)) == 1
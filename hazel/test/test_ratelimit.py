@@ -0,0 +1,84 @@
+import pytest
+
+from ..ratelimit import TokenBucket, RateLimiter
+from google.api_core import exceptions
+
+class FakeClock:
+  def __init__(self):
+    self.now = 100.0
+    self.sleeps = []
+
+  def __call__(self) -> float:
+    return self.now
+
+  def sleep(self, seconds: float):
+    self.sleeps.append(seconds)
+    self.now += seconds
+
+@pytest.fixture
+def clock():
+  yield FakeClock()
+
+def test_token_bucket(clock):
+  bucket = TokenBucket(rate=2, burst=2, clock=clock, sleep=clock.sleep)
+  assert [bucket.acquire() for _ in range(2)] == [0, 0]
+  assert bucket.try_acquire() == pytest.approx(0.5)
+  assert bucket.acquire() == pytest.approx(0.5)
+  clock.now += 10
+  assert [bucket.acquire() for _ in range(3)] == [0, 0, pytest.approx(0.5)]
+  bucket.set_rate(None)
+  assert [bucket.acquire() for _ in range(100)] == [0] * 100
+  assert clock.sleeps == [pytest.approx(0.5)] * 2
+
+def test_rate_limiter_aimd(clock):
+  limiter = RateLimiter(rate=10, burst=1, min_rate=1, max_backoff=60, clock=clock, sleep=clock.sleep)
+  assert limiter.failed(error=exceptions.ResourceExhausted('quota')) is True
+  assert limiter.current_rate == 5
+  assert limiter.paused_until == pytest.approx(clock.now + 0.2)
+  assert limiter.failed(error=exceptions.ResourceExhausted('quota')) is True
+  assert limiter.current_rate == 5
+  assert limiter.paused_until == pytest.approx(clock.now + 0.4)
+  assert limiter.failed(error=exceptions.BadRequest('bad request')) is False
+  assert limiter.acquire() == pytest.approx(0.4)
+  limiter.succeeded()
+  assert limiter.current_rate == pytest.approx(5.2)
+  assert limiter.consecutive_quota_errors == 0
+  for _ in range(100):
+    limiter.succeeded()
+  assert limiter.current_rate == 10
+  assert limiter.quota_error_count == 2
+
+def test_rate_limiter_observed_rate(clock):
+  limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+  for _ in range(20):
+    assert limiter.acquire() == 0
+    clock.now += 0.25
+  limiter.failed(error=exceptions.ResourceExhausted('quota'))
+  assert limiter.current_rate == pytest.approx(20 / 5 * 0.5)
+
+def test_rate_limiter_call(clock):
+  limiter = RateLimiter(rate=4, burst=1, customer_rate=1, clock=clock, sleep=clock.sleep)
+  errors = [exceptions.ResourceExhausted('quota')]
+  def function() -> str:
+    if errors:
+      raise errors.pop()
+    return 'result'
+  assert limiter.call(function=function, customer_id='1') == 'result'
+  assert clock.sleeps == [pytest.approx(0.5), pytest.approx(0.5)]
+  assert limiter.call(function=lambda: 'other', customer_id='2') == 'other'
+  with pytest.raises(exceptions.ResourceExhausted):
+    limiter.call(function=lambda: (_ for _ in ()).throw(exceptions.ResourceExhausted('quota')), customer_id='2', max_retries=2)
+  assert limiter.quota_error_count == 4
+
+def test_shared(monkeypatch):
+  monkeypatch.setattr(RateLimiter, '_shared', {})
+  monkeypatch.setattr(RateLimiter, '_shared_kwargs', {})
+  limiter = RateLimiter.shared(key='DEVELOPER_TOKEN', rate=10)
+  assert RateLimiter.shared(key='DEVELOPER_TOKEN', rate=10) is limiter
+  assert RateLimiter.shared(key='OTHER_DEVELOPER_TOKEN') is not limiter
+  assert RateLimiter.shared(key='DEVELOPER_TOKEN') is limiter
+  assert RateLimiter.shared(key='DEVELOPER_TOKEN', burst=None) is limiter
+  with pytest.raises(ValueError):
+    RateLimiter.shared(key='DEVELOPER_TOKEN', rate=20)
+  with pytest.raises(ValueError):
+    RateLimiter.shared(key='DEVELOPER_TOKEN', burst=5)
@@ -1,13 +1,21 @@
 import unittest
 import os
+import asyncio
 import code
 import pytest
 import pandas as pd
 
+from types import SimpleNamespace
 from ..api import GoogleAdWordsAPI, GoogleAdsAPI
 from ..reporting import GoogleAdWordsReporter, GoogleAdsReporter
-from datetime import datetime, timedelta
-from typing import Callable, Optional
+from ..aio import AsyncGoogleAdsAPI, AsyncGoogleAdsReporter
+from ..cache import ReportCache
+from ..query import GoogleAdsQuery
+from ..sink import ParquetSink, CsvSink
+from datetime import datetime, date, timedelta
+from google.api_core import exceptions
+from google.ads.google_ads.errors import GoogleAdsException
+from typing import Dict, Callable, Optional
 
 @pytest.fixture
 def reporter():
@@ -34,21 +42,112 @@ def ads_reporter():
   ads_reporter = GoogleAdsReporter(api=api)
   yield ads_reporter
 
+@pytest.fixture
+def offline_ads_reporter(offline_api):
+  ads_reporter = GoogleAdsReporter(api=offline_api, shard_days=7, shard_retry_backoff=0)
+  yield ads_reporter
+
+@pytest.fixture
+def report_customer_id(ads_reporter):
+  yield next(c for c in ads_reporter.api.get_customers() if ads_reporter.api.customer_is_manager(customer_id=c) is False)
+
 def consolidate_reports(ads_reporter: GoogleAdsReporter, report_getter: Callable[[datetime, datetime, Optional[str]], pd.DataFrame], start_date: Optional[datetime]=None, end_date: Optional[datetime]=None):
   end = end_date if end_date else datetime.utcnow().date()
   start = start_date if start_date else end - timedelta(days=0)
-  customer_ids = ads_reporter.api.get_customers()
-  df = pd.DataFrame()
-  for customer_id in customer_ids:
-    is_manager = ads_reporter.api.customer_is_manager(customer_id=customer_id)
-    if is_manager is None or is_manager:
-      continue
-    customer_df = report_getter(start_date=start, end_date=end, customer_id=customer_id)
-    if customer_df.empty:
-      continue
-    df = df.append(customer_df)
+  df, errors = ads_reporter.run_for_customers(
+    report=report_getter,
+    start_date=start,
+    end_date=end
+  )
+  assert not errors
   return df
 
+def assert_same_report(df: pd.DataFrame, expected_df: pd.DataFrame, ordered_columns: bool=True):
+  assert len(df) == len(expected_df)
+  if ordered_columns:
+    assert list(df.columns) == list(expected_df.columns)
+  else:
+    assert sorted(df.columns) == sorted(expected_df.columns)
+
+def test_date_range_shard_retries(offline_ads_reporter, monkeypatch):
+  errors = {date(2020, 1, 8): [exceptions.ServiceUnavailable('unavailable')]}
+  shard_starts = []
+
+  def get_query_data_frame(customer_id: str, start_date: date, end_date: date) -> pd.DataFrame:
+    shard_starts.append(start_date)
+    if errors.get(start_date):
+      raise errors[start_date].pop()
+    return pd.DataFrame({'segments#date': [start_date.isoformat(), end_date.isoformat()]})
+
+  monkeypatch.setattr(offline_ads_reporter, 'get_query_data_frame', get_query_data_frame)
+  def options_getter(start_date: date, end_date: date) -> Dict[str, any]:
+    return {'start_date': start_date, 'end_date': end_date}
+
+  df = offline_ads_reporter.get_date_range_data_frame(options_getter=options_getter, start_date=date(2020, 1, 1), end_date=date(2020, 1, 10), customer_id='1')
+  assert df['segments#date'].tolist() == ['2020-01-01', '2020-01-07', '2020-01-08', '2020-01-10']
+  assert sorted(shard_starts) == [date(2020, 1, 1), date(2020, 1, 8), date(2020, 1, 8)]
+
+  errors[date(2020, 1, 1)] = [exceptions.BadRequest('bad request')]
+  shard_starts.clear()
+  with pytest.raises(exceptions.BadRequest):
+    offline_ads_reporter.get_date_range_data_frame(options_getter=options_getter, start_date=date(2020, 1, 1), end_date=date(2020, 1, 10), customer_id='1')
+  assert shard_starts.count(date(2020, 1, 1)) == 1
+
+def test_cached_date_range_days(offline_ads_reporter, monkeypatch, tmp_path):
+  offline_ads_reporter.cache = ReportCache(directory=str(tmp_path), lookback_days=3)
+  fetched_ranges = []
+
+  def get_query_data_frame(customer_id: str, query: GoogleAdsQuery, delimiter: str) -> pd.DataFrame:
+    fetched_ranges.append((query.parameters['start_date'], query.parameters['end_date']))
+    return pd.DataFrame({'segments_date': ['2020-01-01', '2020-01-03'], 'metrics_clicks': [1, 3]})
+
+  monkeypatch.setattr(offline_ads_reporter, 'get_query_data_frame', get_query_data_frame)
+  def options_getter(start_date: date, end_date: date, select: str='segments.date, metrics.clicks') -> Dict[str, any]:
+    return {
+      'query': GoogleAdsQuery(query=f'SELECT {select} FROM campaign WHERE segments.date BETWEEN {{start_date}} AND {{end_date}}', parameters={'start_date': start_date, 'end_date': end_date}),
+      'delimiter': '_',
+    }
+
+  for _ in range(2):
+    df = offline_ads_reporter.get_cached_date_range_data_frame(options_getter=options_getter, start_date=date(2020, 1, 1), end_date=date(2020, 1, 3), customer_id='1')
+    assert df['metrics_clicks'].tolist() == [1, 3]
+  assert fetched_ranges == [(date(2020, 1, 1), date(2020, 1, 3))]
+
+  with pytest.raises(ValueError):
+    offline_ads_reporter.get_cached_date_range_data_frame(options_getter=lambda start_date, end_date: options_getter(start_date=start_date, end_date=end_date, select='metrics.clicks'), start_date=date(2020, 1, 1), end_date=date(2020, 1, 3), customer_id='1')
+
+def test_normalized_ad_report_permission_error(offline_ads_reporter, monkeypatch):
+  def search(query_text: str, customer_id: str) -> list:
+    raise GoogleAdsException(SimpleNamespace(code=lambda: 'StatusCode.PERMISSION_DENIED'), None, None, None)
+
+  monkeypatch.setattr(offline_ads_reporter, 'search', search)
+  data_frames = offline_ads_reporter.get_normalized_ad_report(start_date=date(2020, 1, 1), end_date=date(2020, 1, 2), customer_id='1')
+  assert all(df.empty for df in data_frames)
+  other_data_frames = offline_ads_reporter.get_normalized_ad_report(start_date=date(2020, 1, 1), end_date=date(2020, 1, 2), customer_id='1')
+  assert not any(df is other_df for df, other_df in zip(data_frames, other_data_frames))
+
+def test_write_report_for_customers_errors(offline_ads_reporter, tmp_path):
+  offline_ads_reporter.api.customer_clients = {c: {'manager': c == '3', 'hidden': False, 'level': 1} for c in ['1', '2', '3']}
+
+  class FailingSink(CsvSink):
+    def _write_partition(self, key, path, df):
+      if key[0] == '1':
+        raise OSError('disk full')
+      super()._write_partition(key=key, path=path, df=df)
+
+  def iter_report(customer_id: str, chunk_size: int):
+    yield pd.DataFrame({'customer#id': [customer_id] * chunk_size})
+    if customer_id == '1':
+      raise ValueError('report failed')
+
+  with FailingSink(directory=str(tmp_path), compression=None, run_id='run') as sink:
+    errors = offline_ads_reporter.write_report_for_customers(report=iter_report, sink=sink, chunk_size=2)
+  assert list(errors.keys()) == ['1']
+  assert isinstance(errors['1'], ValueError)
+  assert not os.listdir(tmp_path / 'customer_id=1')
+  assert not os.path.exists(tmp_path / 'customer_id=3')
+  assert pd.read_csv(tmp_path / 'customer_id=2' / 'part-run.csv')['customer#id'].tolist() == [2, 2]
+
 def test_google_ads_ad_reporting(ads_reporter):
   df = consolidate_reports(
     ads_reporter=ads_reporter,
@@ -60,6 +159,106 @@ def test_google_ads_ad_reporting(ads_reporter):
   assert df is not None
   assert not df.empty
 
+def test_google_ads_ad_report_chunks(ads_reporter):
+  end = datetime.utcnow().date()
+  start = end - timedelta(days=6)
+  customer_ids = ads_reporter.api.get_customers()
+  chunks = []
+  for customer_id in customer_ids:
+    is_manager = ads_reporter.api.customer_is_manager(customer_id=customer_id)
+    if is_manager is None or is_manager:
+      continue
+    chunks.extend(ads_reporter.iter_ad_report(start_date=start, end_date=end, customer_id=customer_id, chunk_size=1000))
+
+  print('\n', [len(c) for c in chunks])
+  assert chunks
+  assert all(len(c) <= 1000 for c in chunks)
+  assert all(list(c.columns) == list(chunks[0].columns) for c in chunks)
+  assert all(list(c.dtypes) == list(chunks[0].dtypes) for c in chunks)
+
+def test_google_ads_ad_reporting_search_stream(ads_reporter):
+  df = consolidate_reports(
+    ads_reporter=ads_reporter,
+    report_getter=ads_reporter.get_ad_report
+  )
+  ads_reporter.use_search_stream = True
+  stream_df = consolidate_reports(
+    ads_reporter=ads_reporter,
+    report_getter=ads_reporter.get_ad_report
+  )
+  print('\n', stream_df)
+  assert not stream_df.empty
+  assert_same_report(df=stream_df, expected_df=df)
+
+def test_google_ads_ad_reporting_typed_schema(ads_reporter):
+  df = consolidate_reports(
+    ads_reporter=ads_reporter,
+    report_getter=ads_reporter.get_ad_report
+  )
+  ads_reporter.typed_schema = True
+  ads_reporter.convert_micros = True
+  typed_df = consolidate_reports(
+    ads_reporter=ads_reporter,
+    report_getter=ads_reporter.get_ad_report
+  )
+  print('\n', typed_df.dtypes)
+  assert len(typed_df) == len(df)
+  assert 'metrics#cost' in typed_df and 'metrics#cost_micros' not in typed_df
+  assert typed_df.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+
+def test_google_ads_ad_report_arrow_table(ads_reporter, report_customer_id):
+  end = datetime.utcnow().date()
+  start = end - timedelta(days=6)
+  customer_id = report_customer_id
+  options = ads_reporter._ad_report_options(start_date=start, end_date=end)
+  df = ads_reporter.get_query_data_frame(customer_id=customer_id, **options)
+  table = ads_reporter.get_query_arrow_table(customer_id=customer_id, **options)
+  print('\n', table.schema)
+  assert table.num_rows == len(df)
+  assert set(df.columns) <= set(table.column_names)
+
+def test_google_ads_normalized_ad_reporting(ads_reporter, report_customer_id):
+  end = datetime.utcnow().date()
+  start = end - timedelta(days=6)
+  customer_id = report_customer_id
+  df = ads_reporter.get_ad_report(start_date=start, end_date=end, customer_id=customer_id)
+  dimension_df, fact_df = ads_reporter.get_normalized_ad_report(start_date=start, end_date=end, customer_id=customer_id)
+  print('\n', dimension_df, '\n', fact_df)
+  keys = ['customer#id', 'campaign#id', 'ad_group#id', 'ad_group_ad#ad#id']
+  assert not dimension_df.duplicated(subset=keys).any()
+  merged_df = fact_df.merge(dimension_df, on=keys, how='left')
+  assert len(merged_df) == len(df)
+  assert set(merged_df.columns) == set(df.columns)
+
+def test_google_ads_fused_reporting(ads_reporter, report_customer_id):
+  end = datetime.utcnow().date()
+  start = end - timedelta(days=6)
+  customer_id = report_customer_id
+  reports = ['ad_report', 'ad_conversion_action_report', 'ad_asset_report']
+  fused_dfs = ads_reporter.get_fused_reports(reports=reports, start_date=start, end_date=end, customer_id=customer_id)
+  for report in reports:
+    df = getattr(ads_reporter, f'get_{report}')(start_date=start, end_date=end, customer_id=customer_id)
+    print('\n', report, '\n', fused_dfs[report])
+    assert_same_report(df=fused_dfs[report], expected_df=df)
+
+def test_google_ads_async_reporting(ads_reporter):
+  end = datetime.utcnow().date()
+  start = end - timedelta(days=6)
+
+  async def run_reports():
+    async with AsyncGoogleAdsAPI(api=ads_reporter.api) as api:
+      async_reporter = AsyncGoogleAdsReporter(api=api, reporter=ads_reporter)
+      customers = await api.get_customers()
+      df, errors = await async_reporter.run_for_customers(report=async_reporter.get_ad_report, start_date=start, end_date=end)
+      return customers, df, errors
+
+  customers, df, errors = asyncio.run(run_reports())
+  assert customers == ads_reporter.api.get_customers()
+  assert not errors
+  sync_df = consolidate_reports(ads_reporter=ads_reporter, report_getter=ads_reporter.get_ad_report, start_date=start, end_date=end)
+  print('\n', df)
+  assert_same_report(df=df, expected_df=sync_df)
+
 def test_google_ads_asset_reporting(ads_reporter):
   def run_report(start_date: datetime, end_date: datetime, *args, **kwargs):
     return ads_reporter.get_asset_report(*args, **kwargs)
@@ -117,6 +316,35 @@ def test_google_ads_campaign_reporting(ads_reporter):
   assert df is not None
   assert not df.empty
 
+def test_google_ads_campaign_reporting_cache(ads_reporter, tmp_path):
+  end = datetime.utcnow().date() - timedelta(days=1)
+  start = end - timedelta(days=13)
+  ads_reporter.cache = ReportCache(directory=str(tmp_path), lookback_days=3)
+  df = consolidate_reports(ads_reporter=ads_reporter, report_getter=ads_reporter.get_campaign_performance_report, start_date=start, end_date=end)
+  cached_df = consolidate_reports(ads_reporter=ads_reporter, report_getter=ads_reporter.get_campaign_performance_report, start_date=start, end_date=end)
+  print('\n', cached_df)
+  assert_same_report(df=cached_df, expected_df=df, ordered_columns=False)
+
+def test_google_ads_campaign_reporting_shards(ads_reporter):
+  end = datetime.utcnow().date()
+  start = end - timedelta(days=13)
+  df = consolidate_reports(ads_reporter=ads_reporter, report_getter=ads_reporter.get_campaign_performance_report, start_date=start, end_date=end)
+  ads_reporter.shard_days = 7
+  sharded_df = consolidate_reports(ads_reporter=ads_reporter, report_getter=ads_reporter.get_campaign_performance_report, start_date=start, end_date=end)
+  print('\n', sharded_df)
+  assert_same_report(df=sharded_df, expected_df=df, ordered_columns=False)
+
+def test_google_ads_campaign_reporting_parquet_sink(ads_reporter, tmp_path):
+  end = datetime.utcnow().date()
+  start = end - timedelta(days=6)
+  df = consolidate_reports(ads_reporter=ads_reporter, report_getter=ads_reporter.get_campaign_performance_report, start_date=start, end_date=end)
+  with ParquetSink(directory=str(tmp_path), row_group_size=1000) as sink:
+    sink_errors = ads_reporter.write_report_for_customers(report=ads_reporter.iter_campaign_performance_report, sink=sink, chunk_size=1000, start_date=start, end_date=end)
+  sink_df = pd.read_parquet(str(tmp_path))
+  print('\n', sink_df)
+  assert not sink_errors
+  assert len(sink_df) == len(df)
+
 def test_google_ads_ad_group_reporting(ads_reporter):
   end = datetime.utcnow().date()
   start = end - timedelta(days=6)
@@ -0,0 +1,49 @@
+import pytest
+import pandas as pd
+
+from ..extraction import ExtractionPlan
+from ..schema import apply_output_schema, concat_data_frames
+from google.ads.google_ads.client import GoogleAdsClient
+
+def test_apply_output_schema():
+  client = GoogleAdsClient(credentials=None, developer_token='DEVELOPER_TOKEN')
+  rows = []
+  for campaign_id, name, device, cost_micros in [(1, 'a', 2, 1500000), (2, 'a', 4, None), (3, 'b', 2, 500000), (4, 'a', 2, 0)]:
+    row = client.get_type('GoogleAdsRow', version='v3')
+    row.campaign.id.value = campaign_id
+    row.campaign.name.value = name
+    row.segments.device = device
+    if cost_micros is not None:
+      row.metrics.cost_micros.value = cost_micros
+    rows.append(row)
+  plan = ExtractionPlan.for_options(exclude_keys=['resource_name'], exclude_prefixes=['value'], substitute_enum_names=True)
+  df = pd.DataFrame([plan.flatten(r) for r in rows])
+  typed_df = apply_output_schema(df=df, plan=plan, descriptor=rows[0].DESCRIPTOR, field_paths=['campaign.id', 'campaign.name', 'segments.device', 'metrics.cost_micros'], convert_micros=True)
+  assert typed_df['campaign#id'].dtype == 'int64'
+  assert isinstance(typed_df['campaign#name'].dtype, pd.CategoricalDtype)
+  assert isinstance(typed_df['segments#device'].dtype, pd.CategoricalDtype)
+  assert typed_df['segments#device'].tolist() == ['MOBILE', 'DESKTOP', 'MOBILE', 'MOBILE']
+  assert 'metrics#cost_micros' not in typed_df
+  assert typed_df['metrics#cost'].tolist()[::2] == [1.5, 0.5]
+  assert pd.isna(typed_df['metrics#cost'][1])
+
+def test_concat_data_frames():
+  data_frames = [
+    pd.DataFrame({'customer#id': [1, 1], 'campaign#name': pd.Categorical(['a', 'b']), 'campaign#id': [1, 2]}),
+    pd.DataFrame({'customer#id': [2], 'campaign#id': [3]}),
+    pd.DataFrame({'customer#id': [3, 3], 'campaign#name': pd.Categorical(['c', 'a']), 'campaign#id': [4, 5]}),
+  ]
+  df = concat_data_frames(data_frames=data_frames)
+  assert list(df.columns) == ['customer#id', 'campaign#name', 'campaign#id']
+  assert isinstance(df['campaign#name'].dtype, pd.CategoricalDtype)
+  assert list(df['campaign#name'].cat.categories) == ['a', 'b', 'c']
+  assert df['campaign#name'].astype(object).where(df['campaign#name'].notna(), None).tolist() == ['a', 'b', None, 'c', 'a']
+  assert df['campaign#id'].tolist() == [1, 2, 3, 4, 5]
+
+def test_concat_data_frames_mixed_dtypes():
+  data_frames = [
+    pd.DataFrame({'campaign#name': pd.Categorical(['a'])}),
+    pd.DataFrame({'campaign#name': ['b']}),
+  ]
+  df = concat_data_frames(data_frames=data_frames)
+  assert df['campaign#name'].tolist() == ['a', 'b']
@@ -0,0 +1,58 @@
+import os
+import pytest
+import pandas as pd
+
+from ..sink import ReportSink, ParquetSink, CsvSink
+
+def test_report_sink_is_abstract(tmp_path):
+  with pytest.raises(TypeError):
+    ReportSink(directory=str(tmp_path))
+
+def test_csv_sink_partitions(tmp_path):
+  with CsvSink(directory=str(tmp_path), row_group_size=2, compression=None, run_id='run') as sink:
+    sink.write(df=pd.DataFrame({'segments#date': ['2020-01-01', '2020-01-02', '2020-01-01'], 'cost': [1, 2, 3]}), customer_id='1')
+    assert sink.buffered_rows == {('1', '2020-01-02'): 1}
+    sink.write(df=pd.DataFrame({'cost': [4]}), customer_id='2')
+  assert pd.read_csv(tmp_path / 'customer_id=1' / 'date=2020-01-01' / 'part-run.csv')['cost'].tolist() == [1, 3]
+  assert pd.read_csv(tmp_path / 'customer_id=1' / 'date=2020-01-02' / 'part-run.csv')['cost'].tolist() == [2]
+  assert pd.read_csv(tmp_path / 'customer_id=2' / 'part-run.csv')['cost'].tolist() == [4]
+  assert not sink.buffers
+
+def test_null_dates(tmp_path):
+  with CsvSink(directory=str(tmp_path), compression=None, run_id='run') as sink:
+    sink.write(df=pd.DataFrame({'segments#date': ['2020-01-01', None, '2020-01-01'], 'cost': [1, 2, 3]}), customer_id='1')
+    sink.write(df=pd.DataFrame({'segments#date': pd.Categorical([None, '2020-01-02']), 'cost': [4, 5]}), customer_id='1')
+  assert pd.read_csv(tmp_path / 'customer_id=1' / 'date=2020-01-01' / 'part-run.csv')['cost'].tolist() == [1, 3]
+  assert pd.read_csv(tmp_path / 'customer_id=1' / 'date=2020-01-02' / 'part-run.csv')['cost'].tolist() == [5]
+  assert pd.read_csv(tmp_path / 'customer_id=1' / 'part-run.csv')['cost'].tolist() == [2, 4]
+
+def test_parquet_sink_schema_promotion(tmp_path):
+  pq = pytest.importorskip('pyarrow.parquet')
+  with ParquetSink(directory=str(tmp_path), row_group_size=1, run_id='run') as sink:
+    sink.write(df=pd.DataFrame({'id': [1], 'name': [None]}), customer_id='1')
+    sink.write(df=pd.DataFrame({'id': [2], 'name': [None]}), customer_id='1')
+    sink.write(df=pd.DataFrame({'id': [3], 'name': ['c'], 'cost': [1.5]}), customer_id='1')
+    sink.write(df=pd.DataFrame({'id': [4], 'name': [None], 'cost': [None]}), customer_id='1')
+  partition = tmp_path / 'customer_id=1'
+  assert sorted(os.listdir(partition)) == ['part-run-1.parquet', 'part-run.parquet']
+  assert pq.read_table(partition / 'part-run.parquet').to_pydict() == {'id': [1, 2], 'name': [None, None]}
+  assert pq.read_table(partition / 'part-run-1.parquet').to_pydict() == {'id': [3, 4], 'name': ['c', None], 'cost': [1.5, None]}
+  df = pd.read_parquet(str(partition)).sort_values('id')
+  assert df['name'].tolist()[2] == 'c'
+  assert df['cost'].tolist()[2] == 1.5
+
+def test_abort(tmp_path):
+  class FailingSink(CsvSink):
+    def _write_partition(self, key, path, df):
+      if key[0] == '1':
+        raise OSError('disk full')
+      super()._write_partition(key=key, path=path, df=df)
+
+  sink = FailingSink(directory=str(tmp_path), compression=None, run_id='run')
+  sink.write(df=pd.DataFrame({'cost': [1]}), customer_id='1')
+  sink.write(df=pd.DataFrame({'cost': [2]}), customer_id='2')
+  with pytest.raises(ValueError):
+    with sink:
+      raise ValueError('report failed')
+  assert not sink.buffers and not sink.buffered_rows
+  assert pd.read_csv(tmp_path / 'customer_id=2' / 'part-run.csv')['cost'].tolist() == [2]
@@ -12,5 +12,9 @@ setup(name='hazel',
         "googleads",
         "pandas",
         "google-ads",
+        "grpcio>=1.32",
       ],
+      extras_require={
+        "parquet": ["pyarrow>=14"],
+      },
       zip_safe=False)